@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Backup tool for Packer Tracker: list incremental backups and restore any point in time
+"""
+
+import os
+import sys
+import json
+import argparse
+
+# Add the backend directory to the path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.backup import IncrementalBackupManager
+
+def list_backups(manager):
+    """Print every backup point in the manifest"""
+    backups = manager.list_backups()
+    if not backups:
+        print("📭 No backups recorded yet.")
+        return
+
+    print(f"{'#':>3}  {'Created':<26}  {'Type':<5}  {'Added':>7}  {'Total':>8}  File")
+    for index, entry in enumerate(backups):
+        print(f"{index:>3}  {entry['created']:<26}  {entry['type']:<5}  "
+              f"{entry['orders_added']:>7}  {entry['total_orders']:>8}  {entry['file']}")
+
+def restore(manager, at, output):
+    """Rebuild a backup point and write it as packer_data.json format"""
+    data = manager.restore(at)
+    if os.path.exists(output):
+        print(f"❌ {output} already exists, choose another output file")
+        return False
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+    total = sum(len(orders) for orders in data.values())
+    print(f"✅ Restored {total} orders to {output}")
+    print("📋 Stop the application and replace packer_data.json with this file to roll back")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Packer Tracker incremental backup tool')
+    parser.add_argument('--backup-dir', default='backups')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('list', help='List backup points')
+
+    restore_parser = subparsers.add_parser('restore', help='Rebuild data as of a backup point')
+    restore_parser.add_argument('--at', help='ISO timestamp (newest point at or before it) or backup number from list')
+    restore_parser.add_argument('--output', default='packer_data_restored.json')
+
+    args = parser.parse_args()
+    manager = IncrementalBackupManager(args.backup_dir)
+
+    if args.command == 'list':
+        list_backups(manager)
+        return True
+
+    at = args.at
+    if at is not None and at.lstrip('-').isdigit():
+        at = int(at)
+    try:
+        return restore(manager, at, args.output)
+    except (ValueError, OSError) as e:
+        print(f"❌ Restore failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Benchmark tool for Packer Tracker: seed synthetic histories, time the storage
+and HTTP paths, simulate several stations writing at once and save the
+results as JSON so runs can be compared across versions
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import platform
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+import urllib.request
+import urllib.error
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path for imports
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+
+from models import compact_storage
+
+BENCHMARK_VERSION = 1
+DATA_FILES = {'compact': 'packer_data.pkc', 'sqlite': 'packer_data.db'}
+METRIC_FIELDS = ('count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    if not samples:
+        return {field: 0 for field in METRIC_FIELDS}
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'p50_ms': round(percentile(50), 3),
+        'p95_ms': round(percentile(95), 3),
+        'p99_ms': round(percentile(99), 3),
+        'max_ms': round(ordered[-1] * 1000, 3)
+    }
+
+def timed(function, *args, **kwargs):
+    """Run function once and return (seconds, result)"""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def current_rss_mb():
+    """Resident memory of this process in MB, or None where it can't be read"""
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / 2 ** 20, 1)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return round(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def order_number(index):
+    """Synthetic order number: 6 digits while they last, then 7+"""
+    return f'{index:06d}'
+
+def seed(mode, data_file, orders, packers, days, rng):
+    """Write a synthetic history straight into the storage format; returns seconds taken"""
+    start = time.perf_counter()
+    names = [f'Packer {i + 1:02d}' for i in range(packers)]
+    first = datetime.now() - timedelta(days=days)
+    step = days * 86400 / max(orders, 1)
+
+    rows = (
+        (rng.choice(names), order_number(i), (first + timedelta(seconds=i * step)).isoformat(timespec='seconds'))
+        for i in range(orders)
+    )
+
+    if mode == 'sqlite':
+        from models.sqlite_database import SQLitePackerDatabase
+        db = SQLitePackerDatabase(data_file=data_file)
+        db._import_rows(rows)
+        db.close()
+    else:
+        data = {name: [] for name in names}
+        for packer_name, number, timestamp in rows:
+            data[packer_name].append({'order': number, 'timestamp': timestamp})
+        if mode == 'compact':
+            compact_storage.write(data_file, data)
+        else:
+            with open(data_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+
+    return time.perf_counter() - start
+
+def disable_automatic_backups(db):
+    """Backups are timed on their own, keep them out of the other phases"""
+    db.backup_config['backup_every_orders'] = 10 ** 12
+    db.backup_config['backup_every_hours'] = 10 ** 6
+
+def station_worker(run_dir, first_order, count, packer_name, start_event, results):
+    """One simulated station: wait for the start signal, then record count orders"""
+    os.chdir(run_dir)
+    from controllers.packer_controller import PackerController
+
+    controller = PackerController()
+    disable_automatic_backups(controller.db)
+    latencies, errors = [], 0
+    start_event.wait()
+    for i in range(count):
+        try:
+            seconds, _ = timed(controller.db.save_packer_data, packer_name, order_number(first_order + i))
+            latencies.append(seconds)
+        except Exception:
+            errors += 1
+    lock_metrics = controller.db.get_lock_metrics()
+    controller.shutdown()
+    results.put({'latencies': latencies, 'errors': errors, 'lock': lock_metrics})
+
+def run_stations(run_dir, db, first_order, stations, orders_per_station):
+    """M processes recording into the same data file at once"""
+    context = multiprocessing.get_context('spawn')
+    start_event = context.Event()
+    results = context.Queue()
+    before = len(db.get_all_orders())
+
+    processes = [
+        context.Process(
+            target=station_worker,
+            args=(run_dir, first_order + i * orders_per_station, orders_per_station,
+                  f'Station {i + 1}', start_event, results)
+        )
+        for i in range(stations)
+    ]
+    for process in processes:
+        process.start()
+    time.sleep(1.0)  # Let every station finish loading before the race starts
+
+    started = time.perf_counter()
+    start_event.set()
+    reports = [results.get() for _ in processes]
+    wall = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    latencies = [seconds for report in reports for seconds in report['latencies']]
+    lock = {}
+    for report in reports:
+        for key, value in report['lock'].items():
+            if isinstance(value, (int, float)):
+                lock[key] = max(lock.get(key, 0), value) if key.startswith('max') else lock.get(key, 0) + value
+
+    # Lost means acknowledged but missing; failed submits (lock timeouts) are counted as errors
+    recorded = len(db.get_all_orders()) - before
+    acknowledged = len(latencies)
+    return {
+        'stations': stations,
+        'orders_per_station': orders_per_station,
+        'wall_seconds': round(wall, 3),
+        'throughput_per_second': round(len(latencies) / wall, 1) if wall else None,
+        'submit': summarize(latencies),
+        'errors': sum(report['errors'] for report in reports),
+        'lost_orders': acknowledged - recorded,
+        'lock': lock
+    }
+
+def time_to_first_page(run_dir, timeout=120.0):
+    """Launch startup.py as a station would and time its first page and first data response
+
+    Returns (first page seconds, first /api/statistics seconds), both
+    measured from process launch, interpreter start-up included.
+    """
+    with socket.socket() as probe:
+        probe.bind(('localhost', 0))
+        port = probe.getsockname()[1]
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, 'startup.py'), '--port', str(port), '--no-browser'],
+        cwd=run_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        timings = []
+        for path in ('/', '/api/statistics'):
+            while True:
+                if time.perf_counter() - started > timeout or process.poll() is not None:
+                    raise RuntimeError(f"startup.py did not serve {path}")
+                try:
+                    with urllib.request.urlopen(f'http://localhost:{port}{path}', timeout=timeout) as response:
+                        response.read()
+                    break
+                except (urllib.error.URLError, ConnectionError):
+                    time.sleep(0.005)
+            timings.append(time.perf_counter() - started)
+        return tuple(timings)
+    finally:
+        process.terminate()  # SIGTERM runs the shutdown hooks
+        process.wait(30)
+
+def run_size(options, orders, run_dir, results):
+    """Benchmark one dataset size in a fresh process so memory readings are comparable"""
+    os.chdir(run_dir)
+    os.environ['PACKER_STORAGE_MODE'] = options['mode']
+    if options['partition_period']:
+        os.environ['PACKER_PARTITION_PERIOD'] = options['partition_period']
+    rng = random.Random(options['seed'])
+    data_file = DATA_FILES.get(options['mode'], 'packer_data.json')
+    samples = options['samples']
+
+    run = {'orders': orders, 'packers': options['packers'], 'mode': options['mode'],
+           'partition_period': options['partition_period']}
+    run['seed_seconds'] = round(seed(options['mode'], data_file, orders, options['packers'], options['days'], rng), 3)
+    run['data_bytes'] = os.path.getsize(data_file)
+    first_page, first_data = time_to_first_page(run_dir)
+    run['first_page_ms'] = round(first_page * 1000, 1)
+    run['first_data_ms'] = round(first_data * 1000, 1)
+
+    rss_before = current_rss_mb()
+    cold_load, _ = timed(__import__, 'startup')
+    import startup
+    db = startup.get_controller().db
+    disable_automatic_backups(db)
+    first_read, _ = timed(db.get_recent_orders, 10)
+    run['cold_start_ms'] = round((cold_load + first_read) * 1000, 3)
+    rss_after = current_rss_mb()
+    run['memory_mb'] = round(rss_after - rss_before, 1) if rss_before is not None else None
+
+    client = startup.app.test_client()
+    next_order = orders
+
+    metrics = {}
+    metrics['submit'] = summarize([
+        timed(db.save_packer_data, rng.choice(['Bench A', 'Bench B']), order_number(next_order + i))[0]
+        for i in range(samples)
+    ])
+    next_order += samples
+
+    existing = [order_number(rng.randrange(orders)) for _ in range(samples)] if orders else []
+    missing = [order_number(next_order + options['stations'] * options['station_orders'] + i) for i in range(samples)]
+    metrics['duplicate_check_hit'] = summarize([timed(db.find_packer_by_order, number)[0] for number in existing])
+    metrics['duplicate_check_miss'] = summarize([timed(db.find_packer_by_order, number)[0] for number in missing])
+    metrics['recent_orders'] = summarize([timed(db.get_recent_orders, 10)[0] for _ in range(samples)])
+
+    def get(url):
+        response = client.get(url)
+        response.get_data()
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+
+    metrics['orders_page'] = summarize([timed(get, '/orders')[0] for _ in range(samples)])
+    metrics['api_orders_first_page'] = summarize([timed(get, '/api/orders?limit=100')[0] for _ in range(samples)])
+    metrics['api_orders_search'] = summarize([timed(get, f'/api/orders?q={rng.randrange(1000):03d}&limit=100')[0]
+                                             for _ in range(samples)])
+    metrics['api_statistics'] = summarize([timed(get, '/api/statistics')[0] for _ in range(samples)])
+
+    def post_submit(number):
+        client.post('/submit', data={'packer_name': 'Bench HTTP', 'order_number': number}).get_data()
+
+    metrics['http_submit'] = summarize([timed(post_submit, order_number(next_order + i))[0] for i in range(samples)])
+    next_order += samples
+
+    # First backup after seeding is a full base, the next one (after new orders) a delta where supported
+    metrics['backup_base'] = summarize([timed(db._create_backup)[0]])
+    for i in range(samples):
+        db.save_packer_data('Bench A', order_number(next_order + i))
+    next_order += samples
+    metrics['backup_delta'] = summarize([timed(db._create_backup)[0]])
+    run['metrics'] = metrics
+
+    if options['stations']:
+        run['concurrency'] = run_stations(run_dir, db, next_order, options['stations'], options['station_orders'])
+
+    run['peak_memory_mb'] = current_rss_mb()
+    startup.shutdown_controller()
+    results.put(run)
+
+def git_commit():
+    """Commit the benchmark ran against, if this is a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def compare(previous_file, runs):
+    """Print p50 changes against an earlier results file"""
+    with open(previous_file, 'r', encoding='utf-8') as f:
+        previous = {(run['mode'], run['orders']): run for run in json.load(f)['runs']}
+
+    print(f"\n📊 Compared with {previous_file} (p50, negative is faster)")
+    for run in runs:
+        old = previous.get((run['mode'], run['orders']))
+        if not old:
+            continue
+        for name, metric in run['metrics'].items():
+            before = old.get('metrics', {}).get(name, {}).get('p50_ms')
+            if before:
+                change = (metric['p50_ms'] - before) / before * 100
+                flag = '⚠️' if change > 20 else '  '
+                print(f"{flag} {run['mode']:<8} {run['orders']:>9,}  {name:<24} {before:>10.3f} -> {metric['p50_ms']:>10.3f} ms  {change:+6.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description='Packer Tracker storage and HTTP benchmark')
+    parser.add_argument('--orders', default='10000,100000',
+                        help='Comma-separated history sizes to seed (10k to 5M; above 1M order numbers grow to 7 digits)')
+    parser.add_argument('--packers', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365, help='Seeded history spans this many days')
+    parser.add_argument('--mode', default=os.environ.get('PACKER_STORAGE_MODE', 'json'),
+                        choices=['json', 'journal', 'compact', 'sqlite'])
+    parser.add_argument('--partition-period', choices=['month', 'year', 'day'])
+    parser.add_argument('--samples', type=int, default=50, help='Timed repetitions per operation')
+    parser.add_argument('--stations', type=int, default=4, help='Concurrent station processes (0 to skip)')
+    parser.add_argument('--station-orders', type=int, default=100, help='Orders each station records')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workdir', help='Where to create the data files (default: a temporary folder)')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated data files')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.orders.split(',') if size.strip()]
+    options = {
+        'mode': args.mode,
+        'partition_period': args.partition_period,
+        'packers': args.packers,
+        'days': args.days,
+        'samples': args.samples,
+        'stations': args.stations,
+        'station_orders': args.station_orders,
+        'seed': args.seed
+    }
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix='packer_benchmark_'))
+    context = multiprocessing.get_context('spawn')
+
+    runs = []
+    try:
+        for orders in sizes:
+            run_dir = os.path.join(workdir, f'{args.mode}_{orders}')
+            shutil.rmtree(run_dir, ignore_errors=True)
+            os.makedirs(run_dir)
+            print(f"⏱️ Benchmarking {orders:,} orders ({args.mode})...")
+
+            results = context.Queue()
+            process = context.Process(target=run_size, args=(options, orders, run_dir, results))
+            process.start()
+            run = results.get()
+            process.join()
+            runs.append(run)
+
+            print(f"   first page {run['first_page_ms']} ms after launch, data ready {run['first_data_ms']} ms")
+            for name, metric in run['metrics'].items():
+                print(f"   {name:<24} p50 {metric['p50_ms']:>10.3f} ms   p95 {metric['p95_ms']:>10.3f} ms")
+            if 'concurrency' in run:
+                concurrency = run['concurrency']
+                print(f"   {concurrency['stations']} stations: {concurrency['throughput_per_second']} orders/s, "
+                      f"p95 {concurrency['submit']['p95_ms']} ms, errors {concurrency['errors']}, "
+                      f"lost {concurrency['lost_orders']}")
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'benchmark_version': BENCHMARK_VERSION,
+        'generated_at': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'git_commit': git_commit()
+        },
+        'config': options,
+        'runs': runs
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.compare:
+        compare(args.compare, runs)
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
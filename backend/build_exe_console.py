@@ -18,18 +18,23 @@ def install_pyinstaller():
         subprocess.check_call([sys.executable, "-m", "pip", "install", "pyinstaller"])
         print("✅ PyInstaller installed successfully")
 
-def build_executable():
-    """Build the executable using PyInstaller (with console)"""
+def build_executable(onedir=False):
+    """Build the executable using PyInstaller (with console)
+    
+    onedir builds a folder instead of a single file: stations start it
+    without unpacking the whole bundle to a temporary folder on every launch.
+    """
     print("🔨 Building executable (with console)...")
     
     # PyInstaller command with options (no --windowed flag to show console)
     cmd = [
         "pyinstaller",
-        "--onefile",                    # Create a single executable file
+        "--onedir" if onedir else "--onefile",  # Folder (fast start) or single executable file
         "--name=PackerTracker_Console", # Name of the executable
         "--add-data=../frontend;frontend",  # Include frontend folder
         "--add-data=controllers;controllers",  # Include controllers
         "--add-data=models;models",     # Include models
+        "--exclude-module=tkinter",     # Never used, keeps the bundle small
         "--icon=icon.ico",              # Add icon if available
         "--distpath=../dist",           # Output directory (go up one level)
         "startup.py"                    # Main script
@@ -42,7 +47,10 @@ def build_executable():
     try:
         subprocess.check_call(cmd)
         print("✅ Executable built successfully!")
-        print(f"📁 Executable location: {os.path.abspath('../dist/PackerTracker_Console.exe')}")
+        if onedir:
+            print(f"📁 Executable location: {os.path.abspath('../dist/PackerTracker_Console/PackerTracker_Console.exe')}")
+        else:
+            print(f"📁 Executable location: {os.path.abspath('../dist/PackerTracker_Console.exe')}")
     except subprocess.CalledProcessError as e:
         print(f"❌ Error building executable: {e}")
         return False
@@ -81,8 +89,8 @@ def main():
     # Install PyInstaller
     install_pyinstaller()
     
-    # Build executable
-    if build_executable():
+    # Build executable (--onedir: folder build that starts faster from a network share)
+    if build_executable(onedir='--onedir' in sys.argv):
         # Create launcher script
         create_launcher_script()
         
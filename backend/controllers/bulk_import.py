@@ -0,0 +1,187 @@
+import io
+import csv
+import json
+import tempfile
+from datetime import datetime
+from itertools import islice
+
+ORDER_NUMBER_DIGITS = 6
+
+# Recognised CSV header cells for each column
+HEADER_NAMES = {
+    'packer': ('packer', 'packer_name'),
+    'order': ('order', 'order_number'),
+    'timestamp': ('timestamp',)
+}
+
+def is_valid_order_number(order_number):
+    """Order numbers are exactly 6 digits"""
+    return order_number.isdigit() and len(order_number) == ORDER_NUMBER_DIGITS
+
+def normalize_timestamp(value):
+    """Validate an optional ISO timestamp; returns naive local ISO text"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.isoformat()
+
+def iter_rows(text_stream, fmt):
+    """Yield (row number, packer, order, timestamp) from a CSV or JSONL text stream
+
+    CSV may have a header row naming its columns (packer or packer_name,
+    order or order_number, timestamp); it is only taken as a header when
+    every cell is one of those names and an order column is present, so
+    a scan by a packer called "Border" is never mistaken for one. Without
+    a header the columns are packer, order, timestamp. Malformed rows
+    yield an error message in place of the packer name, with order set
+    to None.
+    """
+    if fmt == 'jsonl':
+        for row_number, line in enumerate(text_stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, f'Invalid JSON: {e.msg}', None, None
+                continue
+            if not isinstance(record, dict):
+                yield row_number, 'Each line must be a JSON object', None, None
+                continue
+            yield (
+                row_number,
+                str(record.get('packer', record.get('packer_name', ''))),
+                str(record.get('order', record.get('order_number', ''))),
+                record.get('timestamp')
+            )
+        return
+
+    reader = csv.reader(text_stream)
+    columns = (0, 1, 2)
+    for row_number, row in enumerate(reader, start=1):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if row_number == 1:
+            header = [cell.strip().lower().replace(' ', '_') for cell in row]
+            known = {name: column for column, names in HEADER_NAMES.items() for name in names}
+            if all(cell in known for cell in header if cell) and any(known.get(cell) == 'order' for cell in header):
+                found = {known[cell]: i for i, cell in reversed(list(enumerate(header))) if cell}
+                columns = (found.get('packer', 0), found['order'], found.get('timestamp'))
+                continue
+
+        def cell(index):
+            return row[index] if index is not None and index < len(row) else ''
+
+        yield row_number, cell(columns[0]), cell(columns[1]), cell(columns[2]) or None
+
+class BulkImporter:
+    """Validate a stream of scans and commit the good ones in bounded storage transactions
+
+    Rows are validated one at a time and their outcomes are staged in a
+    temporary file, so memory holds only the set of order numbers seen in
+    this batch, never the whole upload. stage() reads the input, commit()
+    writes the accepted rows with one db.import_orders() call per
+    chunk_rows rows, and iter_outcomes() streams one JSON line per row
+    plus a summary. If a later chunk fails, earlier ones stay recorded;
+    uploading the same file again reports them as duplicates.
+    """
+
+    def __init__(self, db, chunk_rows=5000):
+        self.db = db
+        self.chunk_rows = chunk_rows  # Most accepted rows held in memory and written by one transaction
+        self.staging = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+        self.summary = {'rows': 0, 'recorded': 0, 'duplicate': 0, 'invalid': 0}
+        self.committed_duplicates = set()
+        self.committed = False
+
+    def _stage(self, outcome):
+        self.staging.write(json.dumps(outcome, ensure_ascii=False) + '\n')
+
+    def stage(self, text_stream, fmt='csv'):
+        """Validate every row and record its provisional outcome"""
+        seen = set()
+        for row_number, packer_name, order_number, timestamp in iter_rows(text_stream, fmt):
+            self.summary['rows'] += 1
+            outcome = {'row': row_number}
+
+            if order_number is None:
+                outcome.update(status='invalid', error=packer_name)
+            else:
+                packer_name = packer_name.strip()
+                order_number = order_number.strip()
+                outcome.update(packer_name=packer_name, order_number=order_number)
+                error = None
+                if not packer_name:
+                    error = 'Packer name is required'
+                elif not is_valid_order_number(order_number):
+                    error = f'Order number must be exactly {ORDER_NUMBER_DIGITS} digits'
+                else:
+                    try:
+                        timestamp = normalize_timestamp(timestamp) if timestamp else datetime.now().isoformat()
+                    except (TypeError, ValueError):
+                        error = f'Invalid timestamp: {timestamp}'
+
+                if error:
+                    outcome.update(status='invalid', error=error)
+                elif order_number in seen:
+                    outcome.update(status='duplicate', error='Repeated earlier in this upload')
+                else:
+                    # Provisional: commit() re-checks every row under the lock, so
+                    # the resident view is not re-validated against the files per row
+                    existing = self.db.find_packer_by_order(order_number, refresh=False)
+                    if existing:
+                        outcome.update(status='duplicate', error=f'Already recorded by {existing["packer_name"]}')
+                    else:
+                        seen.add(order_number)
+                        outcome.update(status='pending', timestamp=timestamp)
+
+            if outcome['status'] != 'pending':
+                self.summary[outcome['status']] += 1
+            self._stage(outcome)
+
+        self.staging.flush()
+        return self.summary
+
+    def _pending_entries(self):
+        """Accepted rows from the staging file, as storage entries"""
+        self.staging.seek(0)
+        for line in self.staging:
+            outcome = json.loads(line)
+            if outcome['status'] == 'pending':
+                yield outcome['packer_name'], outcome['order_number'], outcome['timestamp']
+
+    def commit(self):
+        """Write the accepted rows, one storage transaction per chunk_rows rows"""
+        entries = self._pending_entries()
+        while True:
+            chunk = list(islice(entries, self.chunk_rows))
+            if not chunk:
+                break
+            duplicates = self.db.import_orders(chunk)
+            self.committed_duplicates.update(result['order_number'] for result in duplicates)
+        self.committed = True
+        return self.summary
+
+    def iter_outcomes(self):
+        """Yield one JSON line per row, then a summary line; closes the staging file"""
+        try:
+            self.staging.seek(0)
+            for line in self.staging:
+                outcome = json.loads(line)
+                if outcome['status'] == 'pending':
+                    if not self.committed:
+                        outcome['status'] = 'not_committed'
+                    elif outcome['order_number'] in self.committed_duplicates:
+                        outcome.update(status='duplicate', error='Recorded by another station during the import')
+                        self.summary['duplicate'] += 1
+                    else:
+                        outcome['status'] = 'recorded'
+                        self.summary['recorded'] += 1
+                yield json.dumps(outcome, ensure_ascii=False) + '\n'
+            yield json.dumps({'summary': self.summary}) + '\n'
+        finally:
+            self.staging.close()
+
+def open_text_stream(binary_stream):
+    """Wrap a binary stream (request body, file) for line-by-line text parsing"""
+    return io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
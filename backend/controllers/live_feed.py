@@ -0,0 +1,75 @@
+import json
+import time
+from threading import Lock
+
+HEARTBEAT_SECONDS = 10  # Comment line sent while idle, so dead connections are noticed
+STREAM_LIFETIME_SECONDS = 300  # Streams end after this long; browsers reconnect with Last-Event-ID
+RECONNECT_MS = 3000  # Browser reconnect delay
+
+def parse_sequence(value):
+    """Feed sequence from a Last-Event-ID header or ?since= value, or None"""
+    try:
+        sequence = int(value)
+    except (TypeError, ValueError):
+        return None
+    return sequence if sequence >= 0 else None
+
+def format_event(event, data, event_id=None):
+    """One Server-Sent Events message"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False)}')
+    return '\n'.join(lines) + '\n\n'
+
+class SubscriberLimit:
+    """Counts open live streams so they can never hold every request worker"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.open = 0
+        self._lock = Lock()
+
+    def acquire(self):
+        """Take a slot for a new stream; False when all are in use"""
+        with self._lock:
+            if self.open >= self.limit:
+                return False
+            self.open += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.open -= 1
+
+def iter_events(feed, after=None, heartbeat=HEARTBEAT_SECONDS, lifetime=STREAM_LIFETIME_SECONDS):
+    """Stream new orders from an OrderFeed as Server-Sent Events
+
+    Starts with a 'ready' event carrying the current sequence, then sends
+    one 'order' event per recorded order. A subscriber that fell too far
+    behind (or reconnected across a restart) gets 'resync' instead and
+    should reload its table. The stream ends after lifetime seconds, so a
+    dashboard only holds a request worker for a while; the browser then
+    reconnects and resumes from the last event id it saw.
+    """
+    if after is None:
+        after = feed.sequence
+    deadline = time.monotonic() + lifetime
+    yield f'retry: {RECONNECT_MS}\n\n'  # Browser reconnect delay in milliseconds
+    # Carries an id so a reconnect before any order resumes from here
+    yield format_event('ready', {'sequence': after}, event_id=after)
+
+    while not feed.closed:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events, complete = feed.wait(after, min(heartbeat, remaining))
+        if not complete:
+            after = feed.sequence
+            yield format_event('resync', {'sequence': after}, event_id=after)
+            continue
+        if not events:
+            yield ': keep-alive\n\n'
+            continue
+        for event in events:
+            yield format_event('order', event, event_id=event['sequence'])
+        after = events[-1]['sequence']
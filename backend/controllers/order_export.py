@@ -0,0 +1,52 @@
+import io
+import csv
+import json
+
+EXPORT_FIELDS = ('packer_name', 'order_number', 'timestamp')
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson'
+}
+
+def iter_csv(orders, chunk_rows=500):
+    """Encode order dicts as CSV text, yielding the header first and then chunks of rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+
+    rows = 0
+    buffer.seek(0)
+    buffer.truncate()
+    for order in orders:
+        writer.writerow([order[field] for field in EXPORT_FIELDS])
+        rows += 1
+        if rows == chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+
+    if rows:
+        yield buffer.getvalue()
+
+def iter_jsonl(orders, chunk_rows=500):
+    """Encode order dicts as JSON Lines text, chunk_rows lines per yielded string"""
+    lines = []
+    for order in orders:
+        lines.append(json.dumps(order, ensure_ascii=False) + '\n')
+        if len(lines) == chunk_rows:
+            yield ''.join(lines)
+            lines = []
+
+    if lines:
+        yield ''.join(lines)
+
+def iter_export(orders, fmt):
+    """Stream orders in the given export format"""
+    if fmt == 'csv':
+        return iter_csv(orders)
+    if fmt == 'jsonl':
+        return iter_jsonl(orders)
+    raise ValueError(f"Format must be one of: {', '.join(EXPORT_FORMATS)}")
@@ -5,26 +5,139 @@ import os
 # Add the backend directory to the path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.database import PackerDatabase
+import hashlib
+from datetime import datetime
+
+from models.database import PackerDatabase, DuplicateOrderError
+from models.submit_spool import SubmitSpool
+from models.file_lock import LockTimeout
+from controllers.bulk_import import BulkImporter
+from controllers.order_export import iter_export
+from controllers.live_feed import iter_events
+
+# Default data file for each storage mode
+DATA_FILES = {
+    'compact': 'packer_data.pkc',
+    'sqlite': 'packer_data.db'
+}
+
+def parse_date_range(start_date, end_date):
+    """Validate optional inclusive YYYY-MM-DD bounds; returns (start, end) with blanks as None"""
+    bounds = []
+    for name, value in (('Start', start_date), ('End', end_date)):
+        value = (value or '').strip() or None
+        if value:
+            try:
+                # Round trip, so 2025-7-1 (which strptime accepts) is rejected too:
+                # dates are compared with stored timestamps as text
+                valid = datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d') == value
+            except ValueError:
+                valid = False
+            if not valid:
+                raise ValueError(f'{name} date must be a date in YYYY-MM-DD form')
+        bounds.append(value)
+    if bounds[0] and bounds[1] and bounds[0] > bounds[1]:
+        raise ValueError('Start date cannot be after end date')
+    return tuple(bounds)
+
+def open_database(storage_mode=None, data_file=None, prepare=True):
+    """Database for the configured storage (PACKER_* environment variables), with no background work started
+    
+    Command line tools use it directly; PackerController adds migration,
+    the maintenance worker and the submit spool on top. prepare=False
+    leaves the files untouched until something is written (see PackerDatabase).
+    """
+    # Storage mode: 'json' (default, full rewrite), 'journal' (append-only log),
+    # 'compact' (append-only log over a binary columnar snapshot) or 'sqlite'
+    storage_mode = storage_mode or os.environ.get('PACKER_STORAGE_MODE', 'json')
+    data_file = data_file or DATA_FILES.get(storage_mode, 'packer_data.json')
+    if storage_mode == 'sqlite':
+        from models.sqlite_database import SQLitePackerDatabase  # Only imports sqlite3 when used
+        # 'wal' only with the database on a local disk; the default suits a network share
+        journal_mode = os.environ.get('PACKER_SQLITE_JOURNAL_MODE') or 'delete'
+        return SQLitePackerDatabase(data_file=data_file, journal_mode=journal_mode)
+    
+    # Optional 'month', 'year' or 'day': archive closed periods out of the data file
+    partition_period = os.environ.get('PACKER_PARTITION_PERIOD') or None
+    db = PackerDatabase(data_file=data_file, storage_mode=storage_mode,
+                        partition_period=partition_period, prepare=prepare)
+    # Optional extra wait (milliseconds) to gather concurrent scans into one write
+    window_ms = os.environ.get('PACKER_GROUP_COMMIT_WINDOW_MS')
+    if window_ms:
+        db.group_commit.window_seconds = float(window_ms) / 1000
+    # Optional interval (milliseconds) between checks for other writers on reads;
+    # worth setting on a central server that is the only process writing
+    recheck_ms = os.environ.get('PACKER_RECHECK_MS')
+    if recheck_ms:
+        db.storage_config['recheck_seconds'] = float(recheck_ms) / 1000
+    return db
 
 class PackerController:
     """Controller for packer-related operations"""
     
     def __init__(self):
-        self.db = PackerDatabase()
+        storage_mode = os.environ.get('PACKER_STORAGE_MODE', 'json')
+        data_file = DATA_FILES.get(storage_mode, 'packer_data.json')
+        
+        # Check for old data before the database creates an empty file
+        old_files = self._find_old_data(data_file)
+        self.db = open_database(storage_mode, data_file)
         # Attempt migration from old format if needed
-        self._migrate_if_needed()
-    
-    def _migrate_if_needed(self):
-        """Attempt to migrate from old text format to new JSON format if needed"""
-        old_file = 'packer_data.txt'
-        if os.path.exists(old_file) and not os.path.exists(self.db.data_file):
-            print("🔄 Migrating from old text format to new JSON format...")
-            if self.db.migrate_from_txt(old_file):
+        self._migrate_if_needed(old_files)
+        # Backups and backup state are handled by a background worker
+        self.db.start_maintenance()
+        # Optional: acknowledge scans once spooled on this station's disk and
+        # write them to shared storage in the background
+        self.spool = None
+        if os.environ.get('PACKER_ASYNC_SUBMIT', '').lower() in ('1', 'true', 'yes'):
+            self.spool = SubmitSpool(self.db, self._spool_file(data_file))
+            self.spool.start()
+    
+    def warm_up(self):
+        """Load the data and its indexes ahead of the first request"""
+        self.db.get_packer_names()
+    
+    def shutdown(self):
+        """Stop background work cleanly before the process exits"""
+        if self.spool and not self.spool.shutdown():
+            print("📮 Some scans are still waiting for shared storage; they are sent on the next start")
+        if not self.db.shutdown():
+            print("⚠️ Background maintenance did not finish in time")
+    
+    @staticmethod
+    def _spool_file(data_file):
+        """Spool file on this station's own disk, one per shared data file"""
+        spool_dir = os.environ.get('PACKER_SPOOL_DIR') or os.path.join(
+            os.environ.get('LOCALAPPDATA') or os.path.expanduser('~'), 'PackerTracker'
+        )
+        digest = hashlib.sha1(os.path.abspath(data_file).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(spool_dir, f'submit_spool_{digest}.jsonl')
+    
+    def _find_old_data(self, data_file):
+        """List older-format data files that should be migrated into data_file"""
+        if os.path.exists(data_file):
+            return []
+        
+        candidates = ['packer_data.txt']
+        if data_file != 'packer_data.json':
+            candidates.insert(0, 'packer_data.json')
+        return [old_file for old_file in candidates if os.path.exists(old_file)]
+    
+    def _migrate_if_needed(self, old_files):
+        """Attempt to migrate from old text or JSON format to the current storage if needed"""
+        for old_file in old_files:
+            if old_file.endswith('.json'):
+                print(f"🔄 Migrating {old_file} to {self.db.data_file}...")
+                migrated = self.db.migrate_from_json(old_file)
+            else:
+                print("🔄 Migrating from old text format to new JSON format...")
+                migrated = self.db.migrate_from_txt(old_file)
+            
+            if migrated:
                 print("✅ Migration completed successfully!")
                 print(f"📁 Old data backed up as {old_file}.backup")
-            else:
-                print("❌ Migration failed. Using new format with empty data.")
+                return
+            print("❌ Migration failed. Using new format with empty data.")
     
     def submit_order(self, packer_name, order_number):
         """Submit a new order with validation"""
@@ -40,11 +153,10 @@ class PackerController:
         packer_name = packer_name.strip()
         order_number = order_number.strip()
         
-        # Check if order already exists
-        if self.db.order_exists(order_number):
-            existing = self.db.find_packer_by_order(order_number)
-            if existing:
-                flash(f'Order number {order_number} has already been recorded by {existing["packer_name"]}.', 'error')
+        # Check if order already exists (single index lookup)
+        existing = self.db.find_packer_by_order(order_number)
+        if existing:
+            flash(f'Order number {order_number} has already been recorded by {existing["packer_name"]}.', 'error')
             return False
         
         # Save the order
@@ -52,10 +164,65 @@ class PackerController:
             self.db.save_packer_data(packer_name, order_number)
             flash(f'Successfully recorded! Packer {packer_name} completed order {order_number}.', 'success')
             return True
+        except DuplicateOrderError as e:
+            flash(f'Order number {order_number} has already been recorded by {e.existing["packer_name"]}.', 'error')
+            return False
+        except LockTimeout:
+            flash('The shared data file is busy, please try again in a moment.', 'error')
+            return False
         except Exception as e:
             flash(f'Error saving order: {str(e)}', 'error')
             return False
     
+    def queue_order(self, packer_name, order_number, key=None):
+        """Queue a new order in the local spool; returns (entry, created)
+        
+        Retries with the same idempotency key return the existing entry.
+        Raises ValueError for missing fields and DuplicateOrderError for an
+        order already waiting in the spool or already recorded as far as
+        this station knows. Duplicates recorded by other stations since are
+        reported by the submission status once the background flush
+        reaches them.
+        """
+        packer_name = (packer_name or '').strip()
+        order_number = (order_number or '').strip()
+        if not packer_name:
+            raise ValueError('Please enter a packer name.')
+        if not order_number:
+            raise ValueError('Please enter an order number.')
+        return self.spool.submit(packer_name, order_number, key)
+    
+    def submit_order_async(self, packer_name, order_number, key=None):
+        """Form submission through the spool: acknowledged once queued on this station's disk"""
+        try:
+            entry, _ = self.queue_order(packer_name, order_number, key)
+        except DuplicateOrderError as e:
+            flash(f'Order number {order_number.strip()} has already been recorded by {e.existing["packer_name"]}.', 'error')
+            return False
+        except ValueError as e:
+            flash(str(e), 'error')
+            return False
+        except OSError as e:
+            flash(f'Error saving order: {str(e)}', 'error')
+            return False
+        
+        if entry['status'] == 'failed':
+            flash(entry['error'], 'error')
+            return False
+        if entry['status'] == 'recorded':
+            flash(f'Successfully recorded! Packer {entry["packer_name"]} completed order {entry["order_number"]}.', 'success')
+        else:
+            # Only on this station's disk so far; the submission status box tracks the rest
+            flash(f'Queued! Packer {entry["packer_name"]} completed order {entry["order_number"]}. '
+                  f'It is being saved to shared storage; check the submission status below if it does not clear.', 'success')
+        return True
+    
+    def submission_status(self):
+        """Pending and failed asynchronous submissions"""
+        if not self.spool:
+            return {'enabled': False, 'pending': [], 'failed': [], 'recorded': 0}
+        return self.spool.status()
+    
     def search_order(self, order_number):
         """Search for an order by order number"""
         # Input validation is handled in the route
@@ -77,11 +244,76 @@ class PackerController:
         """Get all orders"""
         return self.db.get_all_orders() 
     
+    def query_orders(self, args):
+        """Run a paginated order query from request arguments"""
+        sort_fields = {
+            'timestamp': 'timestamp',
+            'order': 'order_number',
+            'packer': 'packer_name'
+        }
+        sort = sort_fields.get(args.get('sort', 'timestamp'))
+        if sort is None:
+            raise ValueError(f"Sort must be one of: {', '.join(sort_fields)}")
+        
+        try:
+            limit = int(args.get('limit', 50))
+            offset = int(args.get('offset', 0))
+        except ValueError:
+            raise ValueError('Limit and offset must be whole numbers')
+        if limit < 1 or offset < 0:
+            raise ValueError('Limit must be positive and offset cannot be negative')
+        start_date, end_date = parse_date_range(args.get('start'), args.get('end'))
+        
+        return self.db.query_orders(
+            search=args.get('q', '').strip() or None,
+            packer_name=args.get('packer', '').strip() or None,
+            start_date=start_date,
+            end_date=end_date,
+            sort=sort,
+            descending=args.get('direction', 'desc') != 'asc',
+            limit=min(limit, 500),
+            offset=offset,
+            cursor=args.get('cursor') or None
+        )
+    
     def get_packer_statistics(self):
         """Get statistics for all packers"""
         return self.db.get_packer_statistics() 
     
     def get_packer_names(self):
         """Get a list of all packer names"""
-        stats = self.get_packer_statistics()
-        return sorted(stats.keys()) 
\ No newline at end of file
+        return self.db.get_packer_names()
+    
+    def get_statistics_summary(self, days=7):
+        """Get rolled-up packer statistics for dashboards"""
+        return self.db.get_statistics_summary(days=max(1, min(days, 90))) 
+    
+    def bulk_import(self, text_stream, fmt='csv'):
+        """Validate and record a CSV or JSONL stream of scans in bounded transactions
+        
+        Returns the BulkImporter; iterate its iter_outcomes() for per-row results.
+        """
+        if fmt not in ('csv', 'jsonl'):
+            raise ValueError("Format must be 'csv' or 'jsonl'")
+        
+        importer = BulkImporter(self.db)
+        importer.stage(text_stream, fmt)
+        importer.commit()
+        return importer
+    
+    def export_orders(self, fmt='csv', packer_name=None, start_date=None, end_date=None):
+        """Stream matching orders (oldest first) as CSV or JSON Lines text chunks
+        
+        Raises ValueError for malformed dates before anything is streamed.
+        """
+        start_date, end_date = parse_date_range(start_date, end_date)
+        orders = self.db.iter_orders(
+            packer_name=(packer_name or '').strip() or None,
+            start_date=start_date,
+            end_date=end_date
+        )
+        return iter_export(orders, fmt)
+    
+    def live_feed(self, after=None):
+        """Stream newly recorded orders and per-packer counts as Server-Sent Events"""
+        return iter_events(self.db.feed, after)
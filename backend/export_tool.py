@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Export tool for Packer Tracker: stream order history to CSV or JSON Lines
+"""
+
+import os
+import sys
+import argparse
+import contextlib
+
+# Add the backend directory to the path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from controllers.packer_controller import open_database, parse_date_range
+from controllers.order_export import EXPORT_FORMATS, iter_export
+
+def export(args, fmt, stdout):
+    """Run the export with status output already redirected"""
+    try:
+        start_date, end_date = parse_date_range(args.start, args.end)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+
+    # Just the storage, opened as found: an export only reads, so it never
+    # creates or rolls data files and needs no maintenance worker or spool
+    db = open_database(prepare=False)
+    try:
+        chunks = iter_export(db.iter_orders(packer_name=args.packer, start_date=start_date, end_date=end_date), fmt)
+        if args.output == '-':
+            for chunk in chunks:
+                stdout.write(chunk)
+            stdout.flush()
+        else:
+            if os.path.exists(args.output):
+                print(f"❌ {args.output} already exists, choose another output file")
+                return False
+            with open(args.output, 'w', encoding='utf-8', newline='') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            print(f"✅ Exported orders to {args.output}")
+    except OSError as e:
+        print(f"❌ Export failed: {e}")
+        return False
+    finally:
+        db.shutdown()
+
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Packer Tracker order export')
+    parser.add_argument('output', nargs='?', default='-', help="Output file ('-' for standard output)")
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS),
+                        help='Output format (default: from the file extension, else csv)')
+    parser.add_argument('--packer', help='Only orders recorded by this packer')
+    parser.add_argument('--start', help='First day to include (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last day to include (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    fmt = args.format
+    if not fmt:
+        fmt = 'jsonl' if args.output.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+    # Status messages go to stderr so they never mix with exported rows on stdout
+    stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        return export(args, fmt, stdout)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
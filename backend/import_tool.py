@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Import tool for Packer Tracker: record a CSV or JSON Lines file of scans in one batch
+"""
+
+import os
+import sys
+import json
+import argparse
+
+# Add the backend directory to the path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from controllers.packer_controller import open_database
+from controllers.bulk_import import BulkImporter, open_text_stream
+from models.file_lock import LockTimeout
+
+def main():
+    parser = argparse.ArgumentParser(description='Packer Tracker bulk order import')
+    parser.add_argument('source', help="CSV or JSON Lines file ('-' for standard input)")
+    parser.add_argument('--format', choices=['csv', 'jsonl'],
+                        help='Input format (default: from the file extension, else csv)')
+    parser.add_argument('--report', help='Write one JSON line per row outcome to this file')
+    args = parser.parse_args()
+
+    fmt = args.format
+    if not fmt:
+        fmt = 'jsonl' if args.source.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+    # Just the storage: no maintenance worker or submit spool for a one-off batch
+    db = open_database()
+    importer = BulkImporter(db)
+    try:
+        if args.source == '-':
+            importer.stage(open_text_stream(sys.stdin.buffer), fmt)
+        else:
+            with open(args.source, 'rb') as f:
+                importer.stage(open_text_stream(f), fmt)
+        importer.commit()
+
+        report = open(args.report, 'w', encoding='utf-8') if args.report else None
+        try:
+            for line in importer.iter_outcomes():
+                if report:
+                    report.write(line)
+                outcome = json.loads(line)
+                if outcome.get('status') in ('invalid', 'duplicate'):
+                    print(f"⚠️ Row {outcome['row']}: {outcome['status']} - {outcome['error']}")
+        finally:
+            if report:
+                report.close()
+    except (OSError, ValueError, LockTimeout) as e:
+        print(f"❌ Import failed: {e}")
+        return False
+    finally:
+        db.shutdown()
+
+    summary = importer.summary
+    print(f"✅ Imported {summary['recorded']} of {summary['rows']} rows "
+          f"({summary['duplicate']} duplicate, {summary['invalid']} invalid)")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,242 @@
+import os
+import json
+import tempfile
+from datetime import datetime
+
+from models.file_lock import InterProcessLock
+from models.integrity import CorruptDataError, file_checksum
+
+class IncrementalBackupManager:
+    """Base snapshots plus delta segments holding only orders added since the previous backup
+
+    Every backup point is recorded in manifest.json, so retention and restore
+    never need to list or stat the backup directory. A delta is computed from
+    per-packer positions: orders lists are append-only, so everything past the
+    position recorded at the last backup is new. Each position also records
+    the order number found there; a list rewritten since (partition roll,
+    recovery, migration) no longer has it and forces a new base.
+    """
+
+    def __init__(self, backup_dir='backups', max_backups=10, deltas_per_base=10):
+        self.backup_dir = backup_dir
+        self.max_backups = max_backups
+        self.deltas_per_base = deltas_per_base
+        self.manifest_file = os.path.join(backup_dir, 'manifest.json')
+        # Stations share the backup folder, so the manifest has its own lock
+        self.lock = InterProcessLock(os.path.join(backup_dir, 'manifest.lock'))
+
+    def _load_manifest(self):
+        """Read the manifest, or an empty one if there is none yet"""
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'version': 1, 'positions': {}, 'backups': []}
+
+    def _write_file(self, path, write):
+        """Write a file atomically with write(file_object)"""
+        temp_file = tempfile.NamedTemporaryFile(
+            mode='w',
+            dir=self.backup_dir,
+            delete=False,
+            suffix='.tmp',
+            encoding='utf-8'
+        )
+        try:
+            write(temp_file)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+            temp_file.close()
+            os.replace(temp_file.name, path)
+        except Exception:
+            temp_file.close()
+            try:
+                os.unlink(temp_file.name)
+            except OSError:
+                pass
+            raise
+
+    def create_backup(self, data):
+        """Back up {packer: [orders]} data as a base or a delta; returns the new file or None"""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        with self.lock:
+            return self._create_backup(data)
+
+    def _create_backup(self, data):
+        """create_backup() body, run under the manifest lock"""
+        manifest = self._load_manifest()
+        positions = manifest['positions']
+        backups = manifest['backups']
+
+        deltas_since_base = 0
+        for entry in reversed(backups):
+            if entry['type'] == 'base':
+                break
+            deltas_since_base += 1
+
+        # A packer list that shrank or changed means the data was replaced; deltas can't describe that
+        replaced = any(not self._position_holds(data.get(packer, []), position) for packer, position in positions.items())
+        need_base = not backups or replaced or deltas_since_base >= self.deltas_per_base
+
+        now = datetime.now()
+        stamp = now.strftime('%Y%m%d_%H%M%S_%f')
+        total = sum(len(orders) for orders in data.values())
+
+        if need_base:
+            file_name = f'packer_data_base_{stamp}.json'
+            self._write_file(
+                os.path.join(self.backup_dir, file_name),
+                lambda f: json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            )
+            added = total
+        else:
+            records = [
+                {'packer': packer, 'order': order['order'], 'timestamp': order['timestamp']}
+                for packer, orders in data.items()
+                for order in orders[self._count(positions.get(packer)):]
+            ]
+            if not records:
+                return None  # Nothing new since the last backup
+
+            file_name = f'packer_data_delta_{stamp}.jsonl'
+            self._write_file(
+                os.path.join(self.backup_dir, file_name),
+                lambda f: f.writelines(
+                    json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+                    for record in records
+                )
+            )
+            added = len(records)
+
+        backups.append({
+            'file': file_name,
+            'type': 'base' if need_base else 'delta',
+            'created': now.isoformat(),
+            'orders_added': added,
+            'total_orders': total,
+            'crc32': file_checksum(os.path.join(self.backup_dir, file_name))
+        })
+        manifest['positions'] = {
+            packer: [len(orders), orders[-1]['order']]
+            for packer, orders in data.items() if orders
+        }
+
+        removed = self._apply_retention(manifest)
+        self._write_file(self.manifest_file, lambda f: json.dump(manifest, f, indent=2))
+
+        # Only delete files once the manifest no longer references them
+        for file_name_removed in removed:
+            try:
+                os.remove(os.path.join(self.backup_dir, file_name_removed))
+                print(f"🗑️ Removed old backup: {file_name_removed}")
+            except OSError as e:
+                print(f"Warning: Could not remove old backup {file_name_removed}: {e}")
+
+        return os.path.join(self.backup_dir, file_name)
+
+    @staticmethod
+    def _count(position):
+        """Orders covered by a manifest position: [count, last order] or a bare count (older manifests)"""
+        if position is None:
+            return 0
+        return position[0] if isinstance(position, list) else position
+
+    def _position_holds(self, orders, position):
+        """True if the first orders of a packer list are still the ones a position covers"""
+        if not isinstance(position, list):
+            return not position  # A bare count from an older manifest can't be checked
+        count, last_order = position
+        return len(orders) >= count and (not count or orders[count - 1]['order'] == last_order)
+
+    def _apply_retention(self, manifest):
+        """Drop whole chains older than the newest max_backups points; returns removed files"""
+        backups = manifest['backups']
+        if len(backups) <= self.max_backups:
+            return []
+
+        # The oldest point we must keep needs its base, so cut at that base
+        keep_from = len(backups) - self.max_backups
+        while keep_from > 0 and backups[keep_from]['type'] != 'base':
+            keep_from -= 1
+
+        removed = [entry['file'] for entry in backups[:keep_from]]
+        manifest['backups'] = backups[keep_from:]
+        return removed
+
+    def list_backups(self):
+        """Backup points recorded in the manifest, oldest first"""
+        return self._load_manifest()['backups']
+
+    def restore(self, at=None):
+        """Rebuild {packer: [orders]} data as of a backup point
+
+        at may be None (latest point), an int index into list_backups(), or
+        an ISO timestamp string: the newest point created at or before it.
+        """
+        backups = self.list_backups()
+        if not backups:
+            raise ValueError("No backups recorded in the manifest")
+
+        if at is None:
+            target = len(backups) - 1
+        elif isinstance(at, int):
+            target = at if at >= 0 else len(backups) + at
+            if not 0 <= target < len(backups):
+                raise ValueError(f"Backup index {at} out of range")
+        else:
+            candidates = [i for i, entry in enumerate(backups) if entry['created'] <= at]
+            if not candidates:
+                raise ValueError(f"No backup exists at or before {at}")
+            target = candidates[-1]
+
+        base = target
+        while backups[base]['type'] != 'base':
+            base -= 1
+
+        self._verify_entry(backups[base])
+        with open(os.path.join(self.backup_dir, backups[base]['file']), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        for entry in backups[base + 1:target + 1]:
+            self._verify_entry(entry)
+            with open(os.path.join(self.backup_dir, entry['file']), 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        data.setdefault(record['packer'], []).append({
+                            'order': record['order'],
+                            'timestamp': record['timestamp']
+                        })
+
+        return data
+
+    def _verify_entry(self, entry):
+        """Raise CorruptDataError if a backup file no longer matches its recorded CRC-32"""
+        if 'crc32' not in entry:
+            return  # Recorded before backups carried checksums
+        if file_checksum(os.path.join(self.backup_dir, entry['file'])) != entry['crc32']:
+            raise CorruptDataError(f"Backup {entry['file']} does not match its checksum")
+
+    def restore_latest_valid(self):
+        """(data, manifest entry) of the newest backup point that restores cleanly, or ({}, None)
+
+        A damaged or missing file only rules out the points that need it,
+        so a bad delta falls back to the point before it.
+        """
+        backups = self.list_backups()
+        for index in range(len(backups) - 1, -1, -1):
+            try:
+                return self.restore(index), backups[index]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Backup {backups[index]['file']} unusable: {e}")
+        return {}, None
+
+    def verify(self):
+        """Problems found in the backup files, as a list of messages (empty if all are intact)"""
+        problems = []
+        for entry in self.list_backups():
+            try:
+                self._verify_entry(entry)
+            except (OSError, ValueError) as e:
+                problems.append(str(e))
+        return problems
@@ -0,0 +1,229 @@
+"""
+Compact columnar storage for packer data
+
+Layout (little-endian):
+    header      magic 'PKTC', version u16, reserved u16, packer count u32, order count u32
+    packers     per packer: name length u16 + UTF-8 name (packer ID = position)
+    padding     zero bytes up to an 8-byte boundary
+    timestamps  int64[n]  microseconds since 1970-01-01 (naive local time, as recorded)
+    orders      uint32[n] order number as an integer
+    packer_ids  uint16[n] index into the packer table
+    widths      uint8[n]  digit count of the order number, so leading zeros survive
+
+Rows are stored packer by packer in recording order, so loading rebuilds the
+same {packer: [orders]} view the JSON file holds.
+"""
+
+import os
+import sys
+import mmap
+import json
+import struct
+import tempfile
+from array import array
+from datetime import datetime, timedelta
+
+MAGIC = b'PKTC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+MAX_ORDER_DIGITS = 9   # Largest digit count that always fits in uint32
+MAX_PACKERS = 65535
+
+# (typecode, item size) for each column, in file order
+COLUMNS = (('q', 8), ('I', 4), ('H', 2), ('B', 1))
+
+def _timestamp_to_micros(timestamp):
+    """ISO timestamp string to integer microseconds since the epoch"""
+    parsed = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is not None:
+        raise ValueError(f"Timezone-aware timestamp not supported: {timestamp}")
+    return (parsed - EPOCH) // ONE_MICROSECOND
+
+def _micros_to_timestamp(micros):
+    """Inverse of _timestamp_to_micros, formatted like datetime.isoformat()"""
+    return (EPOCH + timedelta(microseconds=micros)).isoformat()
+
+def encode(data):
+    """Encode {packer: [orders]} data into the compact binary layout"""
+    if len(data) > MAX_PACKERS:
+        raise ValueError(f"Compact storage supports at most {MAX_PACKERS} packers")
+
+    names = list(data.keys())
+    timestamps, orders, packer_ids, widths = array('q'), array('I'), array('H'), array('B')
+
+    for packer_id, packer_name in enumerate(names):
+        for order in data[packer_name]:
+            number = order['order']
+            if not number.isdigit() or len(number) > MAX_ORDER_DIGITS:
+                raise ValueError(f"Order number '{number}' cannot be stored compactly (digits only, at most {MAX_ORDER_DIGITS})")
+            timestamps.append(_timestamp_to_micros(order['timestamp']))
+            orders.append(int(number))
+            packer_ids.append(packer_id)
+            widths.append(len(number))
+
+    parts = [HEADER.pack(MAGIC, VERSION, 0, len(names), len(orders))]
+    for name in names:
+        encoded = name.encode('utf-8')
+        parts.append(struct.pack('<H', len(encoded)))
+        parts.append(encoded)
+
+    size = sum(len(part) for part in parts)
+    parts.append(b'\0' * (-size % 8))  # Align the int64 column
+
+    for column in (timestamps, orders, packer_ids, widths):
+        if sys.byteorder == 'big':
+            column.byteswap()
+        parts.append(column.tobytes())
+
+    return b''.join(parts)
+
+def _parse_columns(view, source):
+    """(packer names, timestamps, orders, packer IDs, widths) from a buffer in the compact layout
+
+    Each column is copied out of the buffer with a single bulk copy into an
+    array, so no per-row Python objects are created.
+    """
+    magic, version, _, packer_count, order_count = HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{source} is not a compact packer data file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported compact format version {version}")
+
+    offset = HEADER.size
+    names = []
+    for _ in range(packer_count):
+        (length,) = struct.unpack_from('<H', view, offset)
+        offset += 2
+        names.append(bytes(view[offset:offset + length]).decode('utf-8'))
+        offset += length
+    offset += -offset % 8
+
+    columns = []
+    for typecode, item_size in COLUMNS:
+        end = offset + item_size * order_count
+        if end > len(view):
+            raise ValueError(f"{source} is truncated")
+        column = array(typecode)
+        column.frombytes(view[offset:end])
+        if sys.byteorder == 'big':
+            column.byteswap()
+        columns.append(column)
+        offset = end
+
+    return (names, *columns)
+
+def read_columns(compact_file):
+    """Memory-map a compact file and return (packer names, timestamps, orders, packer IDs, widths)"""
+    with open(compact_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [], array('q'), array('I'), array('H'), array('B')
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return _parse_columns(view, compact_file)
+            finally:
+                view.release()
+
+def _to_data(names, timestamps, orders, packer_ids, widths):
+    """Rebuild the {packer: [orders]} view from decoded columns"""
+    data = {name: [] for name in names}
+    lists = [data[name] for name in names]
+
+    for micros, number, packer_id, width in zip(timestamps, orders, packer_ids, widths):
+        lists[packer_id].append({
+            'order': str(number).zfill(width),
+            'timestamp': _micros_to_timestamp(micros)
+        })
+
+    return data
+
+def load(compact_file):
+    """Load a compact file into the {packer: [orders]} view"""
+    return _to_data(*read_columns(compact_file))
+
+def decode(payload):
+    """Decode compact bytes already read into memory into the {packer: [orders]} view"""
+    with memoryview(payload) as view:
+        return _to_data(*_parse_columns(view, 'compact data'))
+
+def write(compact_file, data):
+    """Atomically write data in compact form (temporary file, fsync, replace); returns the bytes written"""
+    payload = encode(data)
+    temp_file = tempfile.NamedTemporaryFile(
+        mode='wb',
+        dir=os.path.dirname(compact_file),
+        delete=False,
+        suffix='.tmp'
+    )
+    try:
+        temp_file.write(payload)
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+        temp_file.close()
+        os.replace(temp_file.name, compact_file)
+    except Exception:
+        temp_file.close()
+        try:
+            os.unlink(temp_file.name)
+        except OSError:
+            pass
+        raise
+    return payload
+
+def convert_json_to_compact(json_file, compact_file):
+    """Convert a packer_data.json file into compact form"""
+    if not os.path.exists(json_file):
+        return False
+
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        write(compact_file, data)
+        return True
+    except Exception as e:
+        print(f"Conversion failed: {e}")
+        return False
+
+def convert_compact_to_json(compact_file, json_file):
+    """Convert a compact file back into the packer_data.json format"""
+    if not os.path.exists(compact_file):
+        return False
+
+    try:
+        data = load(compact_file)
+        temp_file = tempfile.NamedTemporaryFile(
+            mode='w',
+            dir=os.path.dirname(json_file),
+            delete=False,
+            suffix='.tmp',
+            encoding='utf-8'
+        )
+        with temp_file:
+            json.dump(data, temp_file, indent=2, ensure_ascii=False)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_file.name, json_file)
+        return True
+    except Exception as e:
+        print(f"Conversion failed: {e}")
+        return False
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convert packer data between JSON and compact storage')
+    parser.add_argument('direction', choices=['to-compact', 'to-json'])
+    parser.add_argument('source')
+    parser.add_argument('destination')
+    args = parser.parse_args()
+
+    if args.direction == 'to-compact':
+        ok = convert_json_to_compact(args.source, args.destination)
+    else:
+        ok = convert_compact_to_json(args.source, args.destination)
+
+    print(f"✅ Converted {args.source} -> {args.destination}" if ok else "❌ Conversion failed")
+    sys.exit(0 if ok else 1)
@@ -1,24 +1,141 @@
 import os
 import json
-import tempfile
 import shutil
+import tempfile
+import base64
+import struct
+import heapq
+import time
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
-from threading import Lock
+from threading import RLock
+
+from models.journal import OrderJournal
+from models.file_lock import InterProcessLock, LockTimeout
+from models.statistics import PackerStatistics
+from models import compact_storage
+from models.backup import IncrementalBackupManager
+from models.maintenance import MaintenanceWorker
+from models.group_commit import GroupCommitWriter
+from models.partitions import PartitionArchive
+from models.order_bitmap import OrderBitmap
+from models.order_feed import OrderFeed
+from models.integrity import ChecksumFile, CorruptDataError, checksum, salvage_json
+from models.instrumentation import metrics as instrumentation, timed
+
+STORAGE_MODES = ('json', 'journal', 'compact')
+
+# Sortable columns for query_orders
+SORT_FIELDS = ('timestamp', 'order_number', 'packer_name')
+
+def encode_cursor(key):
+    """Opaque, URL-safe pagination cursor for a [sort value, order number] key"""
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(key, list) or len(key) != 2:
+        raise ValueError("Invalid pagination cursor")
+    return key
+
+class DuplicateOrderError(ValueError):
+    """Raised when an order number is already recorded, possibly by another station"""
+    
+    def __init__(self, existing):
+        self.existing = existing
+        super().__init__(f"Order number {existing['order_number']} has already been recorded by {existing['packer_name']}")
 
 class PackerDatabase:
     """Database model for packer tracking data with JSON storage and thread-safe operations"""
     
-    def __init__(self, data_file='packer_data.json'):
+    def __init__(self, data_file='packer_data.json', storage_mode='json', partition_period=None, prepare=True):
+        # prepare=False opens the files as they are: no empty data file is
+        # created and no period is archived, so checks run before any write
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode '{storage_mode}', expected one of {STORAGE_MODES}")
+        
         self.data_file = data_file
-        self.lock = Lock()  # Thread safety lock
+        self.lock = RLock()  # Thread safety lock (re-entrant so compaction can write while saving)
+        self.storage_config = {
+            'mode': storage_mode,         # 'json' rewrites the file, 'journal' appends to a log,
+                                          # 'compact' appends to a log over a binary columnar snapshot
+            'compact_every_orders': 500,  # Fold the journal into the snapshot every 500 orders
+            'stats_persist_every': 25,    # Persist statistics rollups every 25 orders
+            'recheck_seconds': 0.0        # Reads reuse the resident view this long before stat'ing the files again
+        }
+        self.lock_config = {
+            'timeout_seconds': 10,       # Give up on the shared lock after 10 seconds
+            'stale_after_seconds': 30    # Lock files older than this belong to a crashed station
+        }
+        # Serialises read-modify-write across every station sharing the data file
+        self.file_lock = InterProcessLock(
+            f"{self.data_file}.lock",
+            timeout=self.lock_config['timeout_seconds'],
+            stale_after=self.lock_config['stale_after_seconds']
+        )
         self.backup_config = {
             'backup_every_orders': 50,  # Backup every 50 orders
             'backup_every_hours': 4,    # Backup every 4 hours
-            'max_backups': 10       # Keep last 10 backups
+            'max_backups': 10,      # Keep last 10 backups
+            'deltas_per_base': 10   # Start a new full snapshot after 10 delta backups
+        }
+        self.partition_config = {
+            'period': partition_period,  # None keeps all history in the data file; 'year', 'month' or 'day'
+                                         # moves closed periods into immutable archive segments
+            'compress': True,            # gzip archived segments
+            'cache_partitions': 12       # Archived segments kept loaded per process
+        }
+        self.group_commit_config = {
+            'enabled': True,         # Group concurrent submissions into one write
+            'window_seconds': 0.0,   # Extra wait for stragglers (0: batch whatever queued during the last write)
+            'max_batch': 100         # Most orders persisted by a single write
         }
+        self.backups = IncrementalBackupManager(
+            'backups',
+            max_backups=self.backup_config['max_backups'],
+            deltas_per_base=self.backup_config['deltas_per_base']
+        )
         self.order_count = 0
         self.last_backup_time = None
-        self.ensure_data_file()
+        self.maintenance = MaintenanceWorker(self)
+        self.group_commit = GroupCommitWriter(
+            self._commit_batch,
+            window_seconds=self.group_commit_config['window_seconds'],
+            max_batch=self.group_commit_config['max_batch']
+        )
+        self._data = None            # Resident {packer: [orders]} view
+        self._data_signature = None  # File (mtime, size) the resident view was built from
+        self._checked_at = 0.0       # time.monotonic() of the last signature check
+        self._order_index = {}       # Order number -> (packer, timestamp)
+        self._time_index = []        # Sorted (timestamp, order, packer) tuples
+        self.statistics = PackerStatistics(f"{self.data_file}.stats")
+        self.order_bitmap = OrderBitmap(f"{self.data_file}.bitmap")  # Fast "never recorded" answers
+        self.feed = OrderFeed(poll=self._get_data)  # New orders for live dashboards
+        self.checksum = ChecksumFile(self.data_file)  # CRC of the last snapshot written
+        self.last_recovery = None                      # Report of the last automatic recovery
+        self.partitions = None
+        if partition_period:
+            self.partitions = PartitionArchive(
+                os.path.join(os.path.dirname(self.data_file), 'partitions'),
+                period=partition_period,
+                compress=self.partition_config['compress'],
+                cache_size=self.partition_config['cache_partitions']
+            )
+        self.journal = None
+        if storage_mode in ('journal', 'compact'):
+            self.journal = OrderJournal(f"{self.data_file}.journal")
+        if prepare:
+            self.ensure_data_file()
+        if self.journal:
+            # Replay once at startup to count pending records
+            self.journal.replay()
+        if self.partitions and prepare:
+            # Archive anything left from a period that closed while we were stopped
+            self.roll_partitions()
         self._load_backup_state()
     
     def _load_backup_state(self):
@@ -66,171 +183,687 @@ class PackerDatabase:
         
         return False
     
+    @timed('packer_backup_seconds')
     def _create_backup(self):
-        """Create a backup of the current data file"""
-        if not os.path.exists(self.data_file):
-            return
-        
+        """Create an incremental backup (base snapshot or delta of new orders)"""
         try:
-            # Create backup filename with timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_dir = 'backups'
-            if not os.path.exists(backup_dir):
-                os.makedirs(backup_dir)
+            with self.lock, self.file_lock:
+                # Resident view is refreshed under the lock, so it includes
+                # every station's orders (and any pending journal records).
+                # Copying the lists is cheap and lets the write happen unlocked.
+                snapshot = {packer: list(orders) for packer, orders in self._get_data().items()}
             
-            backup_file = os.path.join(backup_dir, f'packer_data_backup_{timestamp}.json')
-            
-            # Copy current file to backup
-            shutil.copy2(self.data_file, backup_file)
+            backup_file = self.backups.create_backup(snapshot)
             
             # Update backup state
             self.order_count = 0
             self.last_backup_time = datetime.now()
             self._save_backup_state()
             
-            # Clean up old backups
-            self._cleanup_old_backups()
-            
-            print(f"✅ Backup created: {backup_file}")
+            if backup_file:
+                if instrumentation.enabled:
+                    instrumentation.count('packer_storage_bytes_written_total', os.path.getsize(backup_file), kind='backup')
+                print(f"✅ Backup created: {backup_file}")
             
         except Exception as e:
             print(f"❌ Backup failed: {e}")
     
-    def _cleanup_old_backups(self):
-        """Keep only the most recent backups"""
-        backup_dir = 'backups'
-        if not os.path.exists(backup_dir):
-            return
-        
-        try:
-            # Get all backup files
-            backup_files = []
-            for file in os.listdir(backup_dir):
-                if file.startswith('packer_data_backup_') and file.endswith('.json'):
-                    file_path = os.path.join(backup_dir, file)
-                    backup_files.append((file_path, os.path.getmtime(file_path)))
-            
-            # Sort by modification time (newest first)
-            backup_files.sort(key=lambda x: x[1], reverse=True)
-            
-            # Remove old backups
-            if len(backup_files) > self.backup_config['max_backups']:
-                for file_path, _ in backup_files[self.backup_config['max_backups']:]:
-                    try:
-                        os.remove(file_path)
-                        print(f"🗑️ Removed old backup: {file_path}")
-                    except Exception as e:
-                        print(f"Warning: Could not remove old backup {file_path}: {e}")
-                        
-        except Exception as e:
-            print(f"Warning: Could not cleanup old backups: {e}")
-    
     def ensure_data_file(self):
         """Ensure the data file exists with proper JSON structure"""
         if not os.path.exists(self.data_file):
-            # Create empty JSON structure
-            empty_data = {}
-            self._atomic_write(empty_data)
+            with self.lock, self.file_lock:
+                # Re-check under the lock, another station may have just created it
+                if not os.path.exists(self.data_file):
+                    # Create empty JSON structure
+                    empty_data = {}
+                    self._atomic_write(empty_data)
     
+    @timed('packer_storage_write_seconds', kind='snapshot')
     def _atomic_write(self, data):
         """Thread-safe atomic write operation using temporary file and rename"""
         with self.lock:
-            # Create temporary file in the same directory
-            temp_file = tempfile.NamedTemporaryFile(
-                mode='w',
-                dir=os.path.dirname(self.data_file),
-                delete=False,
-                suffix='.tmp'
-            )
-            
+            payload = self._encode_snapshot(data)
+            self._replace_snapshot(self._write_temp_snapshot(payload), payload)
+    
+    def _encode_snapshot(self, data):
+        """Snapshot file contents for data in the configured format"""
+        if self.storage_config['mode'] == 'compact':
+            return compact_storage.encode(data)
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    
+    def _write_temp_snapshot(self, payload):
+        """Write payload to a temporary file next to the data file and fsync it; returns its name"""
+        temp_file = tempfile.NamedTemporaryFile(
+            mode='wb',
+            dir=os.path.dirname(self.data_file),
+            delete=False,
+            suffix='.tmp'
+        )
+        try:
+            temp_file.write(payload)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())  # Ensure data is written to disk
+            temp_file.close()
+        except Exception:
+            temp_file.close()
             try:
-                # Write data to temporary file
-                json.dump(data, temp_file, indent=2, ensure_ascii=False)
-                temp_file.flush()
-                os.fsync(temp_file.fileno())  # Ensure data is written to disk
-                temp_file.close()
-                
-                # Atomic replace operation
-                os.replace(temp_file.name, self.data_file)
-                
-            except Exception as e:
-                # Clean up temporary file on error
-                try:
-                    os.unlink(temp_file.name)
-                except:
-                    pass
-                raise e
+                os.unlink(temp_file.name)
+            except OSError:
+                pass
+            raise
+        return temp_file.name
     
-    def _load_data(self):
-        """Load JSON data from file with error handling"""
+    def _replace_snapshot(self, temp_name, payload):
+        """Atomically replace the data file with a written temporary file and record its checksum"""
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            # Return empty structure if file doesn't exist or is corrupted
+            os.replace(temp_name, self.data_file)
+        except Exception:
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            raise
+        self.checksum.write(checksum(payload))
+        self._count_snapshot_written()
+    
+    def _count_snapshot_written(self):
+        """Add the rewritten snapshot's size to the bytes-written counter"""
+        if instrumentation.enabled:
+            instrumentation.count('packer_storage_bytes_written_total', os.path.getsize(self.data_file), kind='snapshot')
+    
+    def _read_snapshot(self):
+        """Read and verify the snapshot; raises CorruptDataError if it is damaged"""
+        try:
+            with open(self.data_file, 'rb') as f:
+                st = os.fstat(f.fileno())
+                raw = f.read()
+        except FileNotFoundError:
             return {}
+        
+        if not raw:
+            raise CorruptDataError(f"{self.data_file} is empty")
+        # One CRC over the bytes being loaded anyway, when the checksum file describes them
+        self.checksum.verify(raw, st)
+        try:
+            if self.storage_config['mode'] == 'compact':
+                return compact_storage.decode(raw)
+            data = json.loads(raw.decode('utf-8-sig'))
+        except (ValueError, struct.error) as e:
+            raise CorruptDataError(f"{self.data_file} cannot be read: {e}") from e
+        if not isinstance(data, dict):
+            raise CorruptDataError(f"{self.data_file} does not hold packer data")
+        return data
+    
+    def _load_snapshot(self):
+        """Load the snapshot, recovering it automatically if it is damaged"""
+        try:
+            return self._read_snapshot()
+        except CorruptDataError as e:
+            return self._recover_snapshot(e)
+    
+    def _recover_snapshot(self, error):
+        """Rebuild a damaged snapshot from the newest valid backup plus the orders still readable in it
+        
+        Runs under the file lock and reads the file again first, so another
+        station's write in progress is never mistaken for damage. The damaged
+        file is kept as <data file>.corrupt-<time>; journal records are
+        merged on top by the caller as usual.
+        """
+        with self.lock, self.file_lock:
+            try:
+                return self._read_snapshot()
+            except CorruptDataError as e:
+                error = e
+            
+            print(f"🚨 Data file damaged: {error}")
+            print("🔄 Recovering from the newest valid backup...")
+            data, backup = self.backups.restore_latest_valid()
+            recovered = {order['order'] for orders in data.values() for order in orders}
+            from_backup = len(recovered)
+            
+            salvaged = 0
+            damaged_copy = f"{self.data_file}.corrupt-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            try:
+                if self.storage_config['mode'] != 'compact':
+                    with open(self.data_file, 'rb') as f:
+                        for packer_name, orders in salvage_json(f.read()).items():
+                            for order in orders:
+                                if order['order'] not in recovered:
+                                    recovered.add(order['order'])
+                                    data.setdefault(packer_name, []).append(order)
+                                    salvaged += 1
+                shutil.copy2(self.data_file, damaged_copy)
+            except OSError as e:
+                damaged_copy = None
+                print(f"Warning: Could not keep a copy of the damaged data file: {e}")
+            
+            self._atomic_write(data)
+            
+            from_journal = 0
+            if self.journal:
+                from_journal = sum(1 for record in self.journal.replay() if record['order'] not in recovered)
+            
+            self.last_recovery = {
+                'recovered_at': datetime.now().isoformat(),
+                'error': str(error),
+                'backup': backup['file'] if backup else None,
+                'backup_created': backup['created'] if backup else None,
+                'orders_from_backup': from_backup,
+                'orders_salvaged': salvaged,
+                'orders_from_journal': from_journal,
+                'damaged_copy': damaged_copy
+            }
+            if backup:
+                print(f"✅ Restored {from_backup} orders from backup {backup['file']} ({backup['created']})")
+                print(f"⚠️ Orders recorded after {backup['created']} and not in the journal may be missing")
+            else:
+                print("⚠️ No valid backup found")
+            print(f"✅ Salvaged {salvaged} more orders from the damaged file, {from_journal} from the journal")
+            if damaged_copy:
+                print(f"📁 Damaged file kept as {damaged_copy}")
+            return data
+    
+    def _load_data(self):
+        """Load current data, replaying the journal over the snapshot in journal mode"""
+        with self.lock:
+            data = self._load_snapshot()
+            if self.journal:
+                data = OrderJournal.merge(data, self.journal.replay())
+            return data
+    
+    def _file_signature(self):
+        """Cheap (mtime, size) fingerprint of the files backing the data"""
+        paths = [self.data_file]
+        if self.journal:
+            paths.append(self.journal.journal_file)
+        if self.partitions:
+            paths.append(self.partitions.manifest_file)
+        
+        signature = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def _index_order(self, packer_name, order):
+        """Add one order entry to the order-number index (first record wins)"""
+        self._order_index.setdefault(order['order'], (packer_name, order['timestamp']))
+    
+    def _get_data(self):
+        """Return the resident data, reloading only if the files changed on disk"""
+        with self.lock:
+            # Within the recheck interval reads trust the resident view; under
+            # the file lock writers always re-check, so duplicates stay exact
+            recheck = self.storage_config['recheck_seconds']
+            if (recheck and self._data is not None and not self.file_lock.held
+                    and time.monotonic() - self._checked_at < recheck):
+                return self._data
+            
+            signature = self._file_signature()
+            self._checked_at = time.monotonic()
+            if self._data is None or signature != self._data_signature:
+                # The signature is taken before the read, which may already see
+                # records appended since; the view is then tagged with the older
+                # signature (so the next call reads the rest of the journal from
+                # its offset) and persisted rollups, which describe exactly one
+                # file state, are neither reused nor saved for it
+                start = time.perf_counter() if instrumentation.active else None
+                if self._journal_only_grew(signature):
+                    offset = self.journal.offset
+                    self._apply_journal_tail(signature)
+                    kind, bytes_read = 'tail', self.journal.offset - offset
+                else:
+                    data = self._load_data()
+                    self._set_resident(data, signature, exact=self._file_signature() == signature)
+                    # Snapshot and journal are read whole; archived segments only on demand
+                    files = signature[:2] if self.journal else signature[:1]
+                    kind, bytes_read = 'full', sum(part[1] for part in files if part)
+                if start is not None:
+                    instrumentation.observe('packer_storage_load_seconds', time.perf_counter() - start, kind=kind)
+                    instrumentation.count('packer_storage_bytes_read_total', bytes_read, kind=kind)
+            return self._data
+    
+    def _journal_only_grew(self, signature):
+        """True if other stations only appended to the journal since the resident view was built"""
+        if not self.journal or self._data is None or signature[1] is None:
+            return False
+        # Snapshot, archive manifest etc. untouched: compaction and rolls replace the snapshot
+        unchanged = signature[:1] + signature[2:] == self._data_signature[:1] + self._data_signature[2:]
+        return unchanged and signature[1][1] >= self.journal.offset
+    
+    def _apply_journal_tail(self, signature):
+        """Bring the resident view up to date by reading only the newly appended journal records"""
+        entries = []
+        seen = set()
+        for record in self.journal.read_tail():
+            order_number = record['order']
+            # Same first-record-wins rule as OrderJournal.merge
+            if order_number in self._order_index or order_number in seen:
+                continue
+            seen.add(order_number)
+            entries.append((record['packer'], {
+                'order': order_number,
+                'timestamp': record['timestamp']
+            }))
+        # Records appended after the stat were read too: rollups then hold more than signature describes
+        self._apply_to_index(entries, signature, exact=self.journal.offset == signature[1][1])
+    
+    def _set_resident(self, data, signature, exact=True):
+        """Replace the resident view and rebuild its indexes
+        
+        exact=False means data may hold more than the files had at
+        signature, so rollups persisted for it are rebuilt rather than
+        reused, and not saved under it.
+        """
+        previous_index = self._order_index if self._data is not None else None
+        self._order_index = {}
+        time_index = []
+        for packer_name, orders in data.items():
+            for order in orders:
+                self._index_order(packer_name, order)
+                time_index.append((order['timestamp'], order['order'], packer_name))
+        # ISO-8601 timestamps sort chronologically as plain strings
+        time_index.sort()
+        self._time_index = time_index
+        self._data = data
+        self._data_signature = signature
+        
+        # Rollups persisted for this exact file state can be reused as-is;
+        # none are written for a data file that does not exist (yet)
+        exact = exact and signature[0] is not None
+        if not (exact and self.statistics.load(signature)):
+            # Archived periods never change, so their rollups are a fixed base
+            base = self.partitions.get_statistics() if self.partitions else None
+            self.statistics.rebuild(data, base=base)
+            if exact:
+                self.statistics.save(signature)
+        if not (exact and self.order_bitmap.load(signature)):
+            base = self.partitions.get_bitmap() if self.partitions else None
+            self.order_bitmap.rebuild(self._order_index, base=base)
+            if exact:
+                self.order_bitmap.save(signature)
+        
+        if previous_index is not None:
+            # Orders other stations recorded since the last load, oldest first
+            self._publish([
+                (packer_name, {'order': order_number, 'timestamp': timestamp})
+                for timestamp, order_number, packer_name in time_index
+                if order_number not in previous_index
+            ])
+    
+    def _apply_to_index(self, entries, signature=None, exact=True):
+        """Record our own write of (packer, order_entry) pairs without re-reading the file
+        
+        signature is the file state the entries bring us up to; by default
+        the files are stat'ed again, which is only safe under the file lock.
+        exact=False means the view may already hold more than signature,
+        so rollups are not persisted under it.
+        """
+        for packer_name, order_entry in entries:
+            self._data.setdefault(packer_name, []).append(order_entry)
+            self._index_order(packer_name, order_entry)
+            self.statistics.add(packer_name, order_entry['timestamp'])
+            self.order_bitmap.add(order_entry['order'])
+        
+        batch = sorted((order_entry['timestamp'], order_entry['order'], packer_name)
+                       for packer_name, order_entry in entries)
+        if not self._time_index or not batch or batch[0] >= self._time_index[-1]:
+            self._time_index.extend(batch)  # Common case: newest orders go last
+        else:
+            # Imported or back-dated orders: merge the batch into the tail it
+            # overlaps in one pass instead of inserting entry by entry
+            start = bisect_left(self._time_index, batch[0])
+            tail = self._time_index[start:]
+            del self._time_index[start:]
+            self._time_index.extend(heapq.merge(tail, batch))
+        
+        self._data_signature = signature or self._file_signature()
+        if exact and self.statistics.dirty >= self.storage_config['stats_persist_every']:
+            self.statistics.save(self._data_signature)
+            self.order_bitmap.save(self._data_signature)
+        self._publish(entries)
+    
+    def _publish(self, entries):
+        """Announce newly recorded (packer, order_entry) pairs on the live feed with updated packer counts"""
+        if not entries:
+            return
+        today = datetime.now().isoformat()[:10]
+        counts = {}
+        for packer_name, _ in entries:
+            if packer_name not in counts:
+                stats = self.statistics.packers.get(packer_name, {})
+                counts[packer_name] = {
+                    'total_orders': stats.get('total_orders', 0),
+                    'today': stats.get('by_day', {}).get(today, 0)
+                }
+        self.feed.publish([
+            {
+                'packer_name': packer_name,
+                'order_number': order_entry['order'],
+                'timestamp': order_entry['timestamp'],
+                'counts': counts[packer_name]
+            }
+            for packer_name, order_entry in entries
+        ])
+    
+    def _time_bounds(self, start_date=None, end_date=None, time_index=None):
+        """Slice bounds of a time index (the resident one by default) for an inclusive 'YYYY-MM-DD' range"""
+        if time_index is None:
+            time_index = self._time_index
+        lo = bisect_left(time_index, (start_date,)) if start_date else 0
+        # Every timestamp on end_date sorts below end_date + U+FFFF
+        hi = bisect_left(time_index, (end_date + '\uffff',)) if end_date else len(time_index)
+        return lo, max(lo, hi)
+    
+    def _archived_partitions(self, packer_name=None, start_date=None, end_date=None):
+        """Loaded archive segments that can hold matching orders, oldest first"""
+        if not self.partitions:
+            return []
+        return [
+            self.partitions.load(entry)
+            for entry in self.partitions.entries(packer_name, start_date, end_date)
+        ]
+    
+    def _merged_time_entries(self, archived, start_date=None, end_date=None):
+        """Time-index entries in a date range across archive segments and the resident view"""
+        slices = []
+        for time_index in [partition.time_index for partition in archived] + [self._time_index]:
+            lo, hi = self._time_bounds(start_date, end_date, time_index)
+            if hi > lo:
+                slices.append(time_index[lo:hi])
+        
+        entries = [entry for part in slices for entry in part]
+        # Periods follow each other, so only late-imported scans can make this unsorted
+        if any(earlier[-1] > later[0] for earlier, later in zip(slices, slices[1:])):
+            entries.sort()
+        return entries
+    
+    def roll_partitions(self):
+        """Move orders from closed periods out of the data file into archive segments
+        
+        Returns the number of orders archived. Orders already present in the
+        archive (left behind by an interrupted roll) are simply dropped from
+        the data file.
+        """
+        if not self.partitions:
+            return 0
+        
+        current = self.partitions.period_of(datetime.now().isoformat())
+        with self.lock:
+            self._get_data()
+            # Cheap check: the oldest resident order is still in the current period
+            if not self._time_index or self.partitions.period_of(self._time_index[0][0]) >= current:
+                return 0
+        
+        with self.lock, self.file_lock:
+            data = self._get_data()
+            closed, hot = {}, {}
+            archived = moved = 0
+            for packer_name, orders in data.items():
+                for order in orders:
+                    period = self.partitions.period_of(order['timestamp'])
+                    if period >= current:
+                        hot.setdefault(packer_name, []).append(order)
+                        continue
+                    moved += 1
+                    if not self.partitions.find(order['order']):
+                        closed.setdefault(period, {}).setdefault(packer_name, []).append(order)
+                        archived += 1
+            
+            if not moved:
+                return 0  # Another station rolled between the checks
+            
+            self.partitions.archive(closed)
+            # Same snapshot-then-reset sequence as compaction
+            self._atomic_write(hot)
+            if self.journal:
+                self.journal.reset()
+            self._set_resident(hot, self._file_signature())
+        
+        if archived:
+            print(f"🗄️ Archived {archived} orders from {len(closed)} closed period(s)")
+        return archived
+    
+    def compact(self):
+        """Fold journal records into the snapshot and trim them from the journal
+        
+        The snapshot is the resident view, so nothing is re-read or
+        re-indexed. It is encoded and fsynced without holding any lock;
+        the locks are only held to copy the view and, afterwards, to swap
+        the file in and drop the journal records it now contains. Orders
+        recorded meanwhile stay in the journal.
+        """
+        if not self.journal:
+            return
+        
+        with self.lock, self.file_lock:
+            # Copy the lists: our own commits append to the resident ones
+            data = {packer: list(orders) for packer, orders in self._get_data().items()}
+            covered = self.journal.offset
+            snapshot_signature = self._data_signature[0]
+        
+        payload = self._encode_snapshot(data)
+        temp_name = self._write_temp_snapshot(payload)
+        
+        with self.lock, self.file_lock:
+            self._get_data()
+            if self._data_signature[0] != snapshot_signature:
+                # Another station compacted or rewrote the snapshot meanwhile
+                os.unlink(temp_name)
+                return
+            # Snapshot is replaced atomically first; a crash before the trim
+            # just replays records that merge() already skips
+            self._replace_snapshot(temp_name, payload)
+            self.journal.discard_before(covered)
+            self._data_signature = self._file_signature()
+            # Rollups stay valid; tag them with the new file state so other loads reuse them
+            self.statistics.save(self._data_signature)
+            self.order_bitmap.save(self._data_signature)
     
     def save_packer_data(self, packer_name, order_number):
-        """Save packer data to JSON file with thread safety and auto-backup"""
+        """Save packer data to JSON file with thread safety and auto-backup
+        
+        Concurrent calls are grouped into one write by the group-commit
+        writer. Raises DuplicateOrderError if the order is already recorded.
+        """
         timestamp = datetime.now().isoformat()
         
-        # Load current data
-        data = self._load_data()
+        if self.group_commit_config['enabled']:
+            result = self.group_commit.submit(packer_name, order_number, timestamp)
+        else:
+            result = self._commit_batch([(packer_name, order_number, timestamp)])[0]
+        
+        if result['status'] == 'duplicate':
+            raise DuplicateOrderError(result['existing'])
+        return result
+    
+    def save_orders(self, entries):
+        """Save a batch of (packer, order, timestamp) entries in one write
         
-        # Initialize packer if not exists
-        if packer_name not in data:
-            data[packer_name] = []
+        Returns one result per entry, in order: status 'recorded', or
+        'duplicate' with the existing record. Duplicates are detected against
+        stored orders and earlier entries of the same batch.
+        """
+        return self._commit_batch(entries)
+    
+    def import_orders(self, entries):
+        """Persist an iterable of validated (packer, order, timestamp) entries in one transaction
         
-        # Add new order
-        order_entry = {
-            "order": order_number,
-            "timestamp": timestamp
-        }
+        Returns the results for entries skipped as duplicates (for example
+        recorded by another station after validation); everything else is
+        recorded.
+        """
+        return self._commit_batch(entries, collect_results=False)
+    
+    @timed('packer_storage_commit_seconds')
+    def _commit_batch(self, entries, collect_results=True):
+        """Persist new orders with a single write/fsync; one result dict per entry
+        
+        With collect_results=False only duplicate results are returned, so a
+        large import does not build a result object per row.
+        """
+        results = []
+        accepted = []
+        
+        with self.lock, self.file_lock:
+            # Make sure the resident view includes other stations' changes;
+            # nobody else can write while we hold the lock, so once is enough
+            data = self._get_data()
+            
+            # Re-check under the lock: another station may have recorded an
+            # order between the caller's duplicate check and now
+            batch_orders = {}
+            for packer_name, order_number, timestamp in entries:
+                result = {
+                    'packer_name': packer_name,
+                    'order_number': order_number,
+                    'timestamp': timestamp
+                }
+                existing = batch_orders.get(order_number) or self._lookup(order_number)
+                if existing:
+                    result['status'] = 'duplicate'
+                    result['existing'] = existing
+                else:
+                    result['status'] = 'recorded'
+                    batch_orders[order_number] = {
+                        'packer_name': packer_name,
+                        'order_number': order_number,
+                        'timestamp': timestamp
+                    }
+                    accepted.append((packer_name, {
+                        "order": order_number,
+                        "timestamp": timestamp
+                    }))
+                if collect_results or result['status'] == 'duplicate':
+                    results.append(result)
+            
+            if not accepted:
+                return results
+            
+            if self.journal:
+                # Journal mode: one fsynced append instead of a full rewrite
+                self.journal.append([
+                    {
+                        "packer": packer_name,
+                        "order": order_entry['order'],
+                        "timestamp": order_entry['timestamp']
+                    }
+                    for packer_name, order_entry in accepted
+                ])
+                self._apply_to_index(accepted)
+            else:
+                # Build the new file contents from the resident data
+                new_data = dict(data)
+                for packer_name, order_entry in accepted:
+                    if new_data.get(packer_name) is data.get(packer_name):
+                        # Copy the resident list before the first append to it
+                        new_data[packer_name] = list(data.get(packer_name, []))
+                    new_data[packer_name].append(order_entry)
+                
+                # Atomic write back to file
+                self._atomic_write(new_data)
+                self._apply_to_index(accepted)
+        
+        instrumentation.count('packer_orders_committed_total', len(accepted))
+        
+        # Backup bookkeeping happens off the request path when the worker runs
+        if self.maintenance.running:
+            self.maintenance.order_recorded(len(accepted))
+        else:
+            self.perform_maintenance(len(accepted))
         
-        data[packer_name].append(order_entry)
+        return results
+    
+    def perform_maintenance(self, new_orders=0, save_state=True):
+        """Count recorded orders, compact the journal and create a backup when due"""
+        if self.partitions:
+            self.roll_partitions()
         
-        # Atomic write back to file
-        self._atomic_write(data)
+        # Off the submit path: stations only wait for the order's own append
+        if self.journal and self.journal.record_count >= self.storage_config['compact_every_orders']:
+            try:
+                self.compact()
+            except LockTimeout as e:
+                print(f"⚠️ Journal compaction postponed: {e}")
         
         # Update order count and check for backup
-        self.order_count += 1
+        self.order_count += new_orders
         if self._should_create_backup():
             self._create_backup()
-        else:
+        elif save_state:
             self._save_backup_state()
     
+    def start_maintenance(self):
+        """Move backup scheduling and state persistence to a background thread"""
+        self.maintenance.start()
+    
+    def shutdown(self, timeout=10.0):
+        """Flush queued writes, then let the maintenance worker finish so no backup is left half-written"""
+        self.feed.close()
+        committed = self.group_commit.shutdown(timeout)
+        return self.maintenance.shutdown(timeout) and committed
+    
     def load_packer_data(self):
         """Load all packer data from JSON file in flat format for compatibility"""
-        data = self._load_data()
-        flat_data = []
-        
-        for packer_name, orders in data.items():
-            for order in orders:
-                flat_data.append({
-                    'packer_name': packer_name,
-                    'order_number': order['order'],
-                    'timestamp': order['timestamp']
-                })
+        with self.lock:
+            data = self._get_data()
+            sources = [partition.data for partition in self._archived_partitions()] + [data]
+            flat_data = []
+            
+            for packer_name, orders in (item for source in sources for item in source.items()):
+                for order in orders:
+                    flat_data.append({
+                        'packer_name': packer_name,
+                        'order_number': order['order'],
+                        'timestamp': order['timestamp']
+                    })
         
         return flat_data
     
-    def find_packer_by_order(self, order_number):
-        """Find packer by order number"""
-        data = self._load_data()
+    def find_packer_by_order(self, order_number, refresh=True, wait=True):
+        """Find packer by order number
         
-        for packer_name, orders in data.items():
-            for order in orders:
-                if order['order'] == order_number:
-                    return {
-                        'packer_name': packer_name,
-                        'order_number': order['order'],
-                        'timestamp': order['timestamp']
-                    }
-        return None
+        refresh=False trusts the resident view once it is loaded, for
+        provisional checks of many orders that are re-checked on commit.
+        wait=False returns None instead of waiting while another thread
+        is writing, so a provisional check never blocks on shared storage.
+        """
+        if not self.lock.acquire(blocking=wait):
+            return None
+        try:
+            if refresh or self._data is None:
+                self._get_data()
+            return self._lookup(order_number)
+        finally:
+            self.lock.release()
+    
+    def _lookup(self, order_number):
+        """find_packer_by_order() against the resident view as it is; caller holds self.lock"""
+        if not self.order_bitmap.might_contain(order_number):
+            return None  # Never recorded in any period, no lookup needed
+        entry = self._order_index.get(order_number)
+        if entry is None:
+            return self.partitions.find(order_number) if self.partitions else None
+        
+        packer_name, timestamp = entry
+        return {
+            'packer_name': packer_name,
+            'order_number': order_number,
+            'timestamp': timestamp
+        }
     
     def order_exists(self, order_number):
         """Check if order number already exists"""
-        return self.find_packer_by_order(order_number) is not None
+        with self.lock:
+            self._get_data()
+            if not self.order_bitmap.might_contain(order_number):
+                return False
+            if order_number in self._order_index:
+                return True
+            return bool(self.partitions and self.partitions.find(order_number))
     
     def get_all_orders(self):
         """Get all orders with packer information in flat format"""
@@ -238,8 +871,14 @@ class PackerDatabase:
     
     def get_orders_by_packer(self, packer_name):
         """Get all orders for a specific packer"""
-        data = self._load_data()
-        packer_orders = data.get(packer_name, [])
+        with self.lock:
+            data = self._get_data()
+            # Only archive segments that list this packer are read
+            packer_orders = [
+                order
+                for source in [partition.data for partition in self._archived_partitions(packer_name)] + [data]
+                for order in source.get(packer_name, [])
+            ]
         
         return [
             {
@@ -252,22 +891,303 @@ class PackerDatabase:
     
     def get_recent_orders(self, limit=10):
         """Get recent orders (most recent first)"""
-        data = self.load_packer_data()
-        return sorted(data, key=lambda x: x['timestamp'], reverse=True)[:limit]
+        with self.lock:
+            self._get_data()
+            recent = self._time_index[-limit:] if limit > 0 else []
+            if self.partitions and limit > 0:
+                # Segments only matter if they hold orders newer than what we have
+                entries = sorted(self.partitions.entries(), key=lambda entry: entry['last'], reverse=True)
+                for entry in entries:
+                    if len(recent) >= limit and entry['last'] <= recent[0][0]:
+                        break
+                    recent = sorted(recent + self.partitions.load(entry).time_index[-limit:])[-limit:]
+        
+        return [
+            {
+                'packer_name': packer_name,
+                'order_number': order_number,
+                'timestamp': timestamp
+            }
+            for timestamp, order_number, packer_name in reversed(recent)
+        ]
     
-    def get_packer_statistics(self):
-        """Get statistics for all packers"""
-        data = self._load_data()
-        stats = {}
+    def get_orders_between(self, start_date=None, end_date=None):
+        """Get orders in an inclusive 'YYYY-MM-DD' date range (oldest first)"""
+        with self.lock:
+            self._get_data()
+            archived = self._archived_partitions(start_date=start_date, end_date=end_date)
+            if archived:
+                entries = self._merged_time_entries(archived, start_date, end_date)
+            else:
+                lo, hi = self._time_bounds(start_date, end_date)
+                entries = self._time_index[lo:hi]
         
-        for packer_name, orders in data.items():
-            stats[packer_name] = {
-                'total_orders': len(orders),
-                'orders': orders
+        return [
+            {
+                'packer_name': packer_name,
+                'order_number': order_number,
+                'timestamp': timestamp
+            }
+            for timestamp, order_number, packer_name in entries
+        ]
+    
+    def iter_orders(self, packer_name=None, start_date=None, end_date=None, chunk_size=1000):
+        """Yield orders oldest first, optionally filtered by packer and inclusive date range
+        
+        Walks the time index chunk_size entries at a time, holding the lock
+        only while copying a chunk and resuming after the last key seen, so
+        memory stays flat for any history size and orders recorded during
+        the walk never shift or repeat rows. Archive segments are loaded one
+        at a time as the walk reaches them.
+        """
+        with self.lock:
+            self._get_data()
+            entries = self.partitions.entries(packer_name, start_date, end_date) if self.partitions else []
+            resident_first = self._time_index[0][0] if self._time_index else '\uffff'
+        
+        sources = [(entry['first'], entry['last'], self._iter_partition_orders(entry, packer_name, start_date, end_date))
+                   for entry in entries]
+        sources.append((resident_first, '\uffff', self._iter_resident_orders(packer_name, start_date, end_date, chunk_size)))
+        sources.sort(key=lambda source: source[0])
+        
+        # Sources overlapping in time (late-imported scans) are merged, the rest chained
+        sort_key = lambda order: (order['timestamp'], order['order_number'], order['packer_name'])
+        group, group_last = [], None
+        for first, last, orders in sources:
+            if group and first > group_last:
+                yield from heapq.merge(*group, key=sort_key)
+                group = []
+            group_last = last if not group else max(group_last, last)
+            group.append(orders)
+        yield from heapq.merge(*group, key=sort_key)
+    
+    def _iter_partition_orders(self, entry, packer_name=None, start_date=None, end_date=None):
+        """Yield matching orders from one archive segment, loading it on first use"""
+        with self.lock:
+            time_index = self.partitions.load(entry).time_index
+        
+        lo, hi = self._time_bounds(start_date, end_date, time_index)
+        for position in range(lo, hi):
+            timestamp, order_number, name = time_index[position]
+            if packer_name and name != packer_name:
+                continue
+            yield {
+                'packer_name': name,
+                'order_number': order_number,
+                'timestamp': timestamp
             }
+    
+    def _iter_resident_orders(self, packer_name=None, start_date=None, end_date=None, chunk_size=1000):
+        """iter_orders() over the resident view only"""
+        last_key = None
+        while True:
+            with self.lock:
+                self._get_data()
+                lo, hi = self._time_bounds(start_date, end_date)
+                if last_key is not None:
+                    lo = max(lo, bisect_right(self._time_index, last_key))
+                chunk = self._time_index[lo:min(hi, lo + chunk_size)]
+            
+            if not chunk:
+                return
+            last_key = chunk[-1]
+            
+            for timestamp, order_number, name in chunk:
+                if packer_name and name != packer_name:
+                    continue
+                yield {
+                    'packer_name': name,
+                    'order_number': order_number,
+                    'timestamp': timestamp
+                }
+    
+    def query_orders(self, search=None, packer_name=None, start_date=None, end_date=None,
+                     sort='timestamp', descending=True, limit=50, offset=0, cursor=None):
+        """Filter, sort and paginate orders for the orders API
+        
+        Dates are inclusive 'YYYY-MM-DD' strings compared against the
+        timestamp's date part. Pass either an offset or the next_cursor
+        returned by the previous page; cursors stay stable while new
+        orders are being recorded. Timestamp-sorted queries page straight
+        off the time index without sorting.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field '{sort}', expected one of {SORT_FIELDS}")
+        
+        search = search.lower() if search else None
+        cursor_key = tuple(decode_cursor(cursor)) if cursor else None
+        
+        with self.lock:
+            data = self._get_data()
+            archived = self._archived_partitions(packer_name, start_date, end_date)
+            
+            # Entries are tuples that sort by (sort value, order number, ...)
+            if sort == 'timestamp':
+                if archived:
+                    entries = self._merged_time_entries(archived, start_date, end_date)
+                    lo, hi = 0, len(entries)
+                else:
+                    lo, hi = self._time_bounds(start_date, end_date)
+                    entries = self._time_index
+                if search or packer_name:
+                    entries = [
+                        entry for entry in entries[lo:hi]
+                        if (not packer_name or entry[2] == packer_name)
+                        and (not search or search in entry[1].lower())
+                    ]
+                    lo, hi = 0, len(entries)
+                to_row = lambda entry: (entry[2], entry[1], entry[0])
+            else:
+                sources = [partition.data for partition in archived] + [data]
+                entries = []
+                for name, orders in (item for source in sources for item in source.items()):
+                    if packer_name and name != packer_name:
+                        continue
+                    for order in orders:
+                        if search and search not in order['order'].lower():
+                            continue
+                        day = order['timestamp'][:10]
+                        if start_date and day < start_date:
+                            continue
+                        if end_date and day > end_date:
+                            continue
+                        value = name if sort == 'packer_name' else order['order']
+                        entries.append((value, order['order'], name, order['timestamp']))
+                entries.sort()
+                lo, hi = 0, len(entries)
+                to_row = lambda entry: (entry[2], entry[1], entry[3])
+            
+            if descending:
+                end = hi - offset
+                if cursor_key:
+                    end = bisect_left(entries, cursor_key, lo, hi)
+                begin = max(lo, end - limit)
+                page = entries[begin:max(begin, end)][::-1]
+                has_more = begin > lo
+            else:
+                begin = lo + offset
+                if cursor_key:
+                    begin = bisect_left(entries, cursor_key, lo, hi)
+                    while begin < hi and tuple(entries[begin][:2]) == cursor_key:
+                        begin += 1
+                page = entries[begin:min(hi, begin + limit)]
+                has_more = begin + limit < hi
+            total = hi - lo
+        
+        orders = []
+        for entry in page:
+            name, order_number, timestamp = to_row(entry)
+            orders.append({
+                'packer_name': name,
+                'order_number': order_number,
+                'timestamp': timestamp
+            })
+        
+        next_cursor = None
+        if page and has_more:
+            next_cursor = encode_cursor(list(page[-1][:2]))
+        
+        return {
+            'orders': orders,
+            'total': total,
+            'next_cursor': next_cursor
+        }
+    
+    def get_packer_names(self):
+        """Get a sorted list of all packer names"""
+        with self.lock:
+            names = set(self._get_data().keys())
+            if self.partitions:
+                names |= self.partitions.packer_names()
+            return sorted(names)
+    
+    def get_statistics_summary(self, days=7):
+        """Per-packer totals, first/last scan, daily counts and orders per hour"""
+        with self.lock:
+            self._get_data()
+            return self.statistics.summary(days=days)
+    
+    def get_packer_statistics(self):
+        """Get statistics for all packers"""
+        with self.lock:
+            data = self._get_data()
+            stats = {}
+            
+            for source in [partition.data for partition in self._archived_partitions()] + [data]:
+                for packer_name, orders in source.items():
+                    packer_stats = stats.setdefault(packer_name, {'total_orders': 0, 'orders': []})
+                    packer_stats['orders'].extend(orders)
+                    packer_stats['total_orders'] += len(orders)
         
         return stats
     
+    def get_lock_metrics(self):
+        """Contention counters for the shared inter-process lock"""
+        return self.file_lock.get_metrics()
+
+    def verify(self):
+        """Full integrity check of the data file, journal, archived segments and backups
+
+        Loading only checks what it reads; this reads everything. Returns a
+        list of problems, empty when all files are intact.
+        """
+        problems = []
+        try:
+            self._read_snapshot()
+        except CorruptDataError as e:
+            problems.append(str(e))
+
+        if self.journal:
+            try:
+                with open(self.journal.journal_file, 'rb') as f:
+                    _, _, damaged = OrderJournal._parse(f.read())
+                if damaged:
+                    problems.append(f"{self.journal.journal_file} has {damaged} damaged records")
+            except FileNotFoundError:
+                pass
+
+        if self.partitions:
+            problems.extend(self.partitions.verify())
+        problems.extend(self.backups.verify())
+        return problems
+
+    def repair(self):
+        """Recover a damaged data file and drop damaged journal records; returns the problems left"""
+        with self.lock, self.file_lock:
+            data = self._load_snapshot()  # Recovers from backup if the snapshot is damaged
+            if self.journal:
+                # Fold the intact records into the snapshot so the damaged lines go with the reset
+                data = OrderJournal.merge(data, self.journal.replay())
+                self._atomic_write(data)
+                self.journal.reset()
+            self._set_resident(data, self._file_signature())
+        return self.verify()
+
+    def migrate_from_json(self, json_file='packer_data.json'):
+        """Migrate data from a packer_data.json file into this database's storage"""
+        if not os.path.exists(json_file) or os.path.abspath(json_file) == os.path.abspath(self.data_file):
+            return False
+        
+        try:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                new_data = json.load(f)
+            
+            # Write new format
+            with self.lock, self.file_lock:
+                self._atomic_write(new_data)
+                if self.journal:
+                    self.journal.reset()
+                self._data = None
+            
+            # Backup old file
+            backup_file = f"{json_file}.backup"
+            os.rename(json_file, backup_file)
+            
+            return True
+        except Exception as e:
+            print(f"Migration failed: {e}")
+            return False
+    
     def migrate_from_txt(self, txt_file='packer_data.txt'):
         """Migrate data from old text format to new JSON format"""
         if not os.path.exists(txt_file):
@@ -301,7 +1221,9 @@ class PackerDatabase:
                 })
             
             # Write new format
-            self._atomic_write(new_data)
+            with self.lock, self.file_lock:
+                self._atomic_write(new_data)
+                self._data = None
             
             # Backup old file
             backup_file = f"{txt_file}.backup"
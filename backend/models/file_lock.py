@@ -0,0 +1,292 @@
+import os
+import json
+import time
+import random
+import uuid
+import socket
+from threading import Condition, RLock, Thread
+
+from models.instrumentation import metrics as instrumentation
+
+try:
+    import fcntl  # POSIX only; Windows stations rely on the lock file alone
+except ImportError:
+    fcntl = None
+
+class LockTimeout(TimeoutError):
+    """Raised when the inter-process lock could not be acquired in time"""
+
+class InterProcessLock:
+    """Lock shared by every station process writing the same data file
+
+    The lock is a file created with O_EXCL next to the data file, which works
+    on network shares where OS-level locks are unreliable. It holds a random
+    owner token and a heartbeat counter that the holder rewrites every
+    stale_after / 4 seconds, so a waiter only breaks a lock whose contents
+    have not changed for stale_after seconds of its own monotonic clock:
+    long holds and clock skew between stations and the file server never
+    make a live lock look stale. A stale lock is renamed away and only
+    deleted if it still holds the contents judged stale; release() only
+    deletes a lock file carrying its own token. Where fcntl is available
+    the holder also keeps an advisory flock on it, so a crashed holder on
+    the same host is detected immediately. The lock is re-entrant within
+    one process.
+    """
+
+    def __init__(self, lock_file, timeout=10.0, stale_after=30.0, poll_interval=0.005, max_poll_interval=0.1):
+        self.lock_file = lock_file
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.heartbeat_interval = stale_after / 4
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._thread_lock = RLock()
+        self._depth = 0
+        self._fd = None
+        self._token = None
+        self._acquired_at = None
+        self._heartbeat = None       # Heartbeat thread, started on first acquisition
+        self._beat_condition = Condition()  # Guards _fd between the holder and the heartbeat thread
+        self._beats = 0
+        self._observed = None        # (lock file contents, monotonic time first seen) while waiting
+        self.metrics = {
+            'acquisitions': 0,
+            'contended': 0,          # Acquisitions that had to wait
+            'timeouts': 0,
+            'stale_locks_broken': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'max_hold_seconds': 0.0
+        }
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    @property
+    def held(self):
+        """True while a thread of this process holds the lock"""
+        return self._depth > 0
+
+    def acquire(self, timeout=None):
+        """Acquire the lock, waiting at most timeout seconds"""
+        self._thread_lock.acquire()
+        if self._depth > 0:
+            self._depth += 1
+            return
+
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        delay = self.poll_interval
+        contended = False
+
+        try:
+            while not self._try_acquire():
+                contended = True
+                if self._break_if_stale():
+                    continue
+                now = time.monotonic()
+                if now >= deadline:
+                    self.metrics['timeouts'] += 1
+                    instrumentation.count('packer_lock_timeouts_total', lock=os.path.basename(self.lock_file))
+                    raise LockTimeout(f"Timed out after {timeout:.1f}s waiting for {self.lock_file}")
+                # Jittered exponential backoff so stations don't retry in lockstep
+                time.sleep(min(delay * random.uniform(0.5, 1.5), deadline - now))
+                delay = min(delay * 2, self.max_poll_interval)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+        waited = time.monotonic() - start
+        self._observed = None
+        self._start_heartbeat()
+        self._depth = 1
+        self._acquired_at = time.monotonic()
+        self.metrics['acquisitions'] += 1
+        self.metrics['total_wait_seconds'] += waited
+        self.metrics['max_wait_seconds'] = max(self.metrics['max_wait_seconds'], waited)
+        if contended:
+            self.metrics['contended'] += 1
+        if instrumentation.active:
+            instrumentation.observe('packer_lock_wait_seconds', waited, lock=os.path.basename(self.lock_file))
+
+    def release(self):
+        """Release one level of the lock, removing the lock file at the outermost level"""
+        if self._depth == 0:
+            raise RuntimeError("Releasing an inter-process lock that is not held")
+
+        self._depth -= 1
+        if self._depth == 0:
+            held = time.monotonic() - self._acquired_at
+            self.metrics['max_hold_seconds'] = max(self.metrics['max_hold_seconds'], held)
+            if instrumentation.active:
+                instrumentation.observe('packer_lock_hold_seconds', held, lock=os.path.basename(self.lock_file))
+            try:
+                if self._owner_token(self._read(self.lock_file)) != self._token:
+                    # Broken by another station after we stopped beating; the file is theirs now
+                    print(f"⚠️ Lock file {self.lock_file} was taken over while held")
+                elif os.name == 'nt':
+                    with self._beat_condition:
+                        os.close(self._fd)  # Windows cannot delete a file that is still open
+                        self._fd = None
+                    os.unlink(self.lock_file)
+                else:
+                    # Unlink while still holding the flock so nobody judges it stale
+                    os.unlink(self.lock_file)
+            except FileNotFoundError:
+                pass
+            finally:
+                with self._beat_condition:
+                    if self._fd is not None:
+                        os.close(self._fd)
+                        self._fd = None
+                    self._token = None
+        self._thread_lock.release()
+
+    def _contents(self, beat=0):
+        """Lock file contents for this holder: owner details, token and heartbeat counter"""
+        return json.dumps({
+            'pid': os.getpid(),
+            'host': socket.gethostname(),
+            'acquired': self._acquired_wall,
+            'token': self._token,
+            'beat': beat
+        }).encode('utf-8').ljust(self._contents_size)
+
+    @staticmethod
+    def _read(path):
+        """Contents of a lock file, or None if there is none"""
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _owner_token(contents):
+        """Owner token recorded in lock file contents, or None"""
+        try:
+            return json.loads(contents.decode('utf-8')).get('token')
+        except (AttributeError, UnicodeDecodeError, ValueError):
+            return None
+
+    def _start_heartbeat(self):
+        """Start the heartbeat thread once; it idles while the lock is not held"""
+        with self._beat_condition:
+            self._beats = 0
+            self._beat_condition.notify()
+        if self._heartbeat is None or not self._heartbeat.is_alive():
+            self._heartbeat = Thread(target=self._beat, name='packer-lock-heartbeat', daemon=True)
+            self._heartbeat.start()
+
+    def _beat(self):
+        """Rewrite the lock file in place while held, so waiters can see the holder is alive"""
+        with self._beat_condition:
+            while True:
+                while self._fd is None:
+                    self._beat_condition.wait()
+                fd = self._fd
+                self._beat_condition.wait(self.heartbeat_interval)
+                if self._fd != fd or fd is None:
+                    continue  # Released (and maybe re-acquired) meanwhile: start a fresh interval
+                self._beats += 1
+                try:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    os.write(fd, self._contents(self._beats))
+                except OSError as e:
+                    print(f"Warning: Could not refresh lock file {self.lock_file}: {e}")
+
+    def _try_acquire(self):
+        """Create the lock file exclusively; False if another process holds it"""
+        try:
+            fd = os.open(self.lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+
+        if fcntl:
+            # Blocking is fine: a contender only holds it for its stale check
+            fcntl.flock(fd, fcntl.LOCK_EX)
+
+        self._token = uuid.uuid4().hex
+        self._acquired_wall = time.time()
+        self._contents_size = 0
+        # Fixed size, so each heartbeat overwrites the contents in place
+        self._contents_size = len(self._contents(10 ** 12))
+        os.write(fd, self._contents())
+        with self._beat_condition:
+            self._fd = fd
+        return True
+
+    def _break_if_stale(self):
+        """Remove a lock file left behind by a crashed holder"""
+        contents = self._read(self.lock_file)
+        if contents is None:
+            return True  # Released in the meantime, retry immediately
+
+        # Stale once the contents (token and heartbeat) stay the same for
+        # stale_after seconds of our own clock; the file's mtime comes from
+        # the file server's clock and is never compared with ours
+        now = time.monotonic()
+        if self._observed is None or self._observed[0] != contents:
+            self._observed = (contents, now)
+        stale = now - self._observed[1] > self.stale_after
+        if not stale and fcntl and contents:
+            # Owner info is written after the flock, so a non-empty file we
+            # can flock means the holder process has gone away
+            try:
+                fd = os.open(self.lock_file, os.O_RDONLY)
+            except FileNotFoundError:
+                return True
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                # Only stale if the path still names the file we just locked
+                stale = os.fstat(fd).st_ino == os.stat(self.lock_file).st_ino
+            except OSError:
+                stale = False
+            finally:
+                os.close(fd)
+
+        if not stale:
+            return False
+
+        # Rename first: only the waiter whose rename succeeds can delete, and
+        # only if the file it moved is still the one judged stale
+        self._observed = None
+        moved = f"{self.lock_file}.stale-{uuid.uuid4().hex}"
+        try:
+            os.rename(self.lock_file, moved)
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False  # Still open by its holder (Windows), so not abandoned
+
+        if self._read(moved) != contents:
+            # The lock changed hands or beat just before the rename: put it back
+            try:
+                if os.name == 'nt':
+                    os.rename(moved, self.lock_file)  # Fails rather than overwrite
+                else:
+                    os.link(moved, self.lock_file)    # Fails rather than overwrite
+                    os.unlink(moved)
+            except OSError as e:
+                print(f"Warning: Could not restore lock file {self.lock_file}: {e}")
+            return False
+
+        try:
+            os.unlink(moved)
+        except OSError:
+            pass
+        self.metrics['stale_locks_broken'] += 1
+        print(f"⚠️ Removed stale lock file: {self.lock_file}")
+        return True
+
+    def get_metrics(self):
+        """Snapshot of the contention counters"""
+        metrics = dict(self.metrics)
+        acquisitions = metrics['acquisitions']
+        metrics['avg_wait_seconds'] = metrics['total_wait_seconds'] / acquisitions if acquisitions else 0.0
+        return metrics
@@ -0,0 +1,99 @@
+import time
+import queue
+import threading
+
+class _PendingOrder:
+    """One caller's order waiting for the next group commit"""
+
+    __slots__ = ('entry', 'done', 'result', 'error')
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class GroupCommitWriter:
+    """Collects concurrent submissions and persists them with one write and fsync
+
+    Orders that arrive while a commit is in flight form the next batch, so an
+    isolated scan is written immediately while a burst of N scans costs a
+    handful of writes instead of N. window_seconds optionally waits a little
+    longer for stragglers; max_batch bounds the size of one commit.
+    """
+
+    def __init__(self, commit, window_seconds=0.0, max_batch=100):
+        self.commit = commit  # Callable: list of (packer, order, timestamp) -> list of results
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.thread = None
+        self.start_lock = threading.Lock()
+        self.metrics = {
+            'batches': 0,
+            'orders': 0,
+            'max_batch_size': 0
+        }
+
+    def _ensure_started(self):
+        """Start the writer thread on first use"""
+        if self.thread and self.thread.is_alive():
+            return
+        with self.start_lock:
+            if not (self.thread and self.thread.is_alive()):
+                self.thread = threading.Thread(target=self._run, name='packer-group-commit', daemon=True)
+                self.thread.start()
+
+    def submit(self, packer_name, order_number, timestamp):
+        """Queue one order and block until its batch is committed; returns its result"""
+        self._ensure_started()
+        pending = _PendingOrder((packer_name, order_number, timestamp))
+        self.queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def shutdown(self, timeout=10.0):
+        """Commit anything still queued and stop the writer thread"""
+        if not (self.thread and self.thread.is_alive()):
+            return True
+        self.queue.put(None)
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self.queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.window_seconds
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                results = self.commit([pending.entry for pending in batch])
+            except Exception as e:
+                # Storage failed for the whole batch: every caller sees the error
+                for pending in batch:
+                    pending.error = e
+                    pending.done.set()
+                continue
+
+            self.metrics['batches'] += 1
+            self.metrics['orders'] += len(batch)
+            self.metrics['max_batch_size'] = max(self.metrics['max_batch_size'], len(batch))
+            for pending, result in zip(batch, results):
+                pending.result = result
+                pending.done.set()
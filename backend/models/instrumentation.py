@@ -0,0 +1,156 @@
+import os
+import time
+import functools
+from bisect import bisect_left
+from datetime import datetime
+from threading import Lock
+
+# Latency buckets in seconds, from sub-millisecond index lookups to multi-second rewrites
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'packer_http_request_seconds': 'Flask request handling time by route',
+    'packer_storage_load_seconds': 'Time to (re)build the resident view from the data files',
+    'packer_storage_write_seconds': 'Time to durably write orders (snapshot rewrite or journal append)',
+    'packer_storage_commit_seconds': 'Time to commit a batch of submitted orders, including lock waits',
+    'packer_backup_seconds': 'Time to create a backup',
+    'packer_lock_wait_seconds': 'Time spent waiting for the shared data file lock',
+    'packer_lock_hold_seconds': 'Time the shared data file lock was held',
+    'packer_lock_timeouts_total': 'Lock acquisitions that gave up after the timeout',
+    'packer_storage_bytes_read_total': 'Bytes read from the data files',
+    'packer_storage_bytes_written_total': 'Bytes written to the data files and backups',
+    'packer_orders_committed_total': 'Orders durably recorded by this process'
+}
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _escape(value):
+    """Escape a label value for the text exposition format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+class Metrics:
+    """Process-wide latency histograms and counters, rendered in Prometheus text format
+
+    Everything is a no-op while disabled, so instrumented code pays one
+    attribute check per call. With a slow threshold set, every timed
+    operation at or above it is also written to the slow-operation log.
+    """
+
+    def __init__(self, enabled=False, slow_threshold=None, slow_log=None, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.slow_threshold = slow_threshold  # Seconds, or None for no slow-operation log
+        self.slow_log = slow_log              # File to append slow operations to (console if None)
+        self.buckets = buckets
+        self.lock = Lock()
+        self._histograms = {}  # name -> {label key: [bucket counts..., +Inf count], sum}
+        self._counters = {}    # name -> {label key: value}
+
+    @classmethod
+    def from_environment(cls):
+        """PACKER_METRICS=1 enables collection; PACKER_SLOW_MS and PACKER_SLOW_LOG configure the slow log"""
+        slow_threshold = None
+        slow_ms = os.environ.get('PACKER_SLOW_MS', '').strip()
+        if slow_ms:
+            try:
+                slow_threshold = float(slow_ms) / 1000
+            except ValueError:
+                pass
+            if slow_threshold is None or not slow_threshold >= 0:
+                # Runs at import time: a typo must not stop the app or the tools from starting
+                print(f"⚠️ Ignoring PACKER_SLOW_MS={slow_ms!r}: expected a number of milliseconds, slow log disabled")
+                slow_threshold = None
+        return cls(
+            enabled=os.environ.get('PACKER_METRICS', '').lower() in ('1', 'true', 'yes', 'on'),
+            slow_threshold=slow_threshold,
+            slow_log=os.environ.get('PACKER_SLOW_LOG') or None
+        )
+
+    @property
+    def active(self):
+        """True if timings are wanted for metrics or for the slow log"""
+        return self.enabled or self.slow_threshold is not None
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration in a histogram (and the slow log if over the threshold)"""
+        if self.enabled:
+            key = _label_key(labels)
+            with self.lock:
+                series = self._histograms.setdefault(name, {})
+                state = series.get(key)
+                if state is None:
+                    state = series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+                state[0][bisect_left(self.buckets, seconds)] += 1
+                state[1] += seconds
+
+        if self.slow_threshold is not None and seconds >= self.slow_threshold:
+            self._log_slow(name, seconds, labels)
+
+    def count(self, name, amount=1, **labels):
+        """Add to a counter"""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self.lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def _log_slow(self, name, seconds, labels):
+        details = ' '.join(f'{label}={value}' for label, value in sorted(labels.items()))
+        line = f"{datetime.now().isoformat()} {name} {seconds * 1000:.1f}ms {details}".rstrip()
+        if not self.slow_log:
+            print(f"🐢 Slow operation: {line}")
+            return
+        try:
+            with open(self.slow_log, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            print(f"Warning: Could not write slow operation log: {e}")
+
+    def render(self):
+        """All series in Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for name in sorted(self._histograms):
+                if name in HELP:
+                    lines.append(f'# HELP {name} {HELP[name]}')
+                lines.append(f'# TYPE {name} histogram')
+                for key, (counts, total) in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                        cumulative += bucket_count
+                        lines.append(f'{name}_bucket{_format_labels(key, [("le", bound)])} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(key)} {total}')
+                    lines.append(f'{name}_count{_format_labels(key)} {cumulative}')
+
+            for name in sorted(self._counters):
+                if name in HELP:
+                    lines.append(f'# HELP {name} {HELP[name]}')
+                lines.append(f'# TYPE {name} counter')
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f'{name}{_format_labels(key)} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics.from_environment()
+
+def timed(name, **labels):
+    """Decorator: observe the call's duration under name when instrumentation is active"""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not metrics.active:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - start, **labels)
+        return wrapper
+    return decorate
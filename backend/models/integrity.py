@@ -0,0 +1,113 @@
+import os
+import re
+import json
+import zlib
+import tempfile
+from datetime import datetime
+
+class CorruptDataError(ValueError):
+    """Raised when a data file, journal record, segment or backup fails its integrity check"""
+
+def checksum(payload):
+    """CRC-32 of bytes as 8 hex digits"""
+    return f'{zlib.crc32(payload):08x}'
+
+def file_checksum(path, chunk_size=1 << 20):
+    """CRC-32 of a file's contents, read in chunks"""
+    crc = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            crc = zlib.crc32(chunk, crc)
+    return f'{crc:08x}'
+
+class ChecksumFile:
+    """Sidecar recording the size, mtime and CRC-32 of the last snapshot written
+
+    The record only applies while the data file still has that exact size
+    and mtime, so a snapshot replaced by a station without it (or edited by
+    hand) is judged by whether it parses, never flagged as corrupt. When it
+    does apply, verifying costs one CRC over bytes that are being loaded
+    anyway, instead of a separate scan.
+    """
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.checksum_file = f"{data_file}.checksum"
+
+    def record(self):
+        """The stored record, or None if missing or unreadable"""
+        try:
+            with open(self.checksum_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def applies(self, st):
+        """The stored record if it describes the data file with this os.stat result"""
+        record = self.record()
+        if record and record.get('size') == st.st_size and record.get('mtime_ns') == st.st_mtime_ns:
+            return record
+        return None
+
+    def verify(self, payload, st):
+        """Raise CorruptDataError if payload contradicts an applicable record"""
+        record = self.applies(st)
+        if record and record.get('crc32') != checksum(payload):
+            raise CorruptDataError(f"{self.data_file} does not match its checksum (written {record.get('written')})")
+
+    def write(self, crc32):
+        """Record the data file as just written, with its CRC-32"""
+        st = os.stat(self.data_file)
+        record = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'crc32': crc32,
+            'written': datetime.now().isoformat()
+        }
+        temp_file = tempfile.NamedTemporaryFile(
+            mode='w',
+            dir=os.path.dirname(self.checksum_file),
+            delete=False,
+            suffix='.tmp',
+            encoding='utf-8'
+        )
+        try:
+            json.dump(record, temp_file)
+            temp_file.close()
+            os.replace(temp_file.name, self.checksum_file)
+        except Exception as e:
+            temp_file.close()
+            try:
+                os.unlink(temp_file.name)
+            except OSError:
+                pass
+            print(f"Warning: Could not save data file checksum: {e}")
+
+# Order objects and packer list openings in packer_data.json, in file order
+_STRING = r'"((?:[^"\\]|\\.)*)"'
+_SALVAGE_PATTERN = re.compile(
+    _STRING + r'\s*:\s*\[|\{\s*"order"\s*:\s*' + _STRING + r'\s*,\s*"timestamp"\s*:\s*' + _STRING + r'\s*\}'
+)
+
+def salvage_json(raw):
+    """Complete order records readable from a damaged packer_data.json, as {packer: [orders]}
+
+    Truncation and garbage only lose the orders they overlap: every
+    intact {"order": ..., "timestamp": ...} object is kept under the last
+    packer list opened before it.
+    """
+    text = raw.decode('utf-8', errors='replace')
+    data = {}
+    packer_name = None
+    for match in _SALVAGE_PATTERN.finditer(text):
+        try:
+            if match.group(1) is not None:
+                packer_name = json.loads(f'"{match.group(1)}"')
+            elif packer_name is not None:
+                data.setdefault(packer_name, []).append({
+                    'order': json.loads(f'"{match.group(2)}"'),
+                    'timestamp': json.loads(f'"{match.group(3)}"')
+                })
+        except ValueError:
+            continue
+    return data
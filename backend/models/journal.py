@@ -0,0 +1,216 @@
+import os
+import json
+from threading import RLock
+
+from models.instrumentation import metrics as instrumentation, timed
+from models.integrity import checksum
+
+# Every record ends with its own CRC-32: ...,"crc":"1a2b3c4d"}\n
+_CRC_SUFFIX_LENGTH = len(',"crc":"00000000"}\n')
+
+class OrderJournal:
+    """Append-only write-ahead log of orders, one JSON record per line
+
+    Each record carries a CRC-32 of its own JSON body, so a damaged line in
+    the middle of the journal is skipped and counted instead of hiding
+    every record after it.
+    """
+
+    def __init__(self, journal_file):
+        self.journal_file = journal_file
+        self.lock = RLock()
+        self.record_count = 0
+        self.offset = 0  # End of the last intact record this process has read or written
+        self.damaged_records = 0  # Damaged lines skipped by the last replay and tails since
+
+    @timed('packer_storage_write_seconds', kind='journal')
+    def append(self, entries):
+        """Append order records and fsync so they survive a crash
+
+        Each entry is a dict with 'packer', 'order' and 'timestamp' keys.
+        Callers must hold the inter-process lock, since a torn record left
+        by a crashed writer is cut off here before appending.
+        """
+        if not entries:
+            return
+
+        lines = b''.join(self._encode(entry) for entry in entries)
+
+        with self.lock:
+            fd = os.open(self.journal_file, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+            with os.fdopen(fd, 'r+b') as f:
+                self._repair_tail(f)
+                f.seek(0, os.SEEK_END)
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())  # Ensure records are on disk before acknowledging
+                self.offset = f.tell()
+            self.record_count += len(entries)
+        instrumentation.count('packer_storage_bytes_written_total', len(lines), kind='journal')
+
+    def _repair_tail(self, f):
+        """Truncate a partial final record so the next append starts on a clean line"""
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+
+        chunk = min(size, 65536)
+        f.seek(size - chunk)
+        tail = f.read(chunk)
+        if b'\n' not in tail and chunk < size:
+            f.seek(0)
+            tail = f.read()
+            chunk = size
+        valid_length = size - chunk + tail.rfind(b'\n') + 1
+
+        print(f"⚠️ Discarding {size - valid_length} bytes of incomplete journal data")
+        f.truncate(valid_length)
+
+    def replay(self):
+        """Read every intact record from the journal
+
+        A torn final line (crash mid-append, or another station's append in
+        progress) is ignored here and only repaired by the next locked append.
+        """
+        with self.lock:
+            try:
+                with open(self.journal_file, 'rb') as f:
+                    raw = f.read()
+            except FileNotFoundError:
+                self.record_count = 0
+                self.offset = 0
+                return []
+
+            previously_damaged = self.damaged_records
+            records, self.offset, self.damaged_records = self._parse(raw)
+            self.record_count = len(records)
+            if self.damaged_records and self.damaged_records != previously_damaged:
+                print(f"⚠️ Skipped {self.damaged_records} damaged journal records in {self.journal_file}")
+
+        return records
+
+    def read_tail(self):
+        """Read only the intact records appended since the last replay, read_tail or append
+
+        The caller must know the journal has not been reset since then
+        (compaction always replaces the snapshot first, so an unchanged
+        snapshot signature is enough).
+        """
+        with self.lock:
+            try:
+                with open(self.journal_file, 'rb') as f:
+                    f.seek(self.offset)
+                    raw = f.read()
+            except FileNotFoundError:
+                return []
+
+            records, consumed, damaged = self._parse(raw)
+            self.offset += consumed
+            if damaged:
+                self.damaged_records += damaged
+                print(f"⚠️ Skipped {damaged} damaged journal records in {self.journal_file}")
+            self.record_count += len(records)
+
+        return records
+
+    @staticmethod
+    def _encode(entry):
+        """One journal line: the compact JSON record with its CRC-32 appended"""
+        body = json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return body[:-1] + f',"crc":"{checksum(body)}"}}\n'.encode('ascii')
+
+    @staticmethod
+    def _decode(line):
+        """Record from one newline-terminated journal line, or None if it is damaged"""
+        if line[-_CRC_SUFFIX_LENGTH:-11] == b',"crc":"':
+            body = line[:-_CRC_SUFFIX_LENGTH] + b'}'
+            if checksum(body) != line[-11:-3].decode('ascii', errors='replace'):
+                return None
+        else:
+            body = line  # Written before records carried a CRC
+        try:
+            record = json.loads(body.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return None
+        if not isinstance(record, dict) or not all(key in record for key in ('packer', 'order', 'timestamp')):
+            return None
+        return record
+
+    @staticmethod
+    def _parse(raw):
+        """Decode complete records from raw journal bytes; returns (records, bytes consumed, damaged lines)"""
+        records = []
+        consumed = 0
+        damaged = 0
+        lines = raw.split(b'\n')
+        for line in lines[:-1]:  # The last piece is a partial record or empty
+            consumed += len(line) + 1
+            if not line.strip():
+                continue
+            record = OrderJournal._decode(line + b'\n')
+            if record is None:
+                damaged += 1
+                continue
+            records.append(record)
+        return records, consumed, damaged
+
+    def reset(self):
+        """Empty the journal once its records are folded into the snapshot"""
+        with self.lock:
+            with open(self.journal_file, 'w', encoding='utf-8') as f:
+                f.flush()
+                os.fsync(f.fileno())
+            self.record_count = 0
+            self.offset = 0
+
+    def discard_before(self, offset):
+        """Drop the records before offset once they are folded into the snapshot
+
+        Records appended after offset are kept. Callers must hold the
+        inter-process lock. The remaining records are written to a
+        temporary file and swapped in, so a crash leaves either journal.
+        """
+        with self.lock:
+            try:
+                with open(self.journal_file, 'rb') as f:
+                    f.seek(offset)
+                    remaining = f.read()
+            except FileNotFoundError:
+                remaining = b''
+            if not remaining:
+                self.reset()
+                return
+
+            temp_name = f"{self.journal_file}.tmp"
+            with open(temp_name, 'wb') as f:
+                f.write(remaining)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_name, self.journal_file)
+            records, consumed, _ = self._parse(remaining)
+            self.record_count = len(records)
+            self.offset = consumed
+
+    @staticmethod
+    def merge(data, records):
+        """Apply journal records onto snapshot data in {packer: [orders]} form
+
+        Records already present in the snapshot are skipped, so replaying a
+        journal that was compacted but not yet reset is harmless.
+        """
+        seen = {order['order'] for orders in data.values() for order in orders}
+
+        for record in records:
+            if record['order'] in seen:
+                continue
+            seen.add(record['order'])
+            data.setdefault(record['packer'], []).append({
+                'order': record['order'],
+                'timestamp': record['timestamp']
+            })
+
+        return data
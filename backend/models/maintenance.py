@@ -0,0 +1,85 @@
+import time
+import queue
+import threading
+
+_STOP = object()
+
+class MaintenanceWorker:
+    """Background thread that owns backup scheduling, backup-state persistence and retention
+
+    The request path only enqueues an event; the worker coalesces bursts of
+    events into one call to db.perform_maintenance(), writes the backup state
+    at most every state_flush_interval seconds and checks the time-based
+    backup trigger every check_interval seconds even when no orders arrive.
+    """
+
+    def __init__(self, db, state_flush_interval=5.0, check_interval=60.0):
+        self.db = db
+        self.state_flush_interval = state_flush_interval
+        self.check_interval = check_interval
+        self.queue = queue.Queue()
+        self.thread = None
+        self.errors = 0
+
+    def start(self):
+        """Start the worker thread (idempotent)"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name='packer-maintenance', daemon=True)
+        self.thread.start()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def order_recorded(self, count=1):
+        """Called on the request path after orders are durably written"""
+        self.queue.put(count)
+
+    def shutdown(self, timeout=10.0):
+        """Finish queued work, persist state and stop; returns True if the thread exited"""
+        if not self.running:
+            return True
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+    def _run(self):
+        pending = 0
+        last_flush = time.monotonic()
+        stopping = False
+
+        while not stopping:
+            # Wake sooner while there is unsaved state to flush
+            timeout = self.state_flush_interval if pending else self.check_interval
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = 0  # Periodic wake-up for the time-based trigger
+
+            # Drain everything already queued so a burst costs one pass
+            items = [item]
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            new_orders = 0
+            for entry in items:
+                if entry is _STOP:
+                    stopping = True
+                else:
+                    new_orders += entry
+            pending += new_orders
+
+            now = time.monotonic()
+            save_state = stopping or (pending and now - last_flush >= self.state_flush_interval)
+            try:
+                self.db.perform_maintenance(new_orders, save_state=save_state)
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Maintenance failed: {e}")
+            if save_state:
+                pending = 0
+                last_flush = now
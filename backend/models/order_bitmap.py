@@ -0,0 +1,86 @@
+import os
+import json
+import tempfile
+
+ORDER_DIGITS = 6
+ORDER_SPACE = 10 ** ORDER_DIGITS
+
+class OrderBitmap:
+    """One bit per possible 6-digit order number (125 KB), for instant negative duplicate checks
+
+    Order numbers outside the 000000-999999 space are never tracked, so
+    might_contain() answers True for them and callers fall back to the
+    full lookup.
+    """
+
+    def __init__(self, bitmap_file):
+        self.bitmap_file = bitmap_file
+        self.bits = bytearray(ORDER_SPACE // 8)
+        self.signature = None  # Data file signature this bitmap describes
+
+    @staticmethod
+    def _position(order_number):
+        """Bit position of a 6-digit order number, or None if it isn't one"""
+        if len(order_number) == ORDER_DIGITS and order_number.isascii() and order_number.isdigit():
+            return int(order_number)
+        return None
+
+    def add(self, order_number):
+        """Mark one order number as recorded"""
+        position = self._position(order_number)
+        if position is not None:
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, order_number):
+        """False means the order is certainly not recorded; True means look it up"""
+        position = self._position(order_number)
+        if position is None:
+            return True
+        return bool(self.bits[position >> 3] & (1 << (position & 7)))
+
+    def rebuild(self, order_numbers, base=None):
+        """Recompute the bitmap from an iterable of order numbers, on top of a base bitmap if given"""
+        self.bits = bytearray(base.bits) if base else bytearray(ORDER_SPACE // 8)
+        for order_number in order_numbers:
+            self.add(order_number)
+
+    def load(self, signature):
+        """Load the persisted bitmap if it describes the given data signature"""
+        try:
+            with open(self.bitmap_file, 'rb') as f:
+                header = json.loads(f.readline())
+                bits = f.read()
+        except (FileNotFoundError, ValueError):
+            return False
+
+        stored = header.get('signature')
+        if stored is None or [tuple(part) if part else None for part in stored] != list(signature):
+            return False
+        if len(bits) != ORDER_SPACE // 8:
+            return False
+
+        self.bits = bytearray(bits)
+        self.signature = signature
+        return True
+
+    def save(self, signature):
+        """Persist the bitmap next to the data file: a JSON header line, then the raw bits"""
+        temp_file = tempfile.NamedTemporaryFile(
+            mode='wb',
+            dir=os.path.dirname(self.bitmap_file),
+            delete=False,
+            suffix='.tmp'
+        )
+        try:
+            temp_file.write(json.dumps({'signature': signature}).encode('utf-8') + b'\n')
+            temp_file.write(self.bits)
+            temp_file.close()
+            os.replace(temp_file.name, self.bitmap_file)
+            self.signature = signature
+        except Exception as e:
+            temp_file.close()
+            try:
+                os.unlink(temp_file.name)
+            except OSError:
+                pass
+            print(f"Warning: Could not save order bitmap: {e}")
@@ -0,0 +1,72 @@
+import time
+from collections import deque
+from itertools import islice
+from threading import Condition
+
+class OrderFeed:
+    """Newly recorded orders, numbered in arrival order, for live dashboards
+
+    The storage engine publishes every batch once, whether it wrote the
+    orders itself or found other stations' orders on its next refresh, so
+    any number of subscribers cost O(new orders) instead of a history
+    reload each. Idle subscribers block in wait(); at most one of them per
+    poll_interval calls poll() to look for other stations' writes.
+    """
+
+    def __init__(self, poll=None, poll_interval=1.0, capacity=1000):
+        self.poll = poll                    # Callable that publishes other stations' new orders
+        self.poll_interval = poll_interval
+        self.condition = Condition()
+        self.events = deque(maxlen=capacity)  # Most recent events only; older ones force a resync
+        self.sequence = 0                   # Sequence number of the newest event
+        self.closed = False
+        self._last_poll = 0.0
+
+    def publish(self, orders):
+        """Append order dicts and wake every waiting subscriber"""
+        if not orders:
+            return
+        with self.condition:
+            for order in orders:
+                self.sequence += 1
+                self.events.append(dict(order, sequence=self.sequence))
+            self.condition.notify_all()
+
+    def since(self, sequence):
+        """(events after sequence, complete); complete is False if some were already dropped"""
+        with self.condition:
+            missed = self.sequence - sequence
+            if missed < 0:
+                return [], False  # Sequence from before a restart
+            kept = min(missed, len(self.events))
+            return list(islice(self.events, len(self.events) - kept, None)), kept == missed
+
+    def wait(self, sequence, timeout):
+        """Block until there are events after sequence, the timeout passes or the feed closes"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.condition:
+                now = time.monotonic()
+                if self.sequence != sequence or self.closed or now >= deadline:
+                    break
+                poll_due = self.poll is not None and now - self._last_poll >= self.poll_interval
+                if poll_due:
+                    self._last_poll = now
+                else:
+                    wake = deadline
+                    if self.poll is not None:
+                        wake = min(wake, self._last_poll + self.poll_interval)
+                    self.condition.wait(wake - now)
+            if poll_due:
+                # Outside the condition: the poll publishes through it
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"Warning: Could not check for new orders: {e}")
+        return self.since(sequence)
+
+    def close(self):
+        """Release every waiting subscriber, for shutdown"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
@@ -0,0 +1,283 @@
+import os
+import sys
+import json
+import gzip
+import hashlib
+import tempfile
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from models.statistics import PackerStatistics
+from models.order_bitmap import OrderBitmap
+from models.integrity import CorruptDataError, checksum
+
+# Length of the ISO timestamp prefix that names each period
+PERIOD_KEY_LENGTHS = {'year': 4, 'month': 7, 'day': 10}
+
+def order_key(order_number):
+    """64-bit hash of an order number, as stored in partition index files"""
+    digest = hashlib.blake2b(order_number.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+class Partition:
+    """A loaded closed partition: its {packer: [orders]} data plus order and time indexes"""
+
+    def __init__(self, entry, data):
+        self.entry = entry
+        self.data = data
+        self.order_index = {}
+        time_index = []
+        for packer_name, orders in data.items():
+            for order in orders:
+                self.order_index.setdefault(order['order'], (packer_name, order['timestamp']))
+                time_index.append((order['timestamp'], order['order'], packer_name))
+        time_index.sort()
+        self.time_index = time_index
+
+class PartitionArchive:
+    """Immutable per-period segments of closed order history
+
+    Each segment is a (optionally gzipped) {packer: [orders]} JSON file plus
+    an .idx file of sorted 64-bit order-number hashes, so duplicate checks
+    bisect a few small arrays instead of loading old data. manifest.json
+    lists every segment with its period, order count, first/last timestamp
+    and per-packer counts, which is all queries need to skip irrelevant
+    segments. Segments are never rewritten: scans imported late for a
+    closed period get a new segment for that period.
+    """
+
+    def __init__(self, archive_dir='partitions', period='month', compress=True, cache_size=12):
+        if period not in PERIOD_KEY_LENGTHS:
+            raise ValueError(f"Unknown partition period '{period}', expected one of {tuple(PERIOD_KEY_LENGTHS)}")
+
+        self.archive_dir = archive_dir
+        self.period = period
+        self.compress = compress
+        self.cache_size = cache_size
+        self.manifest_file = os.path.join(archive_dir, 'manifest.json')
+        self.statistics = PackerStatistics(os.path.join(archive_dir, 'stats.json'))
+        self.bitmap = OrderBitmap(os.path.join(archive_dir, 'orders.bitmap'))
+        self._manifest = {'version': 1, 'generation': 0, 'partitions': []}
+        self._manifest_signature = None
+        self._indexes = {}           # Segment file -> sorted array of order keys
+        self._cache = OrderedDict()  # Segment file -> Partition, least recently used first
+
+    def period_of(self, timestamp):
+        """Period key ('2024-05' for months) of an ISO timestamp"""
+        return timestamp[:PERIOD_KEY_LENGTHS[self.period]]
+
+    def manifest_signature(self):
+        """(mtime, size) of the manifest, or None before anything is archived"""
+        try:
+            st = os.stat(self.manifest_file)
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def refresh(self):
+        """Re-read the manifest if another station archived since; returns it"""
+        signature = self.manifest_signature()
+        if signature != self._manifest_signature:
+            try:
+                with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+            except FileNotFoundError:
+                self._manifest = {'version': 1, 'generation': 0, 'partitions': []}
+            self._manifest_signature = signature
+
+            listed = {entry['file'] for entry in self._manifest['partitions']}
+            for cached in (self._indexes, self._cache):
+                for file_name in [name for name in cached if name not in listed]:
+                    del cached[file_name]
+        return self._manifest
+
+    def entries(self, packer_name=None, start_date=None, end_date=None):
+        """Manifest entries that can hold matching orders, oldest period first"""
+        return [
+            entry for entry in self.refresh()['partitions']
+            if (not packer_name or packer_name in entry['packers'])
+            and (not start_date or entry['last'][:10] >= start_date)
+            and (not end_date or entry['first'][:10] <= end_date)
+        ]
+
+    def packer_names(self):
+        """Every packer with archived orders, without loading any segment"""
+        return {name for entry in self.refresh()['partitions'] for name in entry['packers']}
+
+    def _path(self, file_name):
+        return os.path.join(self.archive_dir, file_name)
+
+    def _index(self, entry):
+        """Sorted order keys of a segment, read once per process"""
+        keys = self._indexes.get(entry['file'])
+        if keys is None:
+            keys = array('Q')
+            with open(self._path(entry['index']), 'rb') as f:
+                keys.frombytes(f.read())
+            if sys.byteorder == 'big':
+                keys.byteswap()
+            self._indexes[entry['file']] = keys
+        return keys
+
+    def load(self, entry):
+        """Load a segment (kept in a small LRU cache)"""
+        partition = self._cache.get(entry['file'])
+        if partition is not None:
+            self._cache.move_to_end(entry['file'])
+            return partition
+
+        with open(self._path(entry['file']), 'rb') as f:
+            payload = f.read()
+        if 'crc32' in entry and checksum(payload) != entry['crc32']:
+            raise CorruptDataError(f"Partition segment {entry['file']} does not match its checksum")
+        if entry['file'].endswith('.gz'):
+            payload = gzip.decompress(payload)
+        partition = Partition(entry, json.loads(payload.decode('utf-8')))
+
+        self._cache[entry['file']] = partition
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return partition
+
+    def find(self, order_number):
+        """Locate an archived order; only a segment whose index matches is loaded"""
+        key = order_key(order_number)
+        for entry in reversed(self.refresh()['partitions']):
+            keys = self._index(entry)
+            position = bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                # Confirm against the data, a hash match alone could be a collision
+                found = self.load(entry).order_index.get(order_number)
+                if found:
+                    packer_name, timestamp = found
+                    return {
+                        'packer_name': packer_name,
+                        'order_number': order_number,
+                        'timestamp': timestamp
+                    }
+        return None
+
+    def _write_file(self, path, payload, compress=False):
+        """Write bytes atomically (temporary file, fsync, replace); returns the bytes written"""
+        if compress:
+            payload = gzip.compress(payload)
+        temp_file = tempfile.NamedTemporaryFile(mode='wb', dir=self.archive_dir, delete=False, suffix='.tmp')
+        try:
+            temp_file.write(payload)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+            temp_file.close()
+            os.replace(temp_file.name, path)
+        except Exception:
+            temp_file.close()
+            try:
+                os.unlink(temp_file.name)
+            except OSError:
+                pass
+            raise
+        return payload
+
+    def _stats_signature(self, generation):
+        """Signature tagging the archive rollups and bitmap with the manifest generation"""
+        return ((generation,),)
+
+    def get_statistics(self):
+        """Rollups of every archived order, rebuilt from the segments only if stats.json is stale"""
+        generation = self.refresh()['generation']
+        signature = self._stats_signature(generation)
+        if self.statistics.signature == signature or self.statistics.load(signature):
+            return self.statistics
+
+        self.statistics.rebuild({})
+        for entry in self._manifest['partitions']:
+            for packer_name, orders in self.load(entry).data.items():
+                for order in orders:
+                    self.statistics.add(packer_name, order['timestamp'])
+        if generation:
+            self.statistics.save(signature)
+        return self.statistics
+
+    def get_bitmap(self):
+        """Bitmap of every archived order number, rebuilt from the segments only if orders.bitmap is stale"""
+        generation = self.refresh()['generation']
+        signature = self._stats_signature(generation)
+        if self.bitmap.signature == signature or self.bitmap.load(signature):
+            return self.bitmap
+
+        self.bitmap.rebuild(
+            order_number
+            for entry in self._manifest['partitions']
+            for order_number in self.load(entry).order_index
+        )
+        if generation:
+            self.bitmap.save(signature)
+        return self.bitmap
+
+    def archive(self, periods):
+        """Write {period: {packer: [orders]}} as new segments; returns the new manifest entries
+
+        Segment and index files are written before the manifest, so a crash
+        leaves at worst unreferenced files. The caller must hold the data
+        file lock, which also serialises archiving across stations.
+        """
+        if not periods:
+            return []
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        manifest = self.refresh()
+        statistics = self.get_statistics()
+        bitmap = self.get_bitmap()
+        added = []
+
+        for period in sorted(periods):
+            data = periods[period]
+            sequence = 1 + sum(1 for entry in manifest['partitions'] if entry['period'] == period)
+            stem = f'packer_data_{period}_{sequence}'
+            file_name = f'{stem}.json.gz' if self.compress else f'{stem}.json'
+
+            payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            written = self._write_file(self._path(file_name), payload, compress=self.compress)
+
+            keys = array('Q', sorted(order_key(order['order']) for orders in data.values() for order in orders))
+            if sys.byteorder == 'big':
+                keys.byteswap()
+            self._write_file(self._path(f'{stem}.idx'), keys.tobytes())
+
+            timestamps = [order['timestamp'] for orders in data.values() for order in orders]
+            added.append({
+                'file': file_name,
+                'index': f'{stem}.idx',
+                'period': period,
+                'orders': len(timestamps),
+                'first': min(timestamps),
+                'last': max(timestamps),
+                'packers': {packer_name: len(orders) for packer_name, orders in data.items() if orders},
+                'crc32': checksum(written)
+            })
+            for packer_name, orders in data.items():
+                for order in orders:
+                    statistics.add(packer_name, order['timestamp'])
+                    bitmap.add(order['order'])
+
+        manifest = dict(manifest, partitions=manifest['partitions'] + added, generation=manifest['generation'] + 1)
+        self._write_file(self.manifest_file, json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8'))
+        self.refresh()
+        statistics.save(self._stats_signature(manifest['generation']))
+        bitmap.save(self._stats_signature(manifest['generation']))
+        return added
+
+    def verify(self):
+        """Problems found in the archived segments, as a list of messages (empty if all are intact)"""
+        problems = []
+        for entry in self.refresh()['partitions']:
+            try:
+                with open(self._path(entry['file']), 'rb') as f:
+                    payload = f.read()
+                if 'crc32' in entry and checksum(payload) != entry['crc32']:
+                    problems.append(f"Partition segment {entry['file']} does not match its checksum")
+                if not os.path.exists(self._path(entry['index'])):
+                    problems.append(f"Partition index {entry['index']} is missing")
+            except OSError as e:
+                problems.append(f"Partition segment {entry['file']} cannot be read: {e}")
+        return problems
@@ -0,0 +1,643 @@
+import os
+import sys
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path so this also runs as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import DuplicateOrderError, SORT_FIELDS, encode_cursor, decode_cursor
+from models.maintenance import MaintenanceWorker
+from models.order_feed import OrderFeed
+from models.instrumentation import metrics as instrumentation, timed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    packer_name TEXT NOT NULL,
+    order_number TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_order_number ON orders (order_number);
+CREATE INDEX IF NOT EXISTS idx_orders_packer ON orders (packer_name, timestamp);
+CREATE INDEX IF NOT EXISTS idx_orders_timestamp ON orders (timestamp, order_number);
+
+CREATE TABLE IF NOT EXISTS packer_stats (
+    packer_name TEXT PRIMARY KEY,
+    total_orders INTEGER NOT NULL,
+    first_scan TEXT NOT NULL,
+    last_scan TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hourly_counts (
+    packer_name TEXT NOT NULL,
+    hour TEXT NOT NULL,
+    orders INTEGER NOT NULL,
+    PRIMARY KEY (packer_name, hour)
+);
+
+-- Rollups stay current on every insert, so statistics never scan orders
+CREATE TRIGGER IF NOT EXISTS orders_rollup AFTER INSERT ON orders BEGIN
+    INSERT INTO packer_stats (packer_name, total_orders, first_scan, last_scan)
+    VALUES (NEW.packer_name, 1, NEW.timestamp, NEW.timestamp)
+    ON CONFLICT (packer_name) DO UPDATE SET
+        total_orders = total_orders + 1,
+        first_scan = min(first_scan, excluded.first_scan),
+        last_scan = max(last_scan, excluded.last_scan);
+    INSERT INTO hourly_counts (packer_name, hour, orders)
+    VALUES (NEW.packer_name, substr(NEW.timestamp, 1, 13), 1)
+    ON CONFLICT (packer_name, hour) DO UPDATE SET orders = orders + 1;
+END;
+"""
+
+class SQLitePackerDatabase:
+    """SQLite storage engine with the same public interface as PackerDatabase
+
+    Duplicate prevention is a unique index on order number rather than a
+    scan. The default rollback journal ('delete') is safe on a network
+    share. journal_mode='wal' lets readers proceed while a station writes,
+    but it needs shared memory on one host, so only ask for it when the
+    file is on local disk behind a central server.
+    """
+
+    JOURNAL_MODES = ('delete', 'truncate', 'persist', 'wal')
+
+    def __init__(self, data_file='packer_data.db', journal_mode='delete', busy_timeout_ms=10000):
+        journal_mode = journal_mode.lower()
+        if journal_mode not in self.JOURNAL_MODES:
+            raise ValueError(f"Unsupported SQLite journal mode '{journal_mode}', use one of: {', '.join(self.JOURNAL_MODES)}")
+        self.data_file = data_file
+        self.journal_mode = journal_mode
+        self.busy_timeout_ms = busy_timeout_ms
+        self.lock = threading.RLock()  # Guards backup bookkeeping
+        self._local = threading.local()  # One connection per thread
+        self.backup_config = {
+            'backup_every_orders': 50,  # Backup every 50 orders
+            'backup_every_hours': 4,    # Backup every 4 hours
+            'max_backups': 10       # Keep last 10 backups
+        }
+        self.order_count = 0
+        self.last_backup_time = None
+        self.maintenance = MaintenanceWorker(self)
+        self.ensure_data_file()
+        self._load_backup_state()
+        self.feed = OrderFeed(poll=self._poll_feed)  # New orders for live dashboards
+        self._feed_lock = threading.Lock()
+        self._feed_last_id = self._connection().execute("SELECT COALESCE(MAX(id), 0) FROM orders").fetchone()[0]
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.data_file, timeout=self.busy_timeout_ms / 1000)
+            conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            conn.execute("PRAGMA synchronous=FULL" if self.journal_mode != 'wal' else "PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+        return conn
+
+    def ensure_data_file(self):
+        """Create the database schema if needed"""
+        conn = self._connection()
+        with conn:
+            conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _load_backup_state(self):
+        """Load backup state from file if exists"""
+        backup_state_file = f"{self.data_file}.backup_state"
+        try:
+            if os.path.exists(backup_state_file):
+                with open(backup_state_file, 'r') as f:
+                    state = json.load(f)
+                    self.order_count = state.get('order_count', 0)
+                    last_backup = state.get('last_backup_time')
+                    if last_backup:
+                        self.last_backup_time = datetime.fromisoformat(last_backup)
+        except Exception:
+            # If backup state file is corrupted, start fresh
+            self.order_count = 0
+            self.last_backup_time = None
+
+    def _save_backup_state(self):
+        """Save backup state to file"""
+        backup_state_file = f"{self.data_file}.backup_state"
+        state = {
+            'order_count': self.order_count,
+            'last_backup_time': self.last_backup_time.isoformat() if self.last_backup_time else None
+        }
+        try:
+            with open(backup_state_file, 'w') as f:
+                json.dump(state, f)
+        except Exception as e:
+            print(f"Warning: Could not save backup state: {e}")
+
+    def _should_create_backup(self):
+        """Check if backup should be created based on config"""
+        if self.order_count >= self.backup_config['backup_every_orders']:
+            return True
+        if self.last_backup_time:
+            return datetime.now() - self.last_backup_time >= timedelta(hours=self.backup_config['backup_every_hours'])
+        return False
+
+    @timed('packer_backup_seconds')
+    def _create_backup(self):
+        """Create a consistent backup with SQLite's online backup API"""
+        try:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            backup_dir = 'backups'
+            if not os.path.exists(backup_dir):
+                os.makedirs(backup_dir)
+
+            backup_file = os.path.join(backup_dir, f'packer_data_backup_{timestamp}.db')
+            target = sqlite3.connect(backup_file)
+            try:
+                self._connection().backup(target)
+            finally:
+                target.close()
+
+            self.order_count = 0
+            self.last_backup_time = datetime.now()
+            self._save_backup_state()
+            self._cleanup_old_backups()
+
+            if instrumentation.enabled:
+                instrumentation.count('packer_storage_bytes_written_total', os.path.getsize(backup_file), kind='backup')
+            print(f"✅ Backup created: {backup_file}")
+        except Exception as e:
+            print(f"❌ Backup failed: {e}")
+
+    def _cleanup_old_backups(self):
+        """Keep only the most recent database backups"""
+        backup_dir = 'backups'
+        try:
+            backup_files = sorted(
+                (os.path.join(backup_dir, name) for name in os.listdir(backup_dir)
+                 if name.startswith('packer_data_backup_') and name.endswith('.db')),
+                key=os.path.getmtime,
+                reverse=True
+            )
+            for file_path in backup_files[self.backup_config['max_backups']:]:
+                try:
+                    os.remove(file_path)
+                    print(f"🗑️ Removed old backup: {file_path}")
+                except Exception as e:
+                    print(f"Warning: Could not remove old backup {file_path}: {e}")
+        except Exception as e:
+            print(f"Warning: Could not cleanup old backups: {e}")
+
+    def save_packer_data(self, packer_name, order_number):
+        """Insert one order; the unique index rejects duplicates from any station"""
+        timestamp = datetime.now().isoformat()
+        result = self.save_orders([(packer_name, order_number, timestamp)])[0]
+        if result['status'] == 'duplicate':
+            raise DuplicateOrderError(result['existing'])
+        return result
+
+    @timed('packer_storage_commit_seconds')
+    def save_orders(self, entries):
+        """Insert a batch of (packer, order, timestamp) entries in one transaction
+
+        Returns one result per entry with status 'recorded' or 'duplicate'
+        (plus the existing record), like PackerDatabase.save_orders.
+        """
+        results = []
+        recorded = 0
+        conn = self._connection()
+        with conn:
+            for packer_name, order_number, timestamp in entries:
+                result = {
+                    'packer_name': packer_name,
+                    'order_number': order_number,
+                    'timestamp': timestamp
+                }
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO orders (packer_name, order_number, timestamp) VALUES (?, ?, ?)",
+                    (packer_name, order_number, timestamp)
+                )
+                if cursor.rowcount == 1:
+                    result['status'] = 'recorded'
+                    recorded += 1
+                else:
+                    result['status'] = 'duplicate'
+                    result['existing'] = self.find_packer_by_order(order_number)
+                results.append(result)
+
+        instrumentation.count('packer_orders_committed_total', recorded)
+        if recorded:
+            self._poll_feed()
+
+        # Backup bookkeeping happens off the request path when the worker runs
+        if recorded:
+            if self.maintenance.running:
+                self.maintenance.order_recorded(recorded)
+            else:
+                self.perform_maintenance(recorded)
+
+        return results
+
+    def perform_maintenance(self, new_orders=0, save_state=True):
+        """Count recorded orders and create a backup when one is due"""
+        with self.lock:
+            self.order_count += new_orders
+            if self._should_create_backup():
+                self._create_backup()
+            elif save_state:
+                self._save_backup_state()
+
+    def start_maintenance(self):
+        """Move backup scheduling and state persistence to a background thread"""
+        self.maintenance.start()
+
+    def shutdown(self, timeout=10.0):
+        """Let the maintenance worker finish, then close this thread's connection"""
+        self.feed.close()
+        stopped = self.maintenance.shutdown(timeout)
+        self.close()
+        return stopped
+
+    @staticmethod
+    def _row(row):
+        """Convert a (packer, order, timestamp) row to the public dict format"""
+        return {
+            'packer_name': row[0],
+            'order_number': row[1],
+            'timestamp': row[2]
+        }
+
+    def load_packer_data(self):
+        """Load all orders in flat format"""
+        rows = self._connection().execute(
+            "SELECT packer_name, order_number, timestamp FROM orders ORDER BY id"
+        )
+        return [self._row(row) for row in rows]
+
+    def find_packer_by_order(self, order_number, refresh=True, wait=True):
+        """Find packer by order number (unique index lookup; always current, refresh and wait are ignored)"""
+        row = self._connection().execute(
+            "SELECT packer_name, order_number, timestamp FROM orders WHERE order_number = ?",
+            (order_number,)
+        ).fetchone()
+        return self._row(row) if row else None
+
+    def order_exists(self, order_number):
+        """Check if order number already exists"""
+        return self.find_packer_by_order(order_number) is not None
+
+    def get_all_orders(self):
+        """Get all orders with packer information in flat format"""
+        return self.load_packer_data()
+
+    def get_orders_by_packer(self, packer_name):
+        """Get all orders for a specific packer"""
+        rows = self._connection().execute(
+            "SELECT packer_name, order_number, timestamp FROM orders WHERE packer_name = ? ORDER BY id",
+            (packer_name,)
+        )
+        return [self._row(row) for row in rows]
+
+    def get_recent_orders(self, limit=10):
+        """Get recent orders (most recent first)"""
+        rows = self._connection().execute(
+            "SELECT packer_name, order_number, timestamp FROM orders "
+            "ORDER BY timestamp DESC, order_number DESC LIMIT ?",
+            (limit,)
+        )
+        return [self._row(row) for row in rows]
+
+    def get_orders_between(self, start_date=None, end_date=None):
+        """Get orders in an inclusive 'YYYY-MM-DD' date range (oldest first)"""
+        where, params = self._filters(None, None, start_date, end_date)
+        rows = self._connection().execute(
+            f"SELECT packer_name, order_number, timestamp FROM orders {where} "
+            "ORDER BY timestamp, order_number",
+            params
+        )
+        return [self._row(row) for row in rows]
+
+    def iter_orders(self, packer_name=None, start_date=None, end_date=None, chunk_size=1000):
+        """Yield orders oldest first; same contract as PackerDatabase.iter_orders
+
+        Each chunk is a separate keyset query, so no read transaction stays
+        open while the caller is streaming.
+        """
+        where, params = self._filters(None, packer_name, start_date, end_date)
+        last_key = None
+        while True:
+            chunk_where, chunk_params = where, list(params)
+            if last_key:
+                keyset = "(timestamp, order_number) > (?, ?)"
+                chunk_where = f"{where} AND {keyset}" if where else f"WHERE {keyset}"
+                chunk_params += list(last_key)
+            rows = self._connection().execute(
+                f"SELECT packer_name, order_number, timestamp FROM orders {chunk_where} "
+                "ORDER BY timestamp, order_number LIMIT ?",
+                chunk_params + [chunk_size]
+            ).fetchall()
+
+            if not rows:
+                return
+            last_key = (rows[-1][2], rows[-1][1])
+
+            for row in rows:
+                yield self._row(row)
+
+    @staticmethod
+    def _filters(search, packer_name, start_date, end_date):
+        """WHERE clause and parameters shared by the query methods"""
+        clauses, params = [], []
+        if search:
+            clauses.append("instr(lower(order_number), ?) > 0")
+            params.append(search.lower())
+        if packer_name:
+            clauses.append("packer_name = ?")
+            params.append(packer_name)
+        if start_date:
+            clauses.append("timestamp >= ?")
+            params.append(start_date)
+        if end_date:
+            # Every timestamp on end_date sorts below end_date + U+FFFF
+            clauses.append("timestamp < ?")
+            params.append(end_date + '\uffff')
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return where, params
+
+    def query_orders(self, search=None, packer_name=None, start_date=None, end_date=None,
+                     sort='timestamp', descending=True, limit=50, offset=0, cursor=None):
+        """Filter, sort and paginate orders; same contract as PackerDatabase.query_orders"""
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field '{sort}', expected one of {SORT_FIELDS}")
+
+        column = {'timestamp': 'timestamp', 'order_number': 'order_number', 'packer_name': 'packer_name'}[sort]
+        direction = 'DESC' if descending else 'ASC'
+        where, params = self._filters(search, packer_name, start_date, end_date)
+        conn = self._connection()
+
+        total = conn.execute(f"SELECT COUNT(*) FROM orders {where}", params).fetchone()[0]
+
+        page_where, page_params = where, list(params)
+        if cursor:
+            # Keyset pagination: continue strictly after the last row's sort key
+            value, order_number = decode_cursor(cursor)
+            comparison = '<' if descending else '>'
+            keyset = f"({column}, order_number) {comparison} (?, ?)"
+            page_where = f"{where} AND {keyset}" if where else f"WHERE {keyset}"
+            page_params += [value, order_number]
+            offset = 0
+
+        rows = conn.execute(
+            f"SELECT packer_name, order_number, timestamp FROM orders {page_where} "
+            f"ORDER BY {column} {direction}, order_number {direction} LIMIT ? OFFSET ?",
+            page_params + [limit + 1, offset]
+        ).fetchall()
+
+        has_more = len(rows) > limit
+        orders = [self._row(row) for row in rows[:limit]]
+
+        next_cursor = None
+        if orders and has_more:
+            last = orders[-1]
+            next_cursor = encode_cursor([last[sort], last['order_number']])
+
+        return {
+            'orders': orders,
+            'total': total,
+            'next_cursor': next_cursor
+        }
+
+    @timed('packer_storage_commit_seconds')
+    def import_orders(self, entries):
+        """Insert an iterable of validated (packer, order, timestamp) entries in one transaction
+
+        Returns the results for entries skipped as duplicates.
+        """
+        duplicates = []
+        recorded = 0
+        conn = self._connection()
+        with conn:
+            for packer_name, order_number, timestamp in entries:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO orders (packer_name, order_number, timestamp) VALUES (?, ?, ?)",
+                    (packer_name, order_number, timestamp)
+                )
+                if cursor.rowcount == 1:
+                    recorded += 1
+                else:
+                    duplicates.append({
+                        'packer_name': packer_name,
+                        'order_number': order_number,
+                        'timestamp': timestamp,
+                        'status': 'duplicate',
+                        'existing': self.find_packer_by_order(order_number)
+                    })
+
+        instrumentation.count('packer_orders_committed_total', recorded)
+        if recorded:
+            self._poll_feed()
+
+        if recorded:
+            if self.maintenance.running:
+                self.maintenance.order_recorded(recorded)
+            else:
+                self.perform_maintenance(recorded)
+
+        return duplicates
+
+    def _poll_feed(self):
+        """Publish orders inserted since the last poll, by this or any other station, with updated counts"""
+        with self._feed_lock:
+            conn = self._connection()
+            rows = conn.execute(
+                "SELECT id, packer_name, order_number, timestamp FROM orders WHERE id > ? ORDER BY id",
+                (self._feed_last_id,)
+            ).fetchall()
+            if not rows:
+                return
+            self._feed_last_id = rows[-1][0]
+
+            today = datetime.now().isoformat()[:10]
+            counts = {}
+            for packer_name in {row[1] for row in rows}:
+                total = conn.execute(
+                    "SELECT total_orders FROM packer_stats WHERE packer_name = ?", (packer_name,)
+                ).fetchone()
+                today_orders = conn.execute(
+                    "SELECT COALESCE(SUM(orders), 0) FROM hourly_counts WHERE packer_name = ? AND hour >= ? AND hour <= ?",
+                    (packer_name, f'{today}T00', f'{today}T23')
+                ).fetchone()[0]
+                counts[packer_name] = {'total_orders': total[0] if total else 0, 'today': today_orders}
+
+            self.feed.publish([
+                {
+                    'packer_name': packer_name,
+                    'order_number': order_number,
+                    'timestamp': timestamp,
+                    'counts': counts[packer_name]
+                }
+                for _, packer_name, order_number, timestamp in rows
+            ])
+
+    def get_packer_names(self):
+        """Get a sorted list of all packer names"""
+        rows = self._connection().execute("SELECT packer_name FROM packer_stats ORDER BY packer_name")
+        return [row[0] for row in rows]
+
+    def get_statistics_summary(self, days=7, windows=(1, 8, 24)):
+        """Per-packer totals, first/last scan, daily counts and orders per hour"""
+        now = datetime.now()
+        hour_keys = [(now - timedelta(hours=i)).isoformat()[:13] for i in range(max(windows))]
+        day_keys = [(now - timedelta(days=i)).isoformat()[:10] for i in range(days)]
+        conn = self._connection()
+
+        packers = {}
+        for packer_name, total, first_scan, last_scan in conn.execute(
+            "SELECT packer_name, total_orders, first_scan, last_scan FROM packer_stats"
+        ):
+            packers[packer_name] = {
+                'total_orders': total,
+                'first_scan': first_scan,
+                'last_scan': last_scan,
+                'hours': {},
+                'days': {}
+            }
+
+        oldest_hour = min(hour_keys[-1], day_keys[-1] + 'T00')
+        for packer_name, hour, orders in conn.execute(
+            "SELECT packer_name, hour, orders FROM hourly_counts WHERE hour >= ?", (oldest_hour,)
+        ):
+            stats = packers[packer_name]
+            stats['hours'][hour] = orders
+            stats['days'][hour[:10]] = stats['days'].get(hour[:10], 0) + orders
+
+        summary = {}
+        for packer_name, stats in packers.items():
+            hourly = [stats['hours'].get(key, 0) for key in hour_keys]
+            summary[packer_name] = {
+                'total_orders': stats['total_orders'],
+                'first_scan': stats['first_scan'],
+                'last_scan': stats['last_scan'],
+                'today': stats['days'].get(day_keys[0], 0) if day_keys else 0,
+                'orders_per_hour': {
+                    f'{window}h': round(sum(hourly[:window]) / window, 2)
+                    for window in windows
+                },
+                'by_day': {key: stats['days'].get(key, 0) for key in reversed(day_keys)}
+            }
+
+        return {
+            'generated_at': now.isoformat(),
+            'total_orders': sum(stats['total_orders'] for stats in summary.values()),
+            'packers': summary
+        }
+
+    def get_packer_statistics(self):
+        """Get statistics for all packers"""
+        stats = {}
+        for order in self.load_packer_data():
+            packer = stats.setdefault(order['packer_name'], {'total_orders': 0, 'orders': []})
+            packer['total_orders'] += 1
+            packer['orders'].append({'order': order['order_number'], 'timestamp': order['timestamp']})
+        return stats
+
+    def get_lock_metrics(self):
+        """SQLite handles locking itself; nothing to report"""
+        return {}
+
+    def verify(self):
+        """Full integrity check (PRAGMA quick_check); returns a list of problems, empty if intact"""
+        try:
+            rows = self._connection().execute("PRAGMA quick_check").fetchall()
+        except sqlite3.DatabaseError as e:
+            return [f"{self.data_file} cannot be read: {e}"]
+        return [f"{self.data_file}: {row[0]}" for row in rows if row[0] != 'ok']
+
+    def repair(self):
+        """SQLite recovers from crashes itself; damage needs a restore from backups/"""
+        return self.verify()
+
+    def _import_rows(self, rows):
+        """Insert (packer, order, timestamp) rows in one transaction, skipping duplicates"""
+        conn = self._connection()
+        count = "SELECT COUNT(*) FROM orders"
+        with conn:
+            before = conn.execute(count).fetchone()[0]
+            conn.executemany(
+                "INSERT OR IGNORE INTO orders (packer_name, order_number, timestamp) VALUES (?, ?, ?)",
+                rows
+            )
+            # total_changes would also count the rollup trigger's writes
+            return conn.execute(count).fetchone()[0] - before
+
+    def import_from_json(self, json_file='packer_data.json'):
+        """One-shot import of a packer_data.json file; returns the number of orders added"""
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        # Insert in time order so row IDs follow recording order
+        rows = sorted(
+            ((packer_name, order['order'], order['timestamp'])
+             for packer_name, orders in data.items() for order in orders),
+            key=lambda row: row[2]
+        )
+        return self._import_rows(rows)
+
+    def migrate_from_json(self, json_file='packer_data.json'):
+        """Migrate data from packer_data.json into the SQLite database"""
+        if not os.path.exists(json_file):
+            return False
+
+        try:
+            added = self.import_from_json(json_file)
+            print(f"📥 Imported {added} orders from {json_file}")
+
+            # Backup old file
+            os.rename(json_file, f"{json_file}.backup")
+            return True
+        except Exception as e:
+            print(f"Migration failed: {e}")
+            return False
+
+    def migrate_from_txt(self, txt_file='packer_data.txt'):
+        """Migrate data from the old packer|order|timestamp text format"""
+        if not os.path.exists(txt_file):
+            return False
+
+        try:
+            rows = []
+            with open(txt_file, 'r') as f:
+                for line in f:
+                    parts = line.strip().split('|')
+                    if len(parts) >= 3:
+                        rows.append((parts[0], parts[1], parts[2]))
+
+            added = self._import_rows(rows)
+            print(f"📥 Imported {added} orders from {txt_file}")
+
+            # Backup old file
+            os.rename(txt_file, f"{txt_file}.backup")
+            return True
+        except Exception as e:
+            print(f"Migration failed: {e}")
+            return False
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Import packer data into a SQLite database')
+    parser.add_argument('source', help='packer_data.json or packer_data.txt file')
+    parser.add_argument('database', nargs='?', default='packer_data.db')
+    args = parser.parse_args()
+
+    db = SQLitePackerDatabase(args.database)
+    if args.source.endswith('.txt'):
+        ok = db.migrate_from_txt(args.source)
+    else:
+        ok = db.migrate_from_json(args.source)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,128 @@
+import os
+import copy
+import json
+import tempfile
+from datetime import datetime, timedelta
+
+class PackerStatistics:
+    """Per-packer rollups (counts per hour/day, first/last scan) kept up to date on append"""
+
+    def __init__(self, stats_file, hourly_retention_days=31):
+        self.stats_file = stats_file
+        self.hourly_retention_days = hourly_retention_days
+        self.packers = {}
+        self.signature = None  # Data file signature these rollups describe
+        self.dirty = 0         # Appends since the rollups were last persisted
+
+    def rebuild(self, data, base=None):
+        """Recompute every rollup from {packer: [orders]} data, on top of base rollups if given"""
+        self.packers = copy.deepcopy(base.packers) if base else {}
+        for packer_name, orders in data.items():
+            for order in orders:
+                self.add(packer_name, order['timestamp'])
+        self.dirty = 0
+
+    def add(self, packer_name, timestamp):
+        """Count one order; O(1)"""
+        stats = self.packers.get(packer_name)
+        if stats is None:
+            stats = self.packers[packer_name] = {
+                'total_orders': 0,
+                'first_scan': timestamp,
+                'last_scan': timestamp,
+                'by_day': {},
+                'by_hour': {}
+            }
+
+        stats['total_orders'] += 1
+        if timestamp < stats['first_scan']:
+            stats['first_scan'] = timestamp
+        if timestamp > stats['last_scan']:
+            stats['last_scan'] = timestamp
+
+        day, hour = timestamp[:10], timestamp[:13]
+        stats['by_day'][day] = stats['by_day'].get(day, 0) + 1
+        stats['by_hour'][hour] = stats['by_hour'].get(hour, 0) + 1
+        self.dirty += 1
+
+    def load(self, signature):
+        """Load persisted rollups if they describe the given data signature"""
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+        stored = state.get('signature')
+        if stored is None or [tuple(part) if part else None for part in stored] != list(signature):
+            return False
+
+        self.packers = state.get('packers', {})
+        self.signature = signature
+        self.dirty = 0
+        return True
+
+    def save(self, signature):
+        """Persist the rollups next to the data file"""
+        self._prune_hours()
+        state = {
+            'signature': signature,
+            'packers': self.packers
+        }
+
+        temp_file = tempfile.NamedTemporaryFile(
+            mode='w',
+            dir=os.path.dirname(self.stats_file),
+            delete=False,
+            suffix='.tmp',
+            encoding='utf-8'
+        )
+        try:
+            json.dump(state, temp_file, ensure_ascii=False, separators=(',', ':'))
+            temp_file.close()
+            os.replace(temp_file.name, self.stats_file)
+            self.signature = signature
+            self.dirty = 0
+        except Exception as e:
+            temp_file.close()
+            try:
+                os.unlink(temp_file.name)
+            except OSError:
+                pass
+            print(f"Warning: Could not save statistics: {e}")
+
+    def _prune_hours(self):
+        """Drop hourly buckets older than the retention window; daily counts are kept"""
+        cutoff = (datetime.now() - timedelta(days=self.hourly_retention_days)).isoformat()[:13]
+        for stats in self.packers.values():
+            by_hour = stats['by_hour']
+            for hour in [hour for hour in by_hour if hour < cutoff]:
+                del by_hour[hour]
+
+    def summary(self, now=None, windows=(1, 8, 24), days=7):
+        """Aggregates for dashboards in O(packers * (windows + days))"""
+        now = now or datetime.now()
+        hour_keys = [(now - timedelta(hours=i)).isoformat()[:13] for i in range(max(windows))]
+        day_keys = [(now - timedelta(days=i)).isoformat()[:10] for i in range(days)]
+
+        packers = {}
+        for packer_name, stats in self.packers.items():
+            by_hour = stats['by_hour']
+            hourly = [by_hour.get(key, 0) for key in hour_keys]
+            packers[packer_name] = {
+                'total_orders': stats['total_orders'],
+                'first_scan': stats['first_scan'],
+                'last_scan': stats['last_scan'],
+                'today': stats['by_day'].get(day_keys[0], 0) if day_keys else 0,
+                'orders_per_hour': {
+                    f'{window}h': round(sum(hourly[:window]) / window, 2)
+                    for window in windows
+                },
+                'by_day': {key: stats['by_day'].get(key, 0) for key in reversed(day_keys)}
+            }
+
+        return {
+            'generated_at': now.isoformat(),
+            'total_orders': sum(stats['total_orders'] for stats in self.packers.values()),
+            'packers': packers
+        }
@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from models.database import DuplicateOrderError
+from models.instrumentation import metrics as instrumentation
+
+class SubmitSpool:
+    """Local write-ahead spool that decouples scan acknowledgement from shared storage
+
+    submit() only appends the scan to a spool file on the station's own
+    disk and fsyncs it; a background thread writes pending scans to the
+    shared data file with db.save_orders(), retrying with exponential
+    backoff while the share is slow or unreachable. Every scan carries an
+    idempotency key, so a browser or scanner retrying the same submission
+    gets the existing entry back instead of a second write, and a flush
+    interrupted by a crash is retried safely: an order already stored with
+    the same packer and timestamp counts as recorded.
+
+    Each spool line is the full state of one entry; the last line for a key
+    wins. The file is rewritten with only the retained entries once it
+    holds more than twice that many lines.
+    """
+
+    def __init__(self, db, spool_file, retry_initial=1.0, retry_max=30.0, max_batch=100, keep_settled=500):
+        self.db = db
+        self.spool_file = spool_file
+        self.retry_initial = retry_initial  # Seconds before the first retry; doubles per failed attempt
+        self.retry_max = retry_max
+        self.max_batch = max_batch          # Most scans written to shared storage by one flush
+        self.keep_settled = keep_settled    # Recorded/failed entries remembered for retries and the status view
+        self.condition = threading.Condition()
+        self.entries = OrderedDict()        # Idempotency key -> entry, oldest first
+        self.thread = None
+        self.stopping = False
+        self.attempts = 0                   # Consecutive failed flushes
+        self.last_error = None
+        self.retry_at = 0.0                 # time.monotonic() before which no flush is attempted
+        self._lines = 0
+        self._load()
+
+    def _load(self):
+        """Rebuild entries from the spool file; damaged lines (a crash mid-append) are skipped"""
+        try:
+            with open(self.spool_file, 'rb') as f:
+                lines = f.read().split(b'\n')
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line.decode('utf-8'))
+                self.entries[entry['key']] = entry
+                self.entries.move_to_end(entry['key'])
+            except (UnicodeDecodeError, ValueError, KeyError, TypeError):
+                continue
+            self._lines += 1
+
+        pending = sum(1 for entry in self.entries.values() if entry['status'] == 'pending')
+        if pending:
+            print(f"📮 {pending} scans from the last run are waiting for shared storage")
+
+    def _append(self, entries):
+        """Append entry states to the spool file and fsync; caller holds the condition"""
+        payload = ''.join(
+            json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for entry in entries
+        ).encode('utf-8')
+        directory = os.path.dirname(self.spool_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.spool_file, 'ab') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())  # The scan is acknowledged only once it is on local disk
+        self._lines += len(entries)
+
+    def _rewrite(self):
+        """Replace the spool file with the current entries; caller holds the condition"""
+        temp_file = tempfile.NamedTemporaryFile(
+            mode='w',
+            dir=os.path.dirname(self.spool_file) or '.',
+            delete=False,
+            suffix='.tmp',
+            encoding='utf-8'
+        )
+        try:
+            for entry in self.entries.values():
+                temp_file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+            temp_file.close()
+            os.replace(temp_file.name, self.spool_file)
+            self._lines = len(self.entries)
+        except OSError as e:
+            temp_file.close()
+            try:
+                os.unlink(temp_file.name)
+            except OSError:
+                pass
+            print(f"Warning: Could not compact the submit spool: {e}")
+
+    def submit(self, packer_name, order_number, key=None):
+        """Durably queue a scan; returns (entry, created)
+
+        created is False when key was already submitted, in which case the
+        existing entry is returned unchanged. Raises DuplicateOrderError if
+        the order is already waiting under another key or is already
+        recorded as far as this station knows; duplicates recorded
+        elsewhere since are reported once the flush reaches them.
+        """
+        key = key or f"{packer_name}:{order_number}"
+        with self.condition:
+            existing = self.entries.get(key)
+            if existing:
+                return dict(existing), False
+
+            for entry in self.entries.values():
+                if entry['order_number'] == order_number and entry['status'] != 'failed':
+                    raise DuplicateOrderError(entry)
+
+            # Orders already known to this station are rejected now rather than
+            # after the flush; the resident view is used as is, never re-read
+            existing = self.db.find_packer_by_order(order_number, refresh=False, wait=False)
+            if existing:
+                raise DuplicateOrderError(existing)
+
+            entry = {
+                'key': key,
+                'packer_name': packer_name,
+                'order_number': order_number,
+                'timestamp': datetime.now().isoformat(),
+                'status': 'pending',
+                'attempts': 0,
+                'error': None
+            }
+            self._append([entry])
+            self.entries[key] = entry
+            self.condition.notify_all()
+        instrumentation.count('packer_spool_submitted_total')
+        return dict(entry), True
+
+    def get(self, key):
+        """Entry for an idempotency key, or None"""
+        with self.condition:
+            entry = self.entries.get(key)
+            return dict(entry) if entry else None
+
+    def status(self):
+        """Pending and failed submissions plus flush state, for the status view"""
+        with self.condition:
+            pending = [dict(entry) for entry in self.entries.values() if entry['status'] == 'pending']
+            failed = [dict(entry) for entry in self.entries.values() if entry['status'] == 'failed']
+            recorded = sum(1 for entry in self.entries.values() if entry['status'] == 'recorded')
+            retry_in = max(0.0, self.retry_at - time.monotonic()) if pending else 0.0
+            return {
+                'enabled': True,
+                'pending': pending,
+                'failed': failed,
+                'recorded': recorded,
+                'last_error': self.last_error,
+                'retry_in_seconds': round(retry_in, 1)
+            }
+
+    def start(self):
+        """Start the flush thread (idempotent)"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stopping = False
+        self.thread = threading.Thread(target=self._run, name='packer-submit-spool', daemon=True)
+        self.thread.start()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def shutdown(self, timeout=10.0):
+        """Make a last flush attempt and stop; returns True if nothing is left pending"""
+        if self.running:
+            with self.condition:
+                self.stopping = True
+                self.retry_at = 0.0
+                self.condition.notify_all()
+            self.thread.join(timeout)
+        with self.condition:
+            return not any(entry['status'] == 'pending' for entry in self.entries.values())
+
+    def _next_batch(self):
+        """Wait until pending scans may be flushed; returns them, or None once stopping"""
+        with self.condition:
+            while True:
+                batch = [entry for entry in self.entries.values() if entry['status'] == 'pending'][:self.max_batch]
+                wait = self.retry_at - time.monotonic()
+                if batch and wait <= 0:
+                    return [dict(entry) for entry in batch]
+                if self.stopping:
+                    return None
+                self.condition.wait(wait if batch else None)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                results = self.db.save_orders([
+                    (entry['packer_name'], entry['order_number'], entry['timestamp'])
+                    for entry in batch
+                ])
+            except Exception as e:
+                # Shared storage busy or unreachable: keep the scans and retry later
+                self._flush_failed(batch, e)
+                if self.stopping:
+                    return
+                continue
+            self._flush_succeeded(batch, results)
+
+    def _flush_failed(self, batch, error):
+        with self.condition:
+            self.attempts += 1
+            self.last_error = str(error)
+            delay = min(self.retry_max, self.retry_initial * 2 ** (self.attempts - 1))
+            self.retry_at = time.monotonic() + delay
+            for queued in batch:
+                entry = self.entries[queued['key']]
+                entry['attempts'] += 1
+                entry['error'] = self.last_error
+        instrumentation.count('packer_spool_retries_total')
+        print(f"⚠️ Could not write {len(batch)} queued scans to shared storage, retrying in {delay:g}s: {error}")
+
+    def _flush_succeeded(self, batch, results):
+        settled = []
+        with self.condition:
+            self.attempts = 0
+            self.last_error = None
+            self.retry_at = 0.0
+            for queued, result in zip(batch, results):
+                entry = self.entries[queued['key']]
+                entry['attempts'] += 1
+                existing = result.get('existing') or {}
+                if result['status'] == 'recorded' or (
+                    existing.get('packer_name') == entry['packer_name']
+                    and existing.get('timestamp') == entry['timestamp']
+                ):
+                    # Stored by an earlier flush whose completion was never spooled
+                    entry['status'] = 'recorded'
+                    entry['error'] = None
+                else:
+                    entry['status'] = 'failed'
+                    entry['error'] = f"Order number {entry['order_number']} has already been recorded by {existing.get('packer_name')}"
+                settled.append(entry)
+
+            try:
+                self._append(settled)
+            except OSError as e:
+                # Harmless: a retry after restart finds the orders already stored
+                print(f"Warning: Could not update the submit spool: {e}")
+            self._prune()
+        instrumentation.count('packer_spool_flushed_total', len(settled))
+
+    def _prune(self):
+        """Forget the oldest settled entries beyond keep_settled; caller holds the condition"""
+        settled = [key for key, entry in self.entries.items() if entry['status'] != 'pending']
+        for key in settled[:max(0, len(settled) - self.keep_settled)]:
+            del self.entries[key]
+        if self._lines > 2 * max(self.keep_settled, len(self.entries)):
+            self._rewrite()
@@ -0,0 +1,72 @@
+"""
+Production serving for one central Packer Tracker instance shared by every station
+"""
+
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+
+try:
+    import waitress  # Optional: pip install waitress
+except ImportError:
+    waitress = None
+
+SERVER_DEFAULTS = {
+    'host': '0.0.0.0',   # Listen on every interface so stations can connect
+    'port': 5000,
+    'threads': 8,        # Request worker threads (waitress)
+    'keep_alive': 15.0   # Seconds an idle keep-alive connection stays open
+}
+
+class _DrainingWSGIServer(ThreadedWSGIServer):
+    """Werkzeug's thread-per-connection server, joining request threads on close"""
+
+    daemon_threads = False  # server_close() waits for requests in progress
+    on_stop = None          # Called once before that wait, to end never-ending responses
+
+    def server_close(self):
+        on_stop, self.on_stop = self.on_stop, None
+        if on_stop:
+            on_stop()
+        super().server_close()
+
+def serve_production(app, host=None, port=None, threads=None, keep_alive=None, on_stop=None):
+    """Serve app until interrupted, then let requests in progress finish
+
+    Uses waitress when it is installed (fixed worker pool, idle keep-alive
+    connections cost no thread) and falls back to Werkzeug's threaded
+    server otherwise. on_stop runs once serving stops, before waiting for
+    requests in progress, to end responses that would otherwise stream
+    forever. Returns once the server has stopped; background work is
+    flushed by the caller's shutdown hooks.
+    """
+    host = host or SERVER_DEFAULTS['host']
+    port = port or SERVER_DEFAULTS['port']
+    threads = threads or SERVER_DEFAULTS['threads']
+    keep_alive = keep_alive or SERVER_DEFAULTS['keep_alive']
+
+    if waitress:
+        server = waitress.create_server(
+            app,
+            host=host,
+            port=port,
+            threads=threads,
+            channel_timeout=keep_alive,
+            ident='PackerTracker'
+        )
+        print(f"🌐 Serving on http://{host}:{port} with waitress ({threads} threads)")
+        # Returns on SIGTERM/Ctrl+C after giving running requests a few seconds
+        server.run()
+        return
+
+    class RequestHandler(WSGIRequestHandler):
+        timeout = keep_alive  # Socket timeout, closes idle keep-alive connections
+
+    server = _DrainingWSGIServer(host, port, app, handler=RequestHandler)
+    server.on_stop = on_stop
+    print(f"🌐 Serving on http://{host}:{port} with Werkzeug threads (install waitress for a bounded worker pool)")
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        print("🛑 Stopping, finishing requests in progress...")
+        server.server_close()
@@ -1,7 +1,12 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
-import webbrowser
-import threading
 import time
+LAUNCHED = time.perf_counter()  # Start of the startup profile, before the heavy imports
+
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context, g
+from werkzeug.serving import make_server
+import argparse
+import threading
+import signal
+import atexit
 import sys
 import os
 
@@ -9,24 +14,116 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from controllers.packer_controller import PackerController
+from controllers.bulk_import import is_valid_order_number, open_text_stream
+from controllers.order_export import EXPORT_FORMATS
+from controllers.live_feed import parse_sequence, SubscriberLimit
+from models.file_lock import LockTimeout
+from models.database import DuplicateOrderError
+from models.instrumentation import metrics
+from server import SERVER_DEFAULTS, serve_production
 
 if hasattr(sys, '_MEIPASS'):
     base_path = sys._MEIPASS # type: ignore
 else:
     base_path = os.path.abspath(os.path.dirname(__file__))
+    if not os.path.isdir(os.path.join(base_path, 'frontend')):
+        # Development tree keeps templates in frontend/ at the repository root
+        base_path = os.path.dirname(base_path)
 
 app = Flask(__name__,
             template_folder=os.path.join(base_path, 'frontend'),
             static_folder=os.path.join(base_path, 'frontend', 'resources'))
 app.secret_key = 'your-secret-key-here'  # Required for flash messages
 
-# Initialize controller
-packer_controller = PackerController()
+# The controller loads (and if needed migrates) the data, so it is created on
+# first use or by warm_up() once the server is listening, not at import time
+packer_controller = None
+controller_lock = threading.Lock()
+startup_profile = {'imports': time.perf_counter() - LAUNCHED}
+
+# Live dashboards may hold at most half the request workers, so scans always get through
+live_subscribers = SubscriberLimit(max(1, SERVER_DEFAULTS['threads'] // 2))
+
+def get_controller():
+    """Return the shared PackerController, creating it on first use"""
+    global packer_controller
+    if packer_controller is None:
+        with controller_lock:
+            if packer_controller is None:
+                started = time.perf_counter()
+                packer_controller = PackerController()
+                startup_profile['controller'] = time.perf_counter() - started
+    return packer_controller
+
+def warm_up():
+    """Create the controller and load the data in the background so the first scan doesn't wait"""
+    started = time.perf_counter()
+    get_controller().warm_up()
+    startup_profile['data_ready'] = time.perf_counter() - LAUNCHED
+    print(f"📂 Data ready in {time.perf_counter() - started:.2f}s")
+
+def shutdown_controller():
+    """Stop background work, if the controller was ever created"""
+    if packer_controller is not None:
+        packer_controller.shutdown()
+
+def close_live_feeds():
+    """End open live order streams, so stopping the server never waits on a dashboard"""
+    if packer_controller is not None:
+        packer_controller.db.feed.close()
 
-def open_browser():
-    """Open browser after a short delay to ensure Flask is running"""
-    time.sleep(1.5)  # Wait for Flask to start
-    webbrowser.open('http://localhost:5000')
+def install_shutdown_hooks():
+    """Flush background maintenance when the app exits or the console window closes"""
+    atexit.register(shutdown_controller)
+    
+    def handle_signal(signum, frame):
+        sys.exit(0)  # Runs the atexit hooks
+    
+    for name in ('SIGTERM', 'SIGBREAK'):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), handle_signal)
+    
+    if sys.platform == 'win32':
+        # Closing the console window sends CTRL_CLOSE_EVENT, which Python does not
+        # map to a signal; Windows allows about 5 seconds of cleanup
+        import ctypes
+        
+        @ctypes.WINFUNCTYPE(ctypes.c_int, ctypes.c_uint)
+        def console_handler(event):
+            if event in (2, 5, 6):  # CTRL_CLOSE_EVENT, CTRL_LOGOFF_EVENT, CTRL_SHUTDOWN_EVENT
+                shutdown_controller()
+            return 0  # Let the default handler terminate the process
+        
+        install_shutdown_hooks.console_handler = console_handler  # Keep a reference alive
+        ctypes.windll.kernel32.SetConsoleCtrlHandler(console_handler, True)
+
+@app.before_request
+def start_request_timer():
+    if metrics.active:
+        g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    if 'first_page' not in startup_profile and request.path == '/':
+        startup_profile['first_page'] = time.perf_counter() - LAUNCHED
+        print(f"⏱️ First page served {startup_profile['first_page']:.2f}s after launch")
+
+    # Streamed responses are timed up to the first chunk, not the whole body
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.observe(
+            'packer_http_request_seconds',
+            time.perf_counter() - started,
+            route=request.url_rule.rule if request.url_rule else 'unmatched',
+            method=request.method,
+            status=response.status_code
+        )
+    return response
+
+def open_browser(port=5000):
+    """Open the browser; called once the server socket is listening"""
+    import webbrowser  # Only the station launcher needs it
+    webbrowser.open(f'http://localhost:{port}')
 
 @app.route('/')
 def index():
@@ -47,11 +144,17 @@ def submit():
         return redirect(url_for('index'))
     
     # Validate order number is 6 digits
-    if not order_number.isdigit() or len(order_number) != 6:
+    if not is_valid_order_number(order_number):
         flash('Order number must be exactly 6 digits.', 'error')
         return redirect(url_for('index'))
     
-    success = packer_controller.submit_order(packer_name, order_number)
+    controller = get_controller()
+    if controller.spool:
+        # Browser resubmissions carry the same key and are not recorded twice
+        key = request.form.get('submission_id') or request.headers.get('Idempotency-Key')
+        success = controller.submit_order_async(packer_name, order_number, key)
+    else:
+        success = controller.submit_order(packer_name, order_number)
     
     if success:
         return redirect(url_for('index'))
@@ -60,13 +163,137 @@ def submit():
 
 @app.route('/orders')
 def orders():
-    orders = packer_controller.get_all_orders()
-    packers = packer_controller.get_packer_names()
-    return render_template('orders.html', orders=orders, packers=packers)
+    # Rows are fetched page by page from /api/orders
+    packers = get_controller().get_packer_names()
+    return render_template('orders.html', packers=packers)
+
+@app.route('/api/orders')
+def api_orders():
+    try:
+        result = get_controller().query_orders(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
+@app.route('/api/orders/bulk', methods=['POST'])
+def api_orders_bulk():
+    # CSV by default; JSON Lines when asked for by ?format= or the content type
+    fmt = request.args.get('format')
+    if not fmt:
+        fmt = 'jsonl' if 'json' in (request.mimetype or '') else 'csv'
+    
+    try:
+        importer = get_controller().bulk_import(open_text_stream(request.stream), fmt)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except LockTimeout as e:
+        return jsonify({'error': str(e)}), 503
+    
+    return Response(stream_with_context(importer.iter_outcomes()), mimetype='application/x-ndjson')
+
+@app.route('/api/orders/export')
+def api_orders_export():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    try:
+        chunks = get_controller().export_orders(
+            fmt,
+            packer_name=request.args.get('packer'),
+            start_date=request.args.get('start'),
+            end_date=request.args.get('end')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    response = Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=packer_orders.{fmt}'
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if not metrics.enabled:
+        return Response("Metrics are disabled, start with PACKER_METRICS=1\n", status=404, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/orders/live')
+def api_orders_live():
+    # Browsers resume with Last-Event-ID after a dropped connection
+    after = parse_sequence(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    controller = get_controller()
+    if not live_subscribers.acquire():
+        response = jsonify({'error': 'Too many live dashboards are open, try again shortly'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    response = Response(stream_with_context(controller.live_feed(after)), mimetype='text/event-stream')
+    response.call_on_close(live_subscribers.release)  # However the stream ends, browser disconnects included
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/submissions', methods=['GET', 'POST'])
+def api_submissions():
+    controller = get_controller()
+    if request.method == 'GET':
+        return jsonify(controller.submission_status())
+    
+    if not controller.spool:
+        return jsonify({'error': 'Async submit is disabled, start with PACKER_ASYNC_SUBMIT=1'}), 404
+    payload = request.get_json(silent=True) or {}
+    order_number = str(payload.get('order_number', '')).strip()
+    if order_number and not is_valid_order_number(order_number):
+        return jsonify({'error': 'Order number must be exactly 6 digits.'}), 400
+    try:
+        entry, created = controller.queue_order(
+            payload.get('packer_name'),
+            order_number,
+            request.headers.get('Idempotency-Key') or payload.get('submission_id')
+        )
+    except DuplicateOrderError as e:
+        return jsonify({'error': str(e), 'existing': e.existing}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # 202: queued on this station, written to shared storage in the background
+    return jsonify(entry), 202 if created else 200
+
+@app.route('/api/statistics')
+def api_statistics():
+    try:
+        days = int(request.args.get('days', 7))
+    except ValueError:
+        return jsonify({'error': 'Days must be a whole number'}), 400
+    return jsonify(get_controller().get_statistics_summary(days))
+
+def parse_args():
+    """Command line options; environment variables provide the defaults"""
+    parser = argparse.ArgumentParser(description='Packer Tracker')
+    parser.add_argument('--production', action='store_true',
+                        default=os.environ.get('PACKER_SERVER', '').lower() == 'production',
+                        help='Serve all stations from this instance with a production WSGI server')
+    parser.add_argument('--host', default=os.environ.get('PACKER_HOST'),
+                        help=f"Interface to listen on (default {SERVER_DEFAULTS['host']} in production, else localhost)")
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PACKER_PORT', SERVER_DEFAULTS['port'])))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('PACKER_THREADS', SERVER_DEFAULTS['threads'])),
+                        help='Request worker threads in production mode')
+    parser.add_argument('--no-browser', action='store_true',
+                        help="Don't open the browser when the server is ready")
+    parser.add_argument('--keep-alive', type=float,
+                        default=float(os.environ.get('PACKER_KEEPALIVE', SERVER_DEFAULTS['keep_alive'])),
+                        help='Seconds idle keep-alive connections stay open in production mode')
+    return parser.parse_args()
 
 if __name__ == '__main__':
-    # Start browser in a separate thread
-    threading.Thread(target=open_browser, daemon=True).start()
+    args = parse_args()
+    install_shutdown_hooks()
+    
+    live_subscribers.limit = max(1, args.threads // 2)
+    if args.production:
+        print("🚀 Starting Packer Tracker server...")
+        threading.Thread(target=warm_up, name='packer-warm-up', daemon=True).start()
+        serve_production(app, host=args.host, port=args.port, threads=args.threads, keep_alive=args.keep_alive,
+                         on_stop=close_live_feeds)
+        sys.exit(0)  # Shutdown hooks flush queued writes and backups
     
     print("🚀 Starting Packer Tracker...")
     print("📦 Application will open in your browser automatically")
@@ -74,5 +301,14 @@ if __name__ == '__main__':
     print("❌ Close this window to stop the application")
     print("-" * 50)
     
-    # Run the Flask app
-    app.run(debug=False, host='localhost', port=5000)
+    # The socket is listening once make_server returns, so the browser can open
+    # right away; data loading and migration run while the first page renders
+    server = make_server(args.host or 'localhost', args.port, app, threaded=True)
+    startup_profile['listening'] = time.perf_counter() - LAUNCHED
+    print(f"⏱️ Listening {startup_profile['listening']:.2f}s after launch "
+          f"(imports {startup_profile['imports']:.2f}s)")
+    threading.Thread(target=warm_up, name='packer-warm-up', daemon=True).start()
+    if not args.no_browser:
+        threading.Thread(target=open_browser, args=(args.port,), daemon=True).start()
+    
+    server.serve_forever()  # Returns on Ctrl+C
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import models.* the way the application does, with backend/ on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
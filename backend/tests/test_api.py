@@ -0,0 +1,176 @@
+import io
+import json
+import time
+
+import pytest
+
+import startup
+from controllers.packer_controller import PackerController
+from controllers.bulk_import import BulkImporter
+from controllers.live_feed import SubscriberLimit, iter_events
+from models.order_feed import OrderFeed
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('PACKER_STORAGE_MODE', 'journal')
+    monkeypatch.delenv('PACKER_ASYNC_SUBMIT', raising=False)
+    controller = PackerController()
+    monkeypatch.setattr(startup, 'packer_controller', controller)
+    yield startup.app.test_client()
+    controller.shutdown()
+
+@pytest.mark.parametrize('url', [
+    '/api/orders?start=yesterday',
+    '/api/orders?end=2026-13-01',
+    '/api/orders?start=2026-02-01&end=2026-01-01',
+    '/api/orders/export?start=2026-1-1x',
+    '/api/orders/export?end=2026-7-1',
+    '/api/statistics?days=abc',
+])
+def test_malformed_filters_are_rejected(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert response.get_json()['error']
+
+def test_well_formed_filters_are_accepted(client):
+    assert client.get('/api/orders?start=2026-01-01&end=2026-01-31').status_code == 200
+    assert client.get('/api/statistics?days=30').status_code == 200
+
+def events(response, count):
+    """The first count Server-Sent Events of a streamed response, as (event, id, data)"""
+    parsed = []
+    for chunk in response.response:
+        fields = dict(
+            line.split(': ', 1) for line in chunk.decode('utf-8').strip().split('\n') if ': ' in line
+        )
+        if 'event' in fields:
+            parsed.append((fields['event'], fields.get('id'), json.loads(fields['data'])))
+        if len(parsed) == count:
+            return parsed
+    return parsed
+
+def test_live_stream_sends_ready_then_new_orders(client):
+    response = client.get('/api/orders/live', buffered=False)
+    try:
+        assert events(response, 1) == [('ready', '0', {'sequence': 0})]
+        startup.packer_controller.db.save_packer_data('A', '100001')
+        (event, event_id, data), = events(response, 1)
+        assert (event, event_id, data['order_number']) == ('order', '1', '100001')
+    finally:
+        response.close()
+
+def test_live_stream_resumes_from_the_last_event_id(client):
+    startup.packer_controller.db.save_orders([('A', '100001', '2026-01-01T00:00:00'), ('A', '100002', '2026-01-01T00:00:01')])
+    response = client.get('/api/orders/live', headers={'Last-Event-ID': '1'}, buffered=False)
+    try:
+        ready, (event, event_id, data) = events(response, 2)
+        assert ready[0] == 'ready'
+        assert (event, event_id, data['order_number']) == ('order', '2', '100002')
+    finally:
+        response.close()
+
+def test_live_stream_asks_to_resync_after_a_restart(client):
+    response = client.get('/api/orders/live?since=999', buffered=False)
+    try:
+        assert [event for event, _, _ in events(response, 2)] == ['ready', 'resync']
+    finally:
+        response.close()
+
+def test_live_streams_beyond_the_cap_are_refused(client, monkeypatch):
+    monkeypatch.setattr(startup, 'live_subscribers', SubscriberLimit(1))
+    first = client.get('/api/orders/live', buffered=False)
+    events(first, 1)
+    refused = client.get('/api/orders/live', buffered=False)
+    assert refused.status_code == 503
+    first.close()
+    again = client.get('/api/orders/live', buffered=False)
+    assert again.status_code == 200
+    again.close()
+
+def test_live_streams_end_after_their_lifetime():
+    chunks = list(iter_events(OrderFeed(), heartbeat=0.05, lifetime=0.2))
+    assert chunks[0] == 'retry: 3000\n\n' and 'event: ready' in chunks[1]
+
+def bulk(client, body, fmt='csv'):
+    response = client.post(f'/api/orders/bulk?format={fmt}', data=body.encode('utf-8'))
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return lines[:-1], lines[-1]['summary']
+
+def test_bulk_import_reads_a_header_only_when_it_names_the_columns(client):
+    outcomes, summary = bulk(client, 'Border,100001\nJordan Orders,100002\n')
+    assert [outcome['status'] for outcome in outcomes] == ['recorded', 'recorded']
+    assert outcomes[0]['packer_name'] == 'Border'
+
+    outcomes, summary = bulk(client, 'timestamp,Order Number,packer\n2026-01-01T08:00:00,100003,Ann\n')
+    assert [(o['row'], o['packer_name'], o['order_number'], o['status']) for o in outcomes] == [(2, 'Ann', '100003', 'recorded')]
+
+def test_bulk_import_reports_duplicates_and_invalid_rows(client):
+    startup.packer_controller.db.save_packer_data('A', '100001')
+    outcomes, summary = bulk(client, 'B,100001\nB,100002\nC,100002\nD,12345\n,100004\nE,100005,yesterday\n')
+    assert [outcome['status'] for outcome in outcomes] == ['duplicate', 'recorded', 'duplicate', 'invalid', 'invalid', 'invalid']
+    assert summary == {'rows': 6, 'recorded': 1, 'duplicate': 2, 'invalid': 3}
+    assert startup.packer_controller.db.find_packer_by_order('100002')['packer_name'] == 'B'
+
+def test_bulk_import_jsonl(client):
+    outcomes, summary = bulk(client, '{"packer": "A", "order": "100001"}\nnot json\n', fmt='jsonl')
+    assert [outcome['status'] for outcome in outcomes] == ['recorded', 'invalid']
+
+def test_bulk_import_commits_in_chunks(client):
+    db = startup.packer_controller.db
+    importer = BulkImporter(db, chunk_rows=3)
+    importer.stage(io.StringIO(''.join(f'A,{200000 + i}\n' for i in range(10))), 'csv')
+    calls = []
+    import_orders = db.import_orders
+    db.import_orders = lambda entries: calls.append(len(entries)) or import_orders(entries)
+    importer.commit()
+    assert calls == [3, 3, 3, 1]
+    assert [json.loads(line).get('status') for line in importer.iter_outcomes()] == ['recorded'] * 10 + [None]
+
+def test_export_filters_by_packer_and_inclusive_dates(client):
+    startup.packer_controller.db.save_orders([
+        ('A', '100001', '2026-01-01T23:59:59'),
+        ('B', '100002', '2026-01-02T08:00:00'),
+        ('A', '100003', '2026-01-03T00:00:00'),
+    ])
+    response = client.get('/api/orders/export?start=2026-01-01&end=2026-01-02')
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).splitlines() == [
+        'packer_name,order_number,timestamp',
+        'A,100001,2026-01-01T23:59:59',
+        'B,100002,2026-01-02T08:00:00',
+    ]
+
+    response = client.get('/api/orders/export?format=jsonl&packer=A')
+    assert [json.loads(line)['order_number'] for line in response.get_data(as_text=True).splitlines()] == ['100001', '100003']
+    assert client.get('/api/orders/export?format=xml').status_code == 400
+
+@pytest.fixture
+def async_client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('PACKER_STORAGE_MODE', 'journal')
+    monkeypatch.setenv('PACKER_ASYNC_SUBMIT', '1')
+    monkeypatch.setenv('PACKER_SPOOL_DIR', str(tmp_path / 'spool'))
+    controller = PackerController()
+    monkeypatch.setattr(startup, 'packer_controller', controller)
+    yield startup.app.test_client()
+    controller.shutdown()
+
+def test_resubmitting_an_idempotency_key_after_the_flush_returns_the_original(async_client):
+    submit = lambda key: async_client.post('/api/submissions', json={'packer_name': 'A', 'order_number': '100001'},
+                                           headers={'Idempotency-Key': key})
+    first = submit('scan-1')
+    assert first.status_code == 202 and first.get_json()['status'] == 'pending'
+
+    deadline = time.monotonic() + 5
+    while startup.packer_controller.spool.get('scan-1')['status'] != 'recorded':
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    again = submit('scan-1')
+    assert again.status_code == 200
+    assert again.get_json()['status'] == 'recorded'
+    assert again.get_json()['timestamp'] == first.get_json()['timestamp']
+    assert submit('scan-2').status_code == 409
+    assert async_client.get('/api/orders').get_json()['total'] == 1
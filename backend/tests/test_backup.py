@@ -0,0 +1,123 @@
+import os
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.backup import IncrementalBackupManager
+from models import database
+from models.database import PackerDatabase
+
+def orders(*numbers, day='2025-01-05'):
+    return [{'order': number, 'timestamp': f'{day}T10:00:00'} for number in numbers]
+
+def restored_orders(data):
+    return sorted(order['order'] for packer_orders in data.values() for order in packer_orders)
+
+@pytest.fixture
+def manager(tmp_path):
+    return IncrementalBackupManager(str(tmp_path / 'backups'))
+
+def test_deltas_hold_only_new_orders(manager):
+    data = {'P': orders('000000', '000001')}
+    manager.create_backup(data)
+    data['P'] += orders('000002')
+    data['Q'] = orders('000003')
+    manager.create_backup(data)
+
+    backups = manager.list_backups()
+    assert [entry['type'] for entry in backups] == ['base', 'delta']
+    assert backups[1]['orders_added'] == 2
+    assert restored_orders(manager.restore()) == ['000000', '000001', '000002', '000003']
+
+def test_rewritten_list_that_grew_back_forces_a_base(manager):
+    manager.create_backup({'P': orders('000000', '000001', '000002')})
+    # A partition roll moved P's orders out, then P scanned more than before
+    data = {'P': orders('000100', '000101', '000102', '000103', '000104', day='2025-02-05')}
+    manager.create_backup(data)
+
+    assert manager.list_backups()[-1]['type'] == 'base'
+    assert restored_orders(manager.restore()) == ['000100', '000101', '000102', '000103', '000104']
+
+def test_old_manifest_positions_force_a_base(manager):
+    manager.create_backup({'P': orders('000000')})
+    with open(manager.manifest_file) as f:
+        manifest = json.load(f)
+    manifest['positions'] = {'P': 1}
+    with open(manager.manifest_file, 'w') as f:
+        json.dump(manifest, f)
+
+    manager.create_backup({'P': orders('000000', '000001')})
+    assert manager.list_backups()[-1]['type'] == 'base'
+
+def test_damaged_delta_falls_back_to_the_previous_point(manager):
+    data = {'P': orders('000000')}
+    manager.create_backup(data)
+    data['P'] += orders('000001')
+    manager.create_backup(data)
+    with open(os.path.join(manager.backup_dir, manager.list_backups()[-1]['file']), 'a') as f:
+        f.write('garbage\n')
+
+    restored, entry = manager.restore_latest_valid()
+    assert entry == manager.list_backups()[0]
+    assert restored_orders(restored) == ['000000']
+    assert manager.verify()
+
+def test_every_point_in_a_chain_restores_as_it_was(manager):
+    data = {'P': orders('000000')}
+    manager.create_backup(data)
+    for number in ('000001', '000002'):
+        data['P'] += orders(number)
+        manager.create_backup(data)
+
+    assert restored_orders(manager.restore(0)) == ['000000']
+    assert restored_orders(manager.restore(-2)) == ['000000', '000001']
+    assert restored_orders(manager.restore(manager.list_backups()[1]['created'])) == ['000000', '000001']
+    with pytest.raises(ValueError):
+        manager.restore('2000-01-01T00:00:00')
+
+def test_a_new_base_starts_after_deltas_per_base(tmp_path):
+    manager = IncrementalBackupManager(str(tmp_path / 'backups'), deltas_per_base=2)
+    data = {'P': []}
+    for i in range(5):
+        data['P'] += orders(f'00000{i}')
+        manager.create_backup(data)
+    assert [entry['type'] for entry in manager.list_backups()] == ['base', 'delta', 'delta', 'base', 'delta']
+
+def test_retention_drops_whole_chains_and_keeps_the_rest_restorable(tmp_path):
+    manager = IncrementalBackupManager(str(tmp_path / 'backups'), max_backups=3, deltas_per_base=2)
+    data = {'P': []}
+    for i in range(7):
+        data['P'] += orders(f'00000{i}')
+        manager.create_backup(data)
+
+    backups = manager.list_backups()
+    assert backups[0]['type'] == 'base' and len(backups) >= 3
+    # Files of dropped chains are deleted, nothing the manifest still needs is
+    files = set(os.listdir(manager.backup_dir)) - {'manifest.json', 'manifest.lock'}
+    assert files == {entry['file'] for entry in backups}
+    for index in range(len(backups)):
+        manager.restore(index)
+    assert restored_orders(manager.restore()) == [f'00000{i}' for i in range(7)]
+
+def test_backups_after_partition_roll_cover_every_hot_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = PackerDatabase(str(tmp_path / 'packer_data.json'), storage_mode='journal', partition_period='month')
+    db.import_orders([('P', f'00000{i}', datetime.now().isoformat()) for i in range(3)])
+    db._create_backup()
+
+    # Next month: the roll archives P's orders, then P scans more than before
+    next_month = datetime.now() + timedelta(days=40)
+
+    class NextMonth(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next_month
+
+    monkeypatch.setattr(database, 'datetime', NextMonth)
+    assert db.roll_partitions() == 3
+    db.import_orders([('P', f'00010{i}', next_month.isoformat()) for i in range(5)])
+    db._create_backup()
+    db.shutdown()
+
+    assert restored_orders(db.backups.restore()) == ['000100', '000101', '000102', '000103', '000104']
@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import subprocess
+
+from models import compact_storage
+from models.database import PackerDatabase
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE = {
+    'Ana': [
+        {'order': '100001', 'timestamp': '2026-01-01T08:00:00'},
+        {'order': '000042', 'timestamp': '2026-01-01T08:00:01.250000'},  # Leading zeros and microseconds
+    ],
+    'Zoë Ødegård': [
+        {'order': '999999999', 'timestamp': '2025-12-31T23:59:59.999999'},
+        {'order': '7', 'timestamp': '1969-07-20T20:17:40'},  # Before the epoch
+    ],
+    'Empty': [],
+}
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+def test_json_to_compact_to_json_round_trip_is_identical(tmp_path):
+    source, compact, restored = tmp_path / 'source.json', tmp_path / 'packer_data.pkc', tmp_path / 'restored.json'
+    write_json(source, SAMPLE)
+
+    assert compact_storage.convert_json_to_compact(str(source), str(compact))
+    assert compact_storage.load(str(compact)) == SAMPLE
+    assert compact_storage.convert_compact_to_json(str(compact), str(restored))
+    assert restored.read_bytes() == source.read_bytes()
+
+def test_the_command_line_round_trip_is_identical(tmp_path):
+    write_json(tmp_path / 'source.json', SAMPLE)
+
+    def convert(*args):
+        return subprocess.run(
+            [sys.executable, os.path.join(BACKEND, 'models', 'compact_storage.py'), *args],
+            cwd=tmp_path, capture_output=True, text=True, encoding='utf-8', timeout=60
+        )
+
+    assert convert('to-compact', 'source.json', 'packer_data.pkc').returncode == 0
+    assert convert('to-json', 'packer_data.pkc', 'restored.json').returncode == 0
+    assert (tmp_path / 'restored.json').read_bytes() == (tmp_path / 'source.json').read_bytes()
+    assert convert('to-json', 'missing.pkc', 'out.json').returncode == 1
+
+def test_compact_mode_reloads_the_snapshot_plus_the_journal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data_file = str(tmp_path / 'packer_data.pkc')
+    db = PackerDatabase(data_file, storage_mode='compact')
+    db.save_orders([('A', str(100000 + i), f'2026-01-01T08:00:{i:02d}') for i in range(30)])
+    db.compact()  # These 30 live in the .pkc snapshot
+    db.save_orders([('B', str(200000 + i), f'2026-01-02T08:00:{i:02d}') for i in range(5)])  # Journal only
+    db.shutdown()
+    assert compact_storage.load(data_file)['A'][29] == {'order': '100029', 'timestamp': '2026-01-01T08:00:29'}
+    assert 'B' not in compact_storage.load(data_file)
+
+    reloaded = PackerDatabase(data_file, storage_mode='compact')
+    try:
+        assert reloaded.journal.record_count == 5
+        assert reloaded.find_packer_by_order('100000')['packer_name'] == 'A'
+        assert reloaded.find_packer_by_order('200004')['packer_name'] == 'B'
+        assert len(reloaded.get_all_orders()) == 35
+        assert reloaded.verify() == []
+
+        reloaded.compact()
+        assert reloaded.journal.record_count == 0
+        assert sum(len(orders) for orders in compact_storage.load(data_file).values()) == 35
+    finally:
+        reloaded.shutdown()
@@ -0,0 +1,312 @@
+import io
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import database
+from models.database import PackerDatabase, DuplicateOrderError
+from controllers.bulk_import import BulkImporter
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Backups go to ./backups
+    database = PackerDatabase(str(tmp_path / 'packer_data.json'), storage_mode='journal')
+    yield database
+    database.shutdown()
+
+@pytest.fixture
+def stat_calls(monkeypatch):
+    calls = []
+    real_stat = os.stat
+
+    def counting_stat(*args, **kwargs):
+        calls.append(args[0])
+        return real_stat(*args, **kwargs)
+
+    monkeypatch.setattr(os, 'stat', counting_stat)
+    return calls
+
+def test_batch_commit_checks_the_files_once_not_per_order(db, stat_calls):
+    db.import_orders([('A', str(100000 + i), '2026-01-01T00:00:00') for i in range(1000)])
+    assert len(stat_calls) < 20
+
+def test_bulk_staging_does_not_recheck_the_files_per_row(db, stat_calls):
+    db.get_packer_names()
+    stat_calls.clear()
+    importer = BulkImporter(db)
+    importer.stage(io.StringIO(''.join(f'B,{200000 + i}\n' for i in range(1000))), 'csv')
+    assert len(stat_calls) < 20
+
+def test_duplicates_are_caught_within_and_across_batches(db):
+    results = db.save_orders([('A', '100001', '2026-01-01T00:00:00'), ('B', '100001', '2026-01-01T00:00:01')])
+    assert [result['status'] for result in results] == ['recorded', 'duplicate']
+    with pytest.raises(DuplicateOrderError):
+        db.save_packer_data('C', '100001')
+
+def test_the_journal_is_compacted_by_the_maintenance_worker(db):
+    db.storage_config['compact_every_orders'] = 10
+    compacted_on = []
+    compact = db.compact
+
+    def record_thread():
+        compacted_on.append(threading.current_thread().name)
+        compact()
+
+    db.compact = record_thread
+    db.start_maintenance()
+    db.save_orders([('A', str(300000 + i), '2026-01-01T00:00:00') for i in range(20)])
+    db.shutdown()
+    assert compacted_on == ['packer-maintenance']
+    assert db.journal.record_count == 0
+
+def test_compaction_keeps_orders_recorded_while_the_snapshot_is_written(db, tmp_path):
+    db.save_orders([('A', str(400000 + i), '2026-01-01T00:00:00') for i in range(50)])
+    encode = db._encode_snapshot
+
+    def record_meanwhile(data):
+        db.save_packer_data('B', '499999')
+        return encode(data)
+
+    db._encode_snapshot = record_meanwhile
+    db.compact()
+    assert db.journal.record_count == 1
+
+    reloaded = PackerDatabase(str(tmp_path / 'packer_data.json'), storage_mode='journal')
+    try:
+        assert reloaded.find_packer_by_order('499999')['packer_name'] == 'B'
+        assert reloaded.find_packer_by_order('400049')['packer_name'] == 'A'
+        assert reloaded.verify() == []
+    finally:
+        reloaded.shutdown()
+
+def test_a_torn_journal_record_is_cut_off_and_the_rest_kept(db, tmp_path):
+    db.save_orders([('A', str(500000 + i), '2026-01-01T00:00:00') for i in range(5)])
+    with open(db.journal.journal_file, 'ab') as f:
+        f.write(b'{"packer":"A","order":"5')  # Crash mid-append
+
+    reloaded = PackerDatabase(str(tmp_path / 'packer_data.json'), storage_mode='journal')
+    try:
+        reloaded.save_packer_data('B', '500005')
+        assert [reloaded.find_packer_by_order(str(500000 + i))['packer_name'] for i in range(6)] == ['A'] * 5 + ['B']
+        assert reloaded.verify() == []
+    finally:
+        reloaded.shutdown()
+
+def test_out_of_order_batches_are_merged_into_the_time_index(db):
+    db.save_orders([('A', str(600000 + i), f'2026-01-02T00:{i // 60:02d}:{i % 60:02d}') for i in range(600)])
+    backdated = [('B', str(700000 + i), f'2026-01-{1 + i % 3:02d}T00:05:{i % 60:02d}') for i in range(300)]
+    random.Random(1).shuffle(backdated)
+    db.import_orders(backdated)
+
+    assert db._time_index == sorted(db._time_index)
+    assert len(db._time_index) == 900
+    assert db.get_recent_orders(1)[0]['order_number'] == '700299'  # 2026-01-03T00:05:59
+
+def test_verify_reports_damage_without_recovering_and_repair_restores(db, tmp_path):
+    data_file = str(tmp_path / 'packer_data.json')
+    db.save_orders([('A', str(800000 + i), '2026-01-01T00:00:00') for i in range(60)])  # Backed up at 50
+    db.compact()
+    db.save_packer_data('B', '800060')  # Only in the journal
+    with open(data_file, 'r+b') as f:
+        f.truncate(os.path.getsize(data_file) // 2)
+    with open(data_file, 'rb') as f:
+        damaged = f.read()
+
+    inspector = PackerDatabase(data_file, storage_mode='journal', prepare=False)
+    try:
+        assert any('packer_data.json' in problem for problem in inspector.verify())
+        with open(data_file, 'rb') as f:
+            assert f.read() == damaged
+        assert not [name for name in os.listdir(tmp_path) if '.corrupt-' in name]
+
+        assert inspector.repair() == []
+        assert inspector.last_recovery['orders_from_backup'] >= 50
+        assert all(inspector.find_packer_by_order(str(800000 + i)) for i in range(61))
+    finally:
+        inspector.shutdown()
+
+def test_a_damaged_record_mid_journal_costs_only_that_order(db, tmp_path):
+    db.save_orders([('A', str(900000 + i), '2026-01-01T00:00:00') for i in range(3)])
+    with open(db.journal.journal_file, 'rb') as f:
+        lines = f.read().split(b'\n')
+    lines[1] = lines[1].replace(b'900001', b'900009')  # Bit rot: the CRC no longer matches
+    with open(db.journal.journal_file, 'wb') as f:
+        f.write(b'\n'.join(lines))
+
+    reloaded = PackerDatabase(str(tmp_path / 'packer_data.json'), storage_mode='journal')
+    try:
+        assert reloaded.find_packer_by_order('900000') and reloaded.find_packer_by_order('900002')
+        assert reloaded.find_packer_by_order('900001') is None
+        assert reloaded.find_packer_by_order('900009') is None
+        assert reloaded.journal.damaged_records == 1
+    finally:
+        reloaded.shutdown()
+
+def test_a_crash_between_snapshot_swap_and_journal_trim_loses_and_repeats_nothing(db, tmp_path):
+    db.save_orders([('A', str(910000 + i), '2026-01-01T00:00:00') for i in range(10)])
+    db.journal.discard_before = lambda offset: None  # Crash right after the snapshot is replaced
+    db.compact()
+
+    reloaded = PackerDatabase(str(tmp_path / 'packer_data.json'), storage_mode='journal')
+    try:
+        orders = reloaded.get_all_orders()
+        assert sorted(order['order_number'] for order in orders) == [str(910000 + i) for i in range(10)]
+    finally:
+        reloaded.shutdown()
+
+def test_a_damaged_snapshot_is_recovered_on_load_with_salvaged_orders(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data_file = str(tmp_path / 'packer_data.json')
+    db = PackerDatabase(data_file)  # JSON mode: the snapshot holds everything
+    db.save_orders([('A', str(920000 + i), '2026-01-01T00:00:00') for i in range(50)])  # Backed up at 50
+    db.save_orders([('B', str(930000 + i), '2026-01-01T00:00:01') for i in range(10)])
+    db.shutdown()
+    with open(data_file, 'rb') as f:
+        raw = f.read()
+    with open(data_file, 'wb') as f:
+        f.write(raw[:raw.rindex(b'930008')])  # Torn write: the last orders are cut off
+
+    reloaded = PackerDatabase(data_file)
+    try:
+        found = [order['order_number'] for order in reloaded.get_all_orders()]
+        recovery = reloaded.last_recovery
+        assert recovery['orders_from_backup'] == 50
+        assert recovery['orders_salvaged'] == len(found) - 50 >= 8
+        assert os.path.exists(recovery['damaged_copy'])
+        assert reloaded.verify() == []
+    finally:
+        reloaded.shutdown()
+
+def test_a_write_between_another_stations_stat_and_read_stays_a_duplicate(db, tmp_path):
+    db.storage_config['stats_persist_every'] = 1  # Station A persists rollups tagged with its file state
+    db.save_packer_data('A', '100001')
+    db.storage_config['stats_persist_every'] = 25  # ...but not for the next write
+    station_b = PackerDatabase(str(tmp_path / 'packer_data.json'), storage_mode='journal')
+    load = station_b._load_data
+
+    def load_after_station_a_writes():
+        db.save_packer_data('A', '100002')  # Lands after B's stat, before its read
+        return load()
+
+    station_b._load_data = load_after_station_a_writes
+    try:
+        assert station_b.find_packer_by_order('100001')
+        station_b._load_data = load
+        assert station_b.find_packer_by_order('100002')['packer_name'] == 'A'
+        with pytest.raises(DuplicateOrderError):
+            station_b.save_packer_data('B', '100002')
+        assert station_b.get_statistics_summary()['packers']['A']['total_orders'] == 2
+    finally:
+        station_b.shutdown()
+
+def test_orders_rolled_into_a_closed_month_stay_visible_and_unique(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data_file = str(tmp_path / 'packer_data.json')
+    db = PackerDatabase(data_file, storage_mode='journal', partition_period='month')
+    this_month = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    db.import_orders([('A', str(940000 + i), (this_month + timedelta(seconds=i)).isoformat()) for i in range(3)])
+
+    next_month = this_month + timedelta(days=40)
+
+    class NextMonth(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next_month
+
+    monkeypatch.setattr(database, 'datetime', NextMonth)
+    assert db.roll_partitions() == 3
+    db.save_packer_data('B', '950000')  # Stamped next month
+    db.compact()
+    with open(data_file, encoding='utf-8') as f:
+        assert '940000' not in f.read()  # Only the archive holds last month now
+
+    station_b = PackerDatabase(data_file, storage_mode='journal', partition_period='month')
+    try:
+        for station in (db, station_b):
+            assert station.find_packer_by_order('940001')['packer_name'] == 'A'
+            day = this_month.strftime('%Y-%m-%d')
+            archived = station.query_orders(start_date=day, end_date=day)
+            assert [order['order_number'] for order in archived['orders']] == ['940002', '940001', '940000']
+            by_number = station.query_orders(start_date=day, sort='order_number', descending=False)
+            assert [order['order_number'] for order in by_number['orders']] == ['940000', '940001', '940002', '950000']
+            assert station.query_orders(end_date=next_month.strftime('%Y-%m-%d'))['total'] == 4
+
+        with pytest.raises(DuplicateOrderError):
+            station_b.save_packer_data('C', '940000')
+        assert station_b.save_orders([('C', '940002', next_month.isoformat())])[0]['status'] == 'duplicate'
+        assert db.find_packer_by_order('940002')['packer_name'] == 'A'
+    finally:
+        station_b.shutdown()
+        db.shutdown()
+
+def resident_view(station):
+    """What one station answers from its resident view, for comparing stations"""
+    station._get_data()
+    stats = station.get_statistics_summary()
+    stats.pop('generated_at')
+    return {
+        'index': dict(station._order_index),
+        'time_index': list(station._time_index),
+        'stats': stats,
+        'recent': station.get_recent_orders(5),
+    }
+
+def test_another_stations_appends_are_picked_up_from_the_journal_tail(db, tmp_path):
+    db.save_orders([('A', str(960000 + i), f'2026-01-02T08:00:{i:02d}') for i in range(10)])
+    station_b = PackerDatabase(str(tmp_path / 'packer_data.json'), storage_mode='journal')
+    full_loads = []
+    load = station_b._load_data
+
+    def counting_load():
+        full_loads.append(1)
+        return load()
+
+    try:
+        assert station_b.find_packer_by_order('960000')
+        station_b._load_data = counting_load
+        db.save_orders([('C', '960100', '2026-01-02T09:00:00'), ('A', '960101', '2026-01-01T07:00:00')])  # One back-dated
+        db.save_packer_data('C', '960102')
+
+        assert station_b.find_packer_by_order('960101')['packer_name'] == 'A'
+        assert full_loads == []
+        assert station_b.order_bitmap.might_contain('960102')
+        assert station_b.get_statistics_summary()['packers']['C']['total_orders'] == 2
+        assert station_b._time_index[0][1] == '960101'
+        with pytest.raises(DuplicateOrderError):
+            station_b.save_packer_data('B', '960100')
+
+        fresh = PackerDatabase(str(tmp_path / 'packer_data.json'), storage_mode='journal')
+        try:
+            assert resident_view(station_b) == resident_view(fresh) == resident_view(db)
+        finally:
+            fresh.shutdown()
+        assert full_loads == []
+    finally:
+        station_b.shutdown()
+
+def test_compaction_between_reads_forces_a_full_reload(db, tmp_path):
+    db.save_orders([('A', str(970000 + i), '2026-01-01T08:00:00') for i in range(10)])
+    station_b = PackerDatabase(str(tmp_path / 'packer_data.json'), storage_mode='journal')
+    full_loads = []
+    load = station_b._load_data
+
+    def counting_load():
+        full_loads.append(1)
+        return load()
+
+    try:
+        assert station_b.find_packer_by_order('970000')
+        station_b._load_data = counting_load
+        db.compact()  # The journal shrinks to nothing and the snapshot is replaced
+        db.save_orders([('B', str(980000 + i), '2026-01-01T09:00:00') for i in range(12)])  # ...and grows past B's offset
+
+        assert station_b.find_packer_by_order('980011')['packer_name'] == 'B'
+        assert full_loads == [1]
+        assert station_b.journal.offset == db.journal.offset
+        assert station_b.get_statistics_summary()['packers']['A']['total_orders'] == 10
+        assert resident_view(station_b) == resident_view(db)
+    finally:
+        station_b.shutdown()
@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import multiprocessing
+
+import pytest
+
+from models import file_lock
+from models.file_lock import InterProcessLock, LockTimeout
+from models.database import PackerDatabase
+
+@pytest.fixture(params=['fcntl', 'lock file only'])
+def lock_path(request, tmp_path, monkeypatch):
+    if request.param == 'lock file only':
+        monkeypatch.setattr(file_lock, 'fcntl', None)  # As on Windows stations
+    return str(tmp_path / 'packer_data.json.lock')
+
+def test_old_mtime_does_not_break_a_live_lock(lock_path):
+    holder = InterProcessLock(lock_path, stale_after=0.3)
+    waiter = InterProcessLock(lock_path, stale_after=0.3)
+    with holder:
+        # File server clock far behind ours, or a hold longer than stale_after
+        old = time.time() - 45
+        os.utime(lock_path, (old, old))
+        with pytest.raises(LockTimeout):
+            waiter.acquire(timeout=1.0)
+        assert os.path.exists(lock_path)
+    assert not os.path.exists(lock_path)
+    assert waiter.metrics['stale_locks_broken'] == 0
+
+def test_abandoned_lock_is_broken_after_stale_after(lock_path):
+    with open(lock_path, 'w') as f:
+        json.dump({'pid': 0, 'host': 'crashed', 'token': 'gone', 'beat': 0}, f)
+
+    waiter = InterProcessLock(lock_path, stale_after=0.2)
+    started = time.monotonic()
+    with waiter:
+        if not file_lock.fcntl:
+            # Without flock, only an unchanged lock file for stale_after seconds proves the holder is gone
+            assert time.monotonic() - started >= 0.2
+        assert waiter.metrics['stale_locks_broken'] == 1
+    assert not os.path.exists(lock_path)
+    assert not [name for name in os.listdir(os.path.dirname(lock_path)) if '.stale-' in name]
+
+def test_release_keeps_a_lock_file_taken_over_by_another_station(lock_path):
+    holder = InterProcessLock(lock_path, stale_after=0.3)
+    holder.acquire()
+    if os.name != 'nt':
+        os.unlink(lock_path)
+    with open(lock_path, 'w') as f:
+        json.dump({'pid': 0, 'host': 'other', 'token': 'theirs', 'beat': 0}, f)
+    holder.release()
+    with open(lock_path) as f:
+        assert json.load(f)['token'] == 'theirs'
+
+def test_lock_is_reentrant_and_removed_on_release(lock_path):
+    lock = InterProcessLock(lock_path)
+    with lock:
+        with lock:
+            assert lock.held
+        assert os.path.exists(lock_path)
+    assert not lock.held
+    assert not os.path.exists(lock_path)
+
+def record_orders(data_file, first, count, lock_file_only):
+    """One station: full read-modify-write saves of its own orders"""
+    os.chdir(os.path.dirname(data_file))
+    if lock_file_only:
+        file_lock.fcntl = None
+    db = PackerDatabase(data_file)
+    for order in range(first, first + count):
+        db.save_packer_data(f'P{first}', str(order))
+    db.shutdown()
+
+def test_concurrent_stations_never_lose_an_update(lock_path):
+    data_file = lock_path[:-len('.lock')]
+    stations = [
+        multiprocessing.Process(target=record_orders, args=(data_file, first, 25, file_lock.fcntl is None))
+        for first in (100000, 200000, 300000)
+    ]
+    for station in stations:
+        station.start()
+    for station in stations:
+        station.join(60)
+        assert station.exitcode == 0
+
+    os.chdir(os.path.dirname(data_file))
+    db = PackerDatabase(data_file)
+    try:
+        assert len(db.get_all_orders()) == 75
+    finally:
+        db.shutdown()
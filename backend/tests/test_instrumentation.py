@@ -0,0 +1,27 @@
+import os
+import sys
+import subprocess
+
+from models.instrumentation import Metrics
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_slow_threshold_is_read_in_milliseconds(monkeypatch):
+    monkeypatch.setenv('PACKER_SLOW_MS', '250')
+    assert Metrics.from_environment().slow_threshold == 0.25
+
+def test_malformed_slow_threshold_is_ignored_with_a_warning(monkeypatch, capsys):
+    for value in ('200ms', '-5', 'nan'):
+        monkeypatch.setenv('PACKER_SLOW_MS', value)
+        assert Metrics.from_environment().slow_threshold is None
+        assert 'PACKER_SLOW_MS' in capsys.readouterr().out
+
+def test_malformed_slow_threshold_does_not_stop_startup(monkeypatch):
+    monkeypatch.setenv('PACKER_SLOW_MS', '200ms')
+    result = subprocess.run(
+        [sys.executable, '-c', 'import models.instrumentation'],
+        cwd=BACKEND,
+        capture_output=True, text=True, encoding='utf-8', timeout=60
+    )
+    assert result.returncode == 0
+    assert 'Ignoring PACKER_SLOW_MS' in result.stdout
@@ -0,0 +1,29 @@
+import threading
+import urllib.request
+
+from models.order_feed import OrderFeed
+from controllers.live_feed import iter_events
+from server import _DrainingWSGIServer
+
+def test_closing_the_server_ends_open_live_streams():
+    feed = OrderFeed()
+
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/event-stream')])
+        return (chunk.encode('utf-8') for chunk in iter_events(feed, heartbeat=0.1))
+
+    server = _DrainingWSGIServer('127.0.0.1', 0, app)
+    server.on_stop = feed.close
+    serving = threading.Thread(target=server.serve_forever, daemon=True)
+    serving.start()
+    stream = urllib.request.urlopen(f'http://127.0.0.1:{server.server_port}/', timeout=5)
+    try:
+        assert stream.readline() == b'retry: 3000\n'
+        server.shutdown()
+        closing = threading.Thread(target=server.server_close, daemon=True)
+        closing.start()
+        closing.join(5)
+        assert not closing.is_alive()  # The request thread was joined, not left streaming
+    finally:
+        feed.close()  # Never leave a request thread behind, even when failing
+        stream.close()
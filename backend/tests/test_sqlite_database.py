@@ -0,0 +1,13 @@
+import pytest
+
+from models.sqlite_database import SQLitePackerDatabase
+
+def journal_mode(db):
+    return db._connection().execute("PRAGMA journal_mode").fetchone()[0]
+
+def test_rollback_journal_by_default_and_wal_only_when_asked(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert journal_mode(SQLitePackerDatabase(str(tmp_path / 'share.db'))) == 'delete'
+    assert journal_mode(SQLitePackerDatabase(str(tmp_path / 'local.db'), journal_mode='WAL')) == 'wal'
+    with pytest.raises(ValueError):
+        SQLitePackerDatabase(str(tmp_path / 'bad.db'), journal_mode='wal; DROP TABLE orders')
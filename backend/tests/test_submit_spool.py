@@ -0,0 +1,92 @@
+import time
+import threading
+
+import pytest
+
+from models.database import PackerDatabase, DuplicateOrderError
+from models.file_lock import LockTimeout
+from models.submit_spool import SubmitSpool
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    database = PackerDatabase(str(tmp_path / 'packer_data.json'), storage_mode='journal')
+    yield database
+    database.shutdown()
+
+def test_known_duplicates_are_rejected_before_queuing(db, tmp_path):
+    db.save_packer_data('A', '100001')
+    spool = SubmitSpool(db, str(tmp_path / 'spool.jsonl'))
+
+    with pytest.raises(DuplicateOrderError) as e:
+        spool.submit('B', '100001')
+    assert e.value.existing['packer_name'] == 'A'
+    assert spool.status()['pending'] == []
+
+    entry, created = spool.submit('B', '100002')
+    assert created and entry['status'] == 'pending'
+
+def test_a_busy_writer_never_blocks_the_duplicate_check(db, tmp_path):
+    db.save_packer_data('A', '100001')
+    spool = SubmitSpool(db, str(tmp_path / 'spool.jsonl'))
+    with db.lock:  # Held by the flush thread during a slow share write
+        results = []
+        thread = threading.Thread(target=lambda: results.append(spool.submit('B', '100001')))
+        thread.start()
+        thread.join(5)
+    assert results and results[0][1]  # Queued; the flush reports the duplicate later
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+def test_a_failed_flush_keeps_the_scan_pending_and_retries_it(db, tmp_path):
+    spool = SubmitSpool(db, str(tmp_path / 'spool.jsonl'), retry_initial=0.01, retry_max=0.05)
+    failures = [OSError('share unreachable'), LockTimeout('lock busy')]
+    seen_between = []
+    save_orders = db.save_orders
+
+    def flaky_save(orders):
+        seen_between.append(spool.get('A:100001'))
+        if failures:
+            raise failures.pop(0)
+        return save_orders(orders)
+
+    db.save_orders = flaky_save
+    spool.submit('A', '100001')
+    spool.start()
+    try:
+        wait_for(lambda: spool.get('A:100001')['status'] == 'recorded')
+    finally:
+        spool.shutdown()
+
+    assert [(entry['status'], entry['attempts']) for entry in seen_between] == [('pending', 0), ('pending', 1), ('pending', 2)]
+    assert seen_between[2]['error'] == 'lock busy'
+    entry = spool.get('A:100001')
+    assert entry['attempts'] == 3 and entry['error'] is None
+    assert db.find_packer_by_order('100001')['timestamp'] == entry['timestamp']
+    assert spool.status()['last_error'] is None
+
+def test_scans_left_pending_at_shutdown_are_flushed_on_the_next_start(db, tmp_path):
+    spool_file = str(tmp_path / 'spool.jsonl')
+    spool = SubmitSpool(db, spool_file)
+    queued = [spool.submit('A', str(100010 + i))[0] for i in range(3)]
+    assert spool.shutdown() is False  # Never started: the shared storage was unreachable
+    db.shutdown()
+
+    station = PackerDatabase(str(tmp_path / 'packer_data.json'), storage_mode='journal')
+    restarted = SubmitSpool(station, spool_file)
+    try:
+        assert len(restarted.status()['pending']) == 3
+        restarted.start()
+        wait_for(lambda: not restarted.status()['pending'])
+        assert restarted.shutdown()
+        for entry in queued:
+            assert station.find_packer_by_order(entry['order_number'])['timestamp'] == entry['timestamp']
+            assert restarted.get(entry['key'])['status'] == 'recorded'
+    finally:
+        station.shutdown()
+
+    assert SubmitSpool(db, spool_file).status()['recorded'] == 3  # The outcome was spooled too
@@ -0,0 +1,34 @@
+import os
+import sys
+import subprocess
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_tool(tool, *args, cwd):
+    env = dict(os.environ, PACKER_STORAGE_MODE='journal')
+    env.pop('PACKER_ASYNC_SUBMIT', None)
+    return subprocess.run(
+        [sys.executable, os.path.join(BACKEND, tool), *args],
+        cwd=cwd, env=env, capture_output=True, text=True, encoding='utf-8', timeout=60
+    )
+
+def test_export_tool_writes_filtered_csv_and_jsonl(tmp_path):
+    (tmp_path / 'scans.csv').write_text('A,100001,2026-01-01T08:00:00\nB,100002,2026-01-02T08:00:00\n')
+    assert run_tool('import_tool.py', 'scans.csv', cwd=tmp_path).returncode == 0
+
+    result = run_tool('export_tool.py', '--start', '2026-01-02', cwd=tmp_path)
+    assert result.returncode == 0
+    assert result.stdout.splitlines() == ['packer_name,order_number,timestamp', 'B,100002,2026-01-02T08:00:00']
+
+    assert run_tool('export_tool.py', 'out.jsonl', '--packer', 'A', cwd=tmp_path).returncode == 0
+    assert '"100001"' in (tmp_path / 'out.jsonl').read_text() and '100002' not in (tmp_path / 'out.jsonl').read_text()
+
+def test_export_tool_rejects_malformed_dates(tmp_path):
+    result = run_tool('export_tool.py', '--start', '2025-7-1', cwd=tmp_path)
+    assert result.returncode == 1
+    assert 'YYYY-MM-DD' in result.stderr
+    assert result.stdout == ''
+
+def test_export_tool_never_creates_data_files(tmp_path):
+    assert run_tool('export_tool.py', cwd=tmp_path).returncode == 0
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('packer_data')]
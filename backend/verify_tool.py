@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Verify tool for Packer Tracker: check every data file against its checksums and repair damage
+"""
+
+import os
+import sys
+import argparse
+
+# Add the backend directory to the path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from controllers.packer_controller import open_database
+from models.file_lock import LockTimeout
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Packer Tracker integrity check (storage mode from PACKER_STORAGE_MODE)'
+    )
+    parser.add_argument('--repair', action='store_true',
+                        help='Restore a damaged data file from backups and drop damaged journal records')
+    args = parser.parse_args()
+
+    # Just the storage, opened as found: a plain check must report damage, not
+    # recover from it at startup, and needs no maintenance worker or spool
+    db = open_database(prepare=args.repair)
+    try:
+        problems = db.repair() if args.repair else db.verify()
+        recovery = getattr(db, 'last_recovery', None)
+        if recovery:
+            print(f"🔄 Recovered from backup {recovery['backup']} ({recovery['backup_created']}): "
+                  f"{recovery['orders_from_backup']} orders, {recovery['orders_salvaged']} salvaged, "
+                  f"{recovery['orders_from_journal']} from the journal")
+    except (OSError, LockTimeout) as e:
+        print(f"❌ Verification failed: {e}")
+        return False
+    finally:
+        db.shutdown()
+
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        if not args.repair:
+            print("💡 Run with --repair to restore from backups")
+        return False
+
+    print("✅ All data files are intact")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -9,4 +9,49 @@ document.addEventListener('DOMContentLoaded', function() {
             }, 500);
         }, 5000);
     });
-}); 
\ No newline at end of file
+});
+
+// One idempotency key per page load, sent with the form
+document.addEventListener('DOMContentLoaded', function() {
+    const field = document.getElementById('submission_id');
+    if (field) {
+        field.value = (window.crypto && crypto.randomUUID)
+            ? crypto.randomUUID()
+            : Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+});
+
+// Scans queued on this station but not yet written to shared storage (async submit mode)
+function refreshSubmissionStatus() {
+    const box = document.getElementById('submission-status');
+    if (!box) {
+        return;
+    }
+    fetch('/api/submissions')
+        .then(function(response) { return response.json(); })
+        .then(function(status) {
+            if (!status.enabled) {
+                return;
+            }
+            const lines = [];
+            if (status.pending.length) {
+                let line = `⏳ ${status.pending.length} scan(s) waiting for shared storage`;
+                if (status.last_error) {
+                    line += `, retrying in ${Math.ceil(status.retry_in_seconds)}s`;
+                }
+                lines.push(line);
+            }
+            status.failed.slice(-3).forEach(function(entry) {
+                lines.push(`❌ ${entry.error}`);
+            });
+            box.textContent = lines.join('\n');
+            box.hidden = lines.length === 0;
+            box.classList.toggle('submission-failed', status.failed.length > 0);
+            setTimeout(refreshSubmissionStatus, status.pending.length ? 2000 : 10000);
+        })
+        .catch(function() {
+            setTimeout(refreshSubmissionStatus, 10000);
+        });
+}
+
+document.addEventListener('DOMContentLoaded', refreshSubmissionStatus);
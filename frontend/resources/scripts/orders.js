@@ -5,59 +5,142 @@ document.addEventListener('DOMContentLoaded', function() {
     const dateEnd = document.getElementById('date-end');
     const clearFilters = document.getElementById('clear-filters');
     const ordersTable = document.getElementById('orders-table');
+    const ordersBody = document.getElementById('orders-body');
     const resultsCount = document.getElementById('results-count');
+    const noOrders = document.getElementById('no-orders');
+    const loadMore = document.getElementById('load-more');
+    const liveStatus = document.getElementById('live-status');
+    const packerCounts = document.getElementById('packer-counts');
     
-    // Get all table rows (excluding header)
-    const tableRows = ordersTable ? Array.from(ordersTable.querySelectorAll('tbody tr')) : [];
+    const PAGE_SIZE = 100;
     
-    function filterOrders() {
-        const searchTerm = orderSearch.value.toLowerCase();
-        const selectedPacker = packerFilter.value;
-        const startDate = dateStart.value;
-        const endDate = dateEnd.value;
-        
-        let visibleCount = 0;
+    let sortField = 'timestamp';
+    let sortDirection = 'desc';
+    let nextCursor = null;
+    let loadedCount = 0;
+    let totalCount = 0;
+    let newOrders = 0;  // Live orders not shown because of the current sort
+    const shownOrders = new Set();  // Order numbers in the table, so live rows aren't duplicated
+    let requestId = 0;  // Ignore responses from superseded requests
+    let searchTimer = null;
+    
+    function buildQuery(cursor) {
+        const params = new URLSearchParams({
+            sort: sortField,
+            direction: sortDirection,
+            limit: PAGE_SIZE
+        });
+        if (orderSearch.value.trim()) params.set('q', orderSearch.value.trim());
+        if (packerFilter.value) params.set('packer', packerFilter.value);
+        if (dateStart.value) params.set('start', dateStart.value);
+        if (dateEnd.value) params.set('end', dateEnd.value);
+        if (cursor) params.set('cursor', cursor);
+        return params.toString();
+    }
+    
+    function createRow(order) {
+        const row = document.createElement('tr');
+        [order.packer_name, order.order_number, order.timestamp].forEach(value => {
+            const cell = document.createElement('td');
+            cell.textContent = value;
+            row.appendChild(cell);
+        });
+        shownOrders.add(order.order_number);
+        return row;
+    }
+    
+    function appendRows(orders) {
+        const fragment = document.createDocumentFragment();
+        orders.forEach(order => fragment.appendChild(createRow(order)));
+        ordersBody.appendChild(fragment);
+    }
+    
+    function updateResultsInfo() {
+        resultsCount.textContent = `Showing ${loadedCount} of ${totalCount} orders`;
+        if (newOrders) {
+            resultsCount.textContent += ` (${newOrders} new, sort by newest time to see them)`;
+        }
+    }
+    
+    function fetchOrders(reset) {
+        const currentRequest = ++requestId;
+        const cursor = reset ? null : nextCursor;
         
-        tableRows.forEach(row => {
-            const packerName = row.getAttribute('data-packer').toLowerCase();
-            const orderNumber = row.getAttribute('data-order').toLowerCase();
-            const orderDate = row.getAttribute('data-date');
-            
-            // Check search term
-            const matchesSearch = !searchTerm || orderNumber.includes(searchTerm);
-            
-            // Check packer filter
-            const matchesPacker = !selectedPacker || packerName === selectedPacker.toLowerCase();
-            
-            // Check date range
-            let matchesDate = true;
-            if (startDate && orderDate < startDate) {
-                matchesDate = false;
-            }
-            if (endDate && orderDate > endDate) {
-                matchesDate = false;
-            }
-            
-            // Show/hide row based on all filters
-            if (matchesSearch && matchesPacker && matchesDate) {
-                row.style.display = '';
-                visibleCount++;
-            } else {
-                row.style.display = 'none';
+        loadMore.disabled = true;
+        fetch(`/api/orders?${buildQuery(cursor)}`)
+            .then(response => response.json())
+            .then(result => {
+                if (currentRequest !== requestId) return;
+                if (result.error) {
+                    resultsCount.textContent = `⚠️ ${result.error}`;
+                    return;
+                }
+                
+                if (reset) {
+                    ordersBody.innerHTML = '';
+                    shownOrders.clear();
+                    loadedCount = 0;
+                    newOrders = 0;
+                }
+                appendRows(result.orders);
+                loadedCount += result.orders.length;
+                totalCount = result.total;
+                nextCursor = result.next_cursor;
+                
+                updateResultsInfo();
+                ordersTable.style.display = result.total ? '' : 'none';
+                noOrders.style.display = result.total ? 'none' : '';
+                loadMore.style.display = nextCursor ? '' : 'none';
+            })
+            .catch(() => {
+                if (currentRequest === requestId) {
+                    resultsCount.textContent = '⚠️ Could not load orders. Please try again.';
+                }
+            })
+            .finally(() => {
+                loadMore.disabled = false;
+            });
+    }
+    
+    function filterOrders() {
+        fetchOrders(true);
+    }
+    
+    function updateSortIndicators() {
+        ordersTable.querySelectorAll('th.sortable').forEach(header => {
+            header.classList.remove('sort-asc', 'sort-desc');
+            if (header.getAttribute('data-sort') === sortField) {
+                header.classList.add(sortDirection === 'asc' ? 'sort-asc' : 'sort-desc');
             }
         });
-        
-        // Update results count
-        if (resultsCount) {
-            resultsCount.textContent = `Showing ${visibleCount} orders`;
-        }
     }
     
     // Add event listeners
-    if (orderSearch) orderSearch.addEventListener('input', filterOrders);
+    if (orderSearch) {
+        orderSearch.addEventListener('input', function() {
+            // Wait for typing to pause before hitting the server
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(filterOrders, 250);
+        });
+    }
     if (packerFilter) packerFilter.addEventListener('change', filterOrders);
     if (dateStart) dateStart.addEventListener('change', filterOrders);
     if (dateEnd) dateEnd.addEventListener('change', filterOrders);
+    if (loadMore) loadMore.addEventListener('click', () => fetchOrders(false));
+    
+    ordersTable.querySelectorAll('th.sortable').forEach(header => {
+        header.addEventListener('click', function() {
+            const field = header.getAttribute('data-sort');
+            if (field === sortField) {
+                sortDirection = sortDirection === 'asc' ? 'desc' : 'asc';
+            } else {
+                sortField = field;
+                sortDirection = field === 'timestamp' ? 'desc' : 'asc';
+            }
+            updateSortIndicators();
+            filterOrders();
+        });
+    });
     
     // Clear filters
     if (clearFilters) {
@@ -70,6 +153,103 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
-    // Initialize filter
+    function matchesFilters(order) {
+        const search = orderSearch.value.trim();
+        const day = order.timestamp.slice(0, 10);
+        return (!search || order.order_number.includes(search))
+            && (!packerFilter.value || order.packer_name === packerFilter.value)
+            && (!dateStart.value || day >= dateStart.value)
+            && (!dateEnd.value || day <= dateEnd.value);
+    }
+    
+    function updatePackerCount(packerName, counts) {
+        let chip = Array.from(packerCounts.children).find(element => element.dataset.packer === packerName);
+        if (!chip) {
+            chip = document.createElement('span');
+            chip.className = 'packer-count';
+            chip.dataset.packer = packerName;
+            packerCounts.appendChild(chip);
+            
+            if (!Array.from(packerFilter.options).some(option => option.value === packerName)) {
+                packerFilter.appendChild(new Option(packerName, packerName));
+            }
+        }
+        chip.textContent = `👤 ${packerName}: ${counts.today} today, ${counts.total_orders} total`;
+    }
+    
+    function showLiveOrder(order) {
+        updatePackerCount(order.packer_name, order.counts);
+        if (shownOrders.has(order.order_number) || !matchesFilters(order)) return;
+        
+        totalCount += 1;
+        if (sortField === 'timestamp' && sortDirection === 'desc') {
+            const row = createRow(order);
+            row.classList.add('live-new');
+            ordersBody.insertBefore(row, ordersBody.firstChild);
+            loadedCount += 1;
+            ordersTable.style.display = '';
+            noOrders.style.display = 'none';
+        } else {
+            newOrders += 1;
+        }
+        updateResultsInfo();
+    }
+    
+    function loadPackerCounts() {
+        fetch('/api/statistics?days=1')
+            .then(response => response.json())
+            .then(summary => {
+                Object.entries(summary.packers).forEach(([packerName, stats]) => {
+                    updatePackerCount(packerName, {today: stats.today, total_orders: stats.total_orders});
+                });
+            })
+            .catch(() => {});
+    }
+    
+    let liveSequence = null;  // Last event id seen, to resume after the server turned us away
+    
+    function connectLiveFeed() {
+        if (!window.EventSource) {
+            liveStatus.textContent = '⚪ Live updates not supported, reload to see new orders';
+            return;
+        }
+        
+        // Pushes only orders recorded after the table was loaded
+        const url = liveSequence === null ? '/api/orders/live' : `/api/orders/live?since=${liveSequence}`;
+        const source = new EventSource(url);
+        const remember = event => {
+            if (event.lastEventId) {
+                liveSequence = event.lastEventId;
+            }
+        };
+        source.addEventListener('ready', event => {
+            remember(event);
+            liveStatus.textContent = '🟢 Live';
+        });
+        source.addEventListener('order', event => {
+            remember(event);
+            showLiveOrder(JSON.parse(event.data));
+        });
+        source.addEventListener('resync', event => {
+            remember(event);
+            // Missed too many orders (or the server restarted): start over
+            loadPackerCounts();
+            filterOrders();
+        });
+        source.addEventListener('error', () => {
+            if (source.readyState === EventSource.CLOSED) {
+                // Refused (too many live pages open): EventSource gives up, so retry later ourselves
+                liveStatus.textContent = '⚪ Live updates busy, retrying shortly...';
+                setTimeout(connectLiveFeed, 30000);
+                return;
+            }
+            liveStatus.textContent = '🟡 Reconnecting...';  // EventSource retries by itself
+        });
+    }
+    
+    // Load the first page
+    updateSortIndicators();
+    connectLiveFeed();
+    loadPackerCounts();
     filterOrders();
-}); 
\ No newline at end of file
+});